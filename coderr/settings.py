@@ -8,6 +8,17 @@ SECRET_KEY = config('DJANGO_SECRET_KEY')
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Uploads werden inhaltsadressiert unter media/blobs/ gespeichert; die URLs dort
+# ändern sich nie und können vom Medienserver unbegrenzt gecacht werden.
+STORAGES = {
+    "default": {
+        "BACKEND": "coderr_app.storage.ContentAddressedStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
 DEBUG = True
 
 ALLOWED_HOSTS = []
@@ -30,6 +41,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'coderr_app.middleware.SQLInstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     # 'django.middleware.csrf.CsrfViewMiddleware',
@@ -100,7 +112,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        'user_auth_app.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -108,4 +120,58 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
     ],
-}
\ No newline at end of file
+}
+
+# Gemeinsamer Cache aller Worker-Prozesse (Angebotslisten, Katalog-Generation, Zähler,
+# Plattform-Kennzahlen). Standard ist der Datenbank-Cache (`manage.py createcachetable`);
+# für mehrere Server z. B. CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# und CACHE_LOCATION=redis://127.0.0.1:6379 setzen (atomares `incr`).
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': config('CACHE_LOCATION', default='coderr_cache'),
+    }
+}
+
+# Gültigkeit (Sekunden) der zwischengespeicherten Gesamtanzahl bei Cursor-Paginierung.
+OFFER_COUNT_CACHE_TIMEOUT = 60
+
+# Gültigkeit (Sekunden) der zwischengespeicherten Angebotslisten; Änderungen invalidieren sofort.
+OFFER_LIST_CACHE_TIMEOUT = 300
+
+# Abstand (Sekunden), in dem jeder Prozess seine Treffer-/Fehlschlagzähler des Listen-Caches
+# in den gemeinsamen Cache überträgt (`manage.py offer_list_cache_stats`).
+OFFER_LIST_STATS_FLUSH_INTERVAL = 10
+
+# Höchstanzahl an Angeboten pro Anfrage an /api/offers/bulk/.
+OFFER_BULK_CREATE_MAX_ITEMS = 100
+
+# Worker-Prozesse für Bildvarianten (0 = direkt nach dem Commit im Request-Prozess).
+IMAGE_VARIANT_WORKERS = 2
+
+# Aufbewahrungsdauer (Sekunden) gespeicherter Antworten zu Idempotency-Keys.
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+
+# Max-Age (Sekunden) für öffentliche Bewertungslisten (`?business_user_id=` / `?reviewer_id=`).
+REVIEW_FEED_MAX_AGE = 60
+
+# Gültigkeit (Sekunden) der Plattform-Kennzahlen von /api/base-info/.
+BASE_INFO_STATS_TTL = 60
+
+# Prozess-Cache der Token-Authentifizierung: Gültigkeit (Sekunden) und Höchstanzahl an Einträgen.
+# Signale leeren nur den Cache des ändernden Prozesses; andere Worker akzeptieren gelöschte
+# Token und deaktivierte Benutzer bis zu TOKEN_AUTH_CACHE_TTL Sekunden lang. Daher kurz halten.
+TOKEN_AUTH_CACHE_TTL = 30
+TOKEN_AUTH_CACHE_SIZE = 1024
+
+# Passwort-Hashing bei Login und Registrierung: Threads im Pool und maximale Wartezeit
+# (Sekunden) auf einen freien Platz, danach antworten die Endpunkte mit 503.
+AUTH_HASHING_WORKERS = 4
+AUTH_HASHING_WAIT_TIMEOUT = 5
+
+# SQL-Messung je Anfrage: Anteil gemessener Anfragen (0.0–1.0), Wiederholungen einer
+# Abfrageform ab denen ein N+1 gemeldet wird, und Anzahl protokollierter langsamster Abfragen.
+# Standardmäßig wird nur jede hundertste Anfrage gemessen; zur Fehlersuche lokal auf 1.0 setzen.
+SQL_INSTRUMENTATION_SAMPLE_RATE = 0.01
+SQL_N_PLUS_ONE_THRESHOLD = 10
+SQL_SLOW_QUERY_COUNT = 3
@@ -0,0 +1,64 @@
+import hashlib
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+
+def make_etag(*parts):
+    """Bildet einen starken ETag aus den übergebenen Versionsbestandteilen."""
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def set_validators(response, etag, last_modified):
+    """Setzt `ETag` und `Last-Modified` auf einer Response."""
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    return response
+
+
+def not_modified_response(request, etag, last_modified):
+    """
+    Prüft `If-None-Match` und `If-Modified-Since` gegen die Validatoren.
+
+    Gibt eine 304-Response zurück, wenn der Client den aktuellen Stand hat, sonst `None`.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return None
+    timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+class ConditionalRetrieveMixin:
+    """
+    Mixin für bedingte GET-Anfragen auf Einzelobjekte.
+
+    - Berechnet ETag und Last-Modified aus Zeitstempeln, bevor serialisiert wird.
+    - Antwortet mit 304, wenn der Client bereits den aktuellen Stand besitzt.
+    - Mit `send_last_modified = False` wird nur der ETag verwendet, wenn er
+      Bestandteile ohne Zeitstempel enthält (z. B. Benutzernamen).
+    """
+    send_last_modified = True
+
+    def get_last_modified(self, instance):
+        """Gibt den Zeitpunkt der letzten Änderung des Objekts zurück."""
+        return instance.updated_at
+
+    def get_etag(self, instance):
+        """Gibt den ETag des Objekts zurück."""
+        return make_etag(type(instance).__name__, instance.pk, self.get_last_modified(instance).isoformat())
+
+    def retrieve(self, request, *args, **kwargs):
+        """Liefert das Objekt oder 304, wenn es sich seit dem letzten Abruf nicht geändert hat."""
+        instance = self.get_object()
+        etag = self.get_etag(instance)
+        last_modified = self.get_last_modified(instance) if self.send_last_modified else None
+        response = not_modified_response(request, etag, last_modified)
+        if response is not None:
+            return response
+        serializer = self.get_serializer(instance)
+        return set_validators(Response(serializer.data), etag, last_modified)
@@ -0,0 +1,88 @@
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+
+EXPORT_CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+class Echo:
+    """Pseudo-Puffer für `csv.writer`: gibt jede geschriebene Zeile direkt zurück."""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(rows):
+    """Serialisiert jede Zeile als eigenes JSON-Objekt mit Zeilenumbruch."""
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+def csv_lines(rows, fields):
+    """Schreibt Kopfzeile und Zeilen als CSV; Listen und Objekte werden als JSON abgelegt."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([csv_value(row[field]) for field in fields])
+
+
+def csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def take_chunk(lines):
+    """Liest die nächsten `EXPORT_CHUNK_SIZE` Zeilen (leer am Ende)."""
+    return list(islice(lines, EXPORT_CHUNK_SIZE))
+
+
+async def async_lines(lines):
+    """
+    Gibt die Zeilen unter ASGI asynchron aus, blockweise über `sync_to_async` gelesen.
+
+    Ein synchroner Iterator würde von Django unter ASGI erst vollständig in eine
+    Liste gelesen. Die Blöcke laufen thread-sensitiv im selben Thread der Anfrage
+    und damit über dieselbe Datenbankverbindung wie der Server-Cursor.
+    """
+    read_chunk = sync_to_async(take_chunk)
+    while chunk := await read_chunk(lines):
+        for line in chunk:
+            yield line
+
+
+def export_response(request, queryset, fields, filename):
+    """
+    Streamt eine `values()`-Projektion des Querysets als NDJSON oder CSV.
+
+    Die Zeilen werden mit `iterator()` blockweise aus der Datenbank gelesen und
+    einzeln geschrieben, der Speicherbedarf bleibt unabhängig von der Anzahl.
+    Unter ASGI wird ein asynchroner Iterator übergeben (siehe `async_lines`),
+    unter WSGI der synchrone Generator. Das Format wird über `file_format` gewählt (`ndjson` oder `csv`).
+    """
+    file_format = request.query_params.get("file_format", "ndjson")
+    if file_format not in CONTENT_TYPES:
+        raise ValidationError({"file_format": f"Erlaubt sind: {', '.join(CONTENT_TYPES)}."})
+
+    rows = queryset.values(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    lines = ndjson_lines(rows) if file_format == "ndjson" else csv_lines(rows, fields)
+    if isinstance(request._request, ASGIRequest):
+        lines = async_lines(lines)
+    response = StreamingHttpResponse(lines, content_type=CONTENT_TYPES[file_format])
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{file_format}"'
+    return response
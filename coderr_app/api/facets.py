@@ -0,0 +1,58 @@
+from django.db.models import Count, Q
+from ..models import OfferDetail
+
+PRICE_BUCKETS = [(0, 50), (50, 100), (100, 250), (250, 500), (500, None)]
+DELIVERY_TIME_BUCKETS = [(1, 1), (2, 3), (4, 7), (8, 14), (15, None)]
+MAX_CREATORS = 20
+
+
+def price_filter(lower, upper):
+    """Preisbereich [lower, upper) auf dem gespeicherten Mindestpreis."""
+    condition = Q(min_price__gte=lower)
+    return condition & Q(min_price__lt=upper) if upper is not None else condition
+
+
+def delivery_time_filter(lower, upper):
+    """Lieferzeitbereich [lower, upper] (in Tagen) auf der gespeicherten minimalen Lieferzeit."""
+    condition = Q(min_delivery_time__gte=lower)
+    return condition & Q(min_delivery_time__lte=upper) if upper is not None else condition
+
+
+def compute_offer_facets(queryset):
+    """
+    Berechnet Facetten für die gefilterten Angebote mit einer gruppierten Abfrage.
+
+    Gruppiert wird nach Ersteller; jede Gruppe zählt ihre Angebote je Preis-,
+    Lieferzeit- und Angebotstyp-Bereich. Die Summen über alle Gruppen ergeben
+    die übrigen Facetten.
+    """
+    aggregates = {"total": Count("id", distinct=True)}
+    for index, (lower, upper) in enumerate(PRICE_BUCKETS):
+        aggregates[f"price_{index}"] = Count("id", filter=price_filter(lower, upper), distinct=True)
+    for index, (lower, upper) in enumerate(DELIVERY_TIME_BUCKETS):
+        aggregates[f"delivery_{index}"] = Count("id", filter=delivery_time_filter(lower, upper), distinct=True)
+    for offer_type, _ in OfferDetail.OFFER_TYPES:
+        aggregates[f"type_{offer_type}"] = Count("id", filter=Q(details__offer_type=offer_type), distinct=True)
+
+    rows = list(queryset.order_by().values("user_id", "user__username").annotate(**aggregates))
+
+    def total(key):
+        return sum(row[key] for row in rows)
+
+    creators = sorted(rows, key=lambda row: (-row["total"], row["user_id"]))[:MAX_CREATORS]
+    return {
+        "count": total("total"),
+        "price": [
+            {"min": lower, "max": upper, "count": total(f"price_{index}")}
+            for index, (lower, upper) in enumerate(PRICE_BUCKETS)
+        ],
+        "delivery_time": [
+            {"min": lower, "max": upper, "count": total(f"delivery_{index}")}
+            for index, (lower, upper) in enumerate(DELIVERY_TIME_BUCKETS)
+        ],
+        "offer_type": {offer_type: total(f"type_{offer_type}") for offer_type, _ in OfferDetail.OFFER_TYPES},
+        "creator": [
+            {"creator_id": row["user_id"], "username": row["user__username"], "count": row["total"]}
+            for row in creators
+        ],
+    }
@@ -1,36 +1,84 @@
 import django_filters
-from ..models import Offer
+from ..models import Offer, OfferDetail, Order, Review
+from ..search import build_match_query, offer_search_available
 from django.db.models import Q
 
 class OfferFilter(django_filters.FilterSet):
     """
     Filterklasse für Angebote.
     
-    - Ermöglicht das Filtern nach Ersteller-ID, Mindestpreis und maximaler Lieferzeit.
+    - Ermöglicht das Filtern nach Ersteller-ID, Mindestpreis, maximaler Lieferzeit
+      und Mindestbewertung des Anbieters.
     - Bietet eine Suchfunktion für Titel und Beschreibung.
-    - Unterstützt Sortierung nach Aktualisierungsdatum und Preis.
+    - Unterstützt Sortierung nach Aktualisierungsdatum, Preis und Bewertung.
     """
     creator_id = django_filters.NumberFilter(
         field_name='user__id', label='Creator ID')
     min_price = django_filters.NumberFilter(
-        field_name='details__price', lookup_expr='gte', label='Min Price')
+        field_name='min_price', lookup_expr='gte', label='Min Price')
     max_delivery_time = django_filters.NumberFilter(
-        field_name='details__delivery_time_in_days', lookup_expr='lte', label='Max Delivery Time')
+        field_name='min_delivery_time', lookup_expr='lte', label='Max Delivery Time')
+    min_rating = django_filters.NumberFilter(
+        field_name='user__rating_stats__rating_average', lookup_expr='gte', label='Min Rating')
     search = django_filters.CharFilter(method='filter_search', label='Search')
     ordering = django_filters.OrderingFilter(
         fields=(
             ('updated_at', 'updated_at'),
-            ('details__price', 'min_price'),
+            ('min_price', 'min_price'),
+            ('user__rating_stats__rating_average', 'rating'),
         ),
         label='Ordering',
     )
 
     class Meta:
         model = Offer
-        fields = ['creator_id', 'min_price', 'max_delivery_time']
+        fields = ['creator_id', 'min_price', 'max_delivery_time', 'min_rating']
 
     def filter_search(self, queryset, name, value):
-        """Filtert Angebote basierend auf einer Suchanfrage in Titel oder Beschreibung."""
+        """
+        Filtert Angebote basierend auf einer Suchanfrage in Titel oder Beschreibung.
+
+        Auf SQLite wird der FTS5-Index genutzt und nach Relevanz sortiert
+        (eine explizite `ordering` hat Vorrang). Ohne FTS5 oder bei Eingaben
+        ohne Wortzeichen (z. B. `!!!`) wird mit `icontains` gesucht.
+        """
+        if offer_search_available():
+            match = build_match_query(value)
+            if match:
+                return queryset.filter(search_index__match=match).order_by('search_index__rank', '-updated_at')
         return queryset.filter(
             Q(title__icontains=value) | Q(description__icontains=value)
         )
+
+
+class OrderFilter(django_filters.FilterSet):
+    """
+    Filterklasse für Bestellungen.
+
+    - Ermöglicht das Filtern nach Status und Angebotstyp.
+    - Unterstützt einen Zeitraum über das Erstellungsdatum (`created_after`, `created_before`).
+    """
+    status = django_filters.ChoiceFilter(choices=Order.STATUS_CHOICES, label='Status')
+    offer_type = django_filters.ChoiceFilter(choices=OfferDetail.OFFER_TYPES, label='Offer Type')
+    created_after = django_filters.DateTimeFilter(
+        field_name='created_at', lookup_expr='gte', label='Created After')
+    created_before = django_filters.DateTimeFilter(
+        field_name='created_at', lookup_expr='lt', label='Created Before')
+
+    class Meta:
+        model = Order
+        fields = ['status', 'offer_type', 'created_after', 'created_before']
+
+
+class ReviewFilter(django_filters.FilterSet):
+    """
+    Filterklasse für Bewertungen.
+
+    - Ermöglicht das Filtern nach bewertetem Anbieter und nach Verfasser.
+    """
+    business_user_id = django_filters.NumberFilter(field_name='business_user_id', label='Business User ID')
+    reviewer_id = django_filters.NumberFilter(field_name='reviewer_id', label='Reviewer ID')
+
+    class Meta:
+        model = Review
+        fields = ['business_user_id', 'reviewer_id']
@@ -0,0 +1,84 @@
+import hashlib
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from ..models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+def request_fingerprint(request):
+    """Hash aus Methode, Pfad und Anfragedaten; derselbe Schlüssel darf nur dieselbe Anfrage wiederholen."""
+    payload = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(f"{request.method} {request.path}\n{payload}".encode()).hexdigest()
+
+
+def find_record(user, key):
+    """Liefert den gültigen Eintrag zu einem Schlüssel; ein abgelaufener wird dabei entfernt."""
+    try:
+        record = IdempotencyKey.objects.get(user=user, key=key)
+    except IdempotencyKey.DoesNotExist:
+        return None
+    if record.expires_at <= timezone.now():
+        record.delete()
+        return None
+    return record
+
+
+def replay_response(record, fingerprint):
+    """Spielt die gespeicherte Antwort erneut aus oder lehnt einen wiederverwendeten Schlüssel ab."""
+    if record.fingerprint != fingerprint:
+        return Response(
+            {"error": "Idempotency-Key was already used for a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    response = Response(record.response_body, status=record.status_code)
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+class IdempotentCreateMixin:
+    """
+    Macht `create` über den Header `Idempotency-Key` wiederholbar.
+
+    Erfolgreiche Antworten werden zusammen mit dem Schreibvorgang in einer
+    Transaktion gespeichert. Eine Wiederholung liefert die gespeicherte Antwort,
+    ohne den Serializer erneut auszuführen. Verliert eine parallele Anfrage mit
+    demselben Schlüssel das Einfügen, wird ihr Schreibvorgang zurückgerollt.
+    """
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return super().create(request, *args, **kwargs)
+        if len(key) > IdempotencyKey._meta.get_field("key").max_length:
+            return Response({"error": "Idempotency-Key is too long."}, status=status.HTTP_400_BAD_REQUEST)
+
+        fingerprint = request_fingerprint(request)
+        record = find_record(request.user, key)
+        if record is not None:
+            return replay_response(record, fingerprint)
+
+        try:
+            with transaction.atomic():
+                response = super().create(request, *args, **kwargs)
+                if status.is_success(response.status_code):
+                    IdempotencyKey.objects.create(
+                        user=request.user,
+                        key=key,
+                        fingerprint=fingerprint,
+                        status_code=response.status_code,
+                        response_body=response.data,
+                        expires_at=timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+                    )
+        except IntegrityError:
+            record = find_record(request.user, key)
+            if record is None:
+                raise
+            return replay_response(record, fingerprint)
+        return response
@@ -1,7 +1,260 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+import json
+from base64 import b64decode, b64encode
+from datetime import datetime
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Coalesce
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from ..offer_cache import get_generation
+from ..search import build_match_query, offer_search_available
 
 
 class CustomPagination(PageNumberPagination):
     page_size = 6 
     page_size_query_param = 'page_size'
     max_page_size = 50
+
+
+class ProfileCursorPagination(CursorPagination):
+    """
+    Cursor-Paginierung für Profillisten, neueste zuerst.
+
+    Blättert über den Primärschlüssel; die Antwortzeit hängt damit weder von
+    der Seitentiefe noch von der Gesamtzahl der Profile ab.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+    ordering = '-id'
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset-Paginierung über `(Sortierfeld, id)`.
+
+    - Jede Seite ist eine Bereichsabfrage `(feld, id) < (wert, pk)` bzw. `>` über den
+      passenden Index; auch bei vielen gleichen Werten gibt es weder OFFSET noch COUNT(*).
+    - Die Sortierung wird über `ordering` aus `ordering_fields` gewählt (sonst
+      `default_ordering`), `id` folgt als Tiebreaker in derselben Richtung.
+    - Arbeitet auf mehreren Teilabfragen (z. B. Bestellungen als Kunde und als Anbieter):
+      jede wird über ihren eigenen Index auf eine Seite begrenzt, danach werden
+      die Ergebnisse zusammengeführt.
+    - Der Cursor enthält Wert, `id`, Richtung und Sortierung der Position.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+    cursor_query_param = 'cursor'
+    ordering_param = 'ordering'
+    default_ordering = '-created_at'
+    ordering_fields = ()
+    invalid_cursor_message = 'Invalid cursor'
+    value_alias = 'keyset_value'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Paginiert eine einzelne Abfrage."""
+        return self.paginate_branches([queryset], request)
+
+    def paginate_branches(self, branches, request):
+        """Liefert die aktuelle Seite aus den zusammengeführten Teilabfragen."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request)
+        position, reverse = self.decode_cursor(request)
+        field = self.ordering.lstrip('-')
+        descending = self.ordering.startswith('-') != reverse
+
+        rows = {}
+        for queryset in branches:
+            queryset = queryset.annotate(**{self.value_alias: self.get_value_expression(field)})
+            if position is not None:
+                queryset = self.filter_after(queryset, position, descending)
+            ordering = (f'-{self.value_alias}', '-id') if descending else (self.value_alias, 'id')
+            for row in queryset.order_by(*ordering)[:self.page_size + 1]:
+                rows[row.pk] = row
+
+        results = sorted(rows.values(), key=self.position, reverse=descending)
+        has_more = len(results) > self.page_size
+        page = results[:self.page_size]
+        if reverse:
+            page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = page
+        return page
+
+    def get_value_expression(self, field):
+        """Ausdruck für den Sortierwert; standardmäßig das Feld selbst."""
+        return F(field)
+
+    def filter_after(self, queryset, position, descending):
+        """
+        Beschränkt die Abfrage auf Zeilen hinter `(wert, id)` in Sortierrichtung.
+
+        Die zusätzliche Bedingung `feld <= wert` (bzw. `>=`) lässt die Datenbank
+        direkt an der Position in den Index springen.
+        """
+        value, pk = position
+        lookup = 'lt' if descending else 'gt'
+        try:
+            return queryset.filter(**{f'{self.value_alias}__{lookup}e': value}).filter(
+                Q(**{f'{self.value_alias}__{lookup}': value}) | Q(**{f'id__{lookup}': pk}))
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_ordering(self, request):
+        """Übernimmt die erste erlaubte Sortierung aus `ordering`, sonst `default_ordering`."""
+        return self.get_requested_ordering(request) or self.default_ordering
+
+    def get_requested_ordering(self, request):
+        """Erste Sortierung aus `ordering`, sofern sie in `ordering_fields` erlaubt ist."""
+        ordering = request.query_params.get(self.ordering_param, '').split(',')[0].strip()
+        if ordering.lstrip('-') in self.ordering_fields:
+            return ordering
+        return None
+
+    def position(self, row):
+        """Sortierschlüssel `(wert, id)` einer Zeile."""
+        return getattr(row, self.value_alias), row.pk
+
+    def get_page_size(self, request):
+        """Liest die Seitengröße aus `page_size` (positiv, höchstens `max_page_size`)."""
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        """Liest `(wert, id)` und die Richtung aus dem Cursor-Parameter (der Wert wird vom Feld umgewandelt)."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(b64decode(encoded.encode()).decode())
+            if data['o'] != self.ordering:
+                raise ValueError
+            return (data['v'], int(data['i'])), bool(data.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row, reverse):
+        """Baut die URL mit dem Cursor für die Position von `row`."""
+        value, pk = self.position(row)
+        if isinstance(value, (datetime, Decimal)):
+            value = value.isoformat() if isinstance(value, datetime) else str(value)
+        data = {'o': self.ordering, 'v': value, 'i': pk, 'r': int(reverse)}
+        cursor = b64encode(json.dumps(data, separators=(',', ':')).encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class OrderCursorPagination(KeysetPagination):
+    """Keyset-Paginierung für Bestellungen über `(created_at, id)`, neueste zuerst."""
+    page_size = 10
+    default_ordering = '-created_at'
+
+
+class ReviewCursorPagination(KeysetPagination):
+    """
+    Keyset-Paginierung für Bewertungen über `(updated_at, id)` oder `(rating, id)`, neueste zuerst.
+
+    Weil `rating` nur fünf Werte kennt, setzt auch diese Sortierung über `id`
+    fort statt über einen Offset innerhalb gleicher Werte.
+    """
+    page_size = 10
+    default_ordering = '-updated_at'
+    ordering_fields = ('updated_at', 'rating')
+
+
+class OfferCursorPagination(KeysetPagination):
+    """
+    Keyset-Paginierung für Angebote.
+
+    - Blättert über `(updated_at, id)` oder `(min_price, id)` ohne OFFSET und
+      ohne `COUNT(*)` pro Seite.
+    - `ordering=rating` blättert über `(Bewertungsdurchschnitt, id)`; Anbieter
+      ohne Bewertungen zählen als 0, damit der Cursor nie auf `NULL` steht.
+    - Bei einer Volltextsuche ohne explizite Sortierung wird nach Relevanz
+      (`(rank, id)`) geblättert, wie in der Seitenansicht.
+    - Eine Gesamtanzahl wird nur auf Wunsch (`with_total=true`) geliefert und
+      für `OFFER_COUNT_CACHE_TIMEOUT` Sekunden zwischengespeichert.
+    - Angebote ohne Details haben keinen Preis und erscheinen nicht in der Preis-Sortierung.
+    """
+    page_size = 6
+    default_ordering = '-updated_at'
+    ordering_fields = ('updated_at', 'min_price', 'rating')
+    relevance_ordering = 'search_index__rank'
+    search_param = 'search'
+    total_query_param = 'with_total'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Liefert eine Seite ab der Cursor-Position und ermittelt optional die Gesamtanzahl."""
+        if self.get_ordering(request).lstrip('-') == 'min_price':
+            queryset = queryset.filter(min_price__isnull=False)
+        self.total = None
+        if request.query_params.get(self.total_query_param) in ('1', 'true'):
+            self.total = self.get_cached_total(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request):
+        """Sortiert eine Volltextsuche ohne erlaubte `ordering` nach Relevanz."""
+        ordering = self.get_requested_ordering(request)
+        if ordering is not None:
+            return ordering
+        if offer_search_available() and build_match_query(request.query_params.get(self.search_param, '')):
+            return self.relevance_ordering
+        return self.default_ordering
+
+    def get_value_expression(self, field):
+        """`rating` ist der Bewertungsdurchschnitt des Anbieters, fehlende Werte als 0."""
+        if field == 'rating':
+            return Coalesce(F('user__rating_stats__rating_average'), Value(0.0), output_field=FloatField())
+        return super().get_value_expression(field)
+
+    def get_cached_total(self, queryset):
+        """Zählt die gefilterten Angebote und hält das Ergebnis kurz im Cache."""
+        query_hash = hashlib.sha1(str(queryset.order_by().query).encode()).hexdigest()
+        key = f"offers:count:{get_generation()}:{query_hash}"
+        total = cache.get(key)
+        if total is None:
+            total = queryset.order_by().count()
+            cache.set(key, total, settings.OFFER_COUNT_CACHE_TIMEOUT)
+        return total
+
+    def get_paginated_response(self, data):
+        """Gibt Cursor-Links, optional die Gesamtanzahl und die Ergebnisse zurück."""
+        payload = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
+        if self.total is not None:
+            payload['count'] = self.total
+        payload['results'] = data
+        return Response(payload)
@@ -1,9 +1,135 @@
 from rest_framework import serializers
-from django.db.models import Min
+from django.db import transaction
 from ...models import Offer, OfferDetail
+from ...offer_cache import invalidate_offer_list
+from ...images import variant_urls
+from ...review_stats import rating_summary
 from user_auth_app.models import UserProfile
 
 
+def validate_offer_details(details_data):
+    """
+    Prüft die Angebotsdetails eines neuen Angebots.
+
+    - Genau drei Details mit den Typen basic, standard und premium.
+    - Jedes Detail braucht Features, eine positive Lieferzeit und mindestens -1 Revisionen.
+    """
+    if not isinstance(details_data, list) or len(details_data) != 3:
+        raise serializers.ValidationError("Es müssen genau 3 Angebotsdetails angegeben werden.")
+
+    offer_types = {detail.get("offer_type") for detail in details_data}
+    if offer_types != {"basic", "standard", "premium"}:
+        raise serializers.ValidationError("Die Angebotsdetails müssen die Typen basic, standard und premium enthalten.")
+
+    for detail in details_data:
+        if not detail.get("features"):
+            raise serializers.ValidationError("Jedes Angebotsdetail muss mindestens ein Feature enthalten.")
+        if int(detail.get("delivery_time_in_days") or 0) <= 0:
+            raise serializers.ValidationError("Die Lieferzeit muss eine positive Zahl sein.")
+        if int(detail.get("revisions") if detail.get("revisions") is not None else -2) < -1:
+            raise serializers.ValidationError("Die Anzahl der Revisionen darf nicht kleiner als -1 sein (für unlimitierte Revisionen).")
+
+
+def min_or_none(values):
+    """Gibt das Minimum der gesetzten Werte zurück oder `None`, wenn keiner gesetzt ist."""
+    values = [value for value in values if value is not None]
+    return min(values) if values else None
+
+
+def set_min_values(offer, details_data):
+    """Setzt Mindestpreis und minimale Lieferzeit eines neuen Angebots aus den Detaildaten."""
+    offer.min_price = min_or_none(detail.get("price") for detail in details_data)
+    offer.min_delivery_time = min_or_none(detail.get("delivery_time_in_days") for detail in details_data)
+
+
+def create_offer(validated_data):
+    """
+    Legt ein Angebot samt Details in einer Transaktion an.
+
+    Die Mindestwerte werden einmal aus den Daten berechnet und mit dem Angebot
+    eingefügt. Die Details folgen per `bulk_create` und umgehen damit den Hook
+    in `OfferDetail.save`, der für einzelne Änderungen über `/api/offerdetails/` bleibt.
+    """
+    details_data = validated_data.pop("details", [])
+    offer = Offer(**validated_data)
+    set_min_values(offer, details_data)
+    with transaction.atomic():
+        offer.save()
+        OfferDetail.objects.bulk_create([OfferDetail(offer=offer, **detail_data) for detail_data in details_data])
+        invalidate_offer_list()
+    return offer
+
+
+def apply_offer_details(offer, details_data):
+    """
+    Gleicht die Details eines Angebots mit den übergebenen Daten ab.
+
+    - Details werden über ihren `offer_type` (eindeutig je Angebot) zugeordnet.
+    - Geänderte Details: ein `bulk_update` nur mit den geänderten Feldern.
+    - Neue Details: ein `bulk_create`; nicht mehr genannte Details: ein Delete.
+
+    Gibt die danach gültigen Details zurück und ob sich überhaupt etwas geändert hat.
+    """
+    existing = list(offer.details.all())
+    by_type = {}
+    for detail in existing:
+        by_type.setdefault(detail.offer_type, detail)
+
+    details, to_update, to_create, changed_fields = [], [], [], set()
+    for detail_data in details_data:
+        detail = by_type.pop(detail_data.get("offer_type", OfferDetail.BASIC), None)
+        if detail is None:
+            detail = OfferDetail(offer=offer, **detail_data)
+            to_create.append(detail)
+        else:
+            changed = {attr for attr, value in detail_data.items() if getattr(detail, attr) != value}
+            for attr in changed:
+                setattr(detail, attr, detail_data[attr])
+            if changed:
+                to_update.append(detail)
+                changed_fields |= changed
+        details.append(detail)
+
+    kept_ids = {detail.id for detail in details if detail.id}
+    to_delete = [detail.id for detail in existing if detail.id not in kept_ids]
+
+    if to_update:
+        OfferDetail.objects.bulk_update(to_update, sorted(changed_fields))
+    if to_create:
+        OfferDetail.objects.bulk_create(to_create)
+    if to_delete:
+        OfferDetail.objects.filter(id__in=to_delete).delete()
+    return details, bool(to_update or to_create or to_delete)
+
+
+def update_offer(instance, validated_data):
+    """
+    Aktualisiert ein Angebot samt Details in einer Transaktion.
+
+    Gespeichert werden nur die übergebenen Felder und `updated_at`. Die
+    Mindestwerte werden nur geschrieben, wenn sich Details geändert haben;
+    sonst würde ein gleichzeitiges Speichern über `/api/offerdetails/`
+    mit den beim Laden gelesenen Werten überschrieben.
+    """
+    details_data = validated_data.pop("details", None)
+
+    update_fields = ["updated_at"]
+    for field in ("title", "image", "description"):
+        if field in validated_data:
+            setattr(instance, field, validated_data[field])
+            update_fields.append(field)
+
+    with transaction.atomic():
+        if details_data is not None:
+            details, details_changed = apply_offer_details(instance, details_data)
+            if details_changed:
+                instance.min_price = min_or_none(detail.price for detail in details)
+                instance.min_delivery_time = min_or_none(detail.delivery_time_in_days for detail in details)
+                update_fields += ["min_price", "min_delivery_time"]
+        instance.save(update_fields=update_fields)
+    return instance
+
+
 class OfferDetailSerializer(serializers.ModelSerializer):
     """
     Serialisiert das OfferDetail-Modell für die API.
@@ -25,18 +151,19 @@ class OfferListSerializer(serializers.ModelSerializer):
     
     - Enthält Basisinformationen eines Angebots.
     - Berechnet den minimalen Preis und die minimale Lieferzeit.
-    - Gibt Benutzerinformationen zurück.
+    - Gibt Benutzerinformationen samt Bewertungsanzahl und -durchschnitt zurück.
     """
     details = serializers.SerializerMethodField()
     min_price = serializers.SerializerMethodField()
     min_delivery_time = serializers.SerializerMethodField()
     user_details = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
     user = serializers.PrimaryKeyRelatedField(read_only=True) 
 
     class Meta:
         model = Offer
         fields = [
-            "id", "user", "title", "image", "description", "created_at", "updated_at",
+            "id", "user", "title", "image", "image_variants", "description", "created_at", "updated_at",
             "details", "min_price", "min_delivery_time", "user_details"
         ]
 
@@ -45,15 +172,16 @@ class OfferListSerializer(serializers.ModelSerializer):
         return [{"id": detail.id, "url": f"/offerdetails/{detail.id}/"} for detail in obj.details.all()]
 
     def get_min_price(self, obj):
-        """Ermittelt den minimalen Preis aus den Angebotsdetails."""
-        min_price = obj.details.aggregate(min_price=Min("price"))["min_price"]
-        return min_price if min_price is not None else 0.0
+        """Gibt den gespeicherten minimalen Preis der Angebotsdetails zurück."""
+        return obj.min_price if obj.min_price is not None else 0.0
 
     def get_min_delivery_time(self, obj):
-        """Ermittelt die minimale Lieferzeit aus den Angebotsdetails."""
-        min_time = obj.details.aggregate(
-            min_time=Min("delivery_time_in_days"))["min_time"]
-        return min_time if min_time is not None else 0
+        """Gibt die gespeicherte minimale Lieferzeit der Angebotsdetails zurück."""
+        return obj.min_delivery_time if obj.min_delivery_time is not None else 0
+
+    def get_image_variants(self, obj):
+        """Gibt die URLs der verkleinerten Bildvarianten zurück (leer, solange sie fehlen)."""
+        return variant_urls(obj.image)
 
     def get_user_details(self, obj):
         """Gibt die Benutzerinformationen zurück, falls ein UserProfile existiert."""
@@ -66,54 +194,18 @@ class OfferListSerializer(serializers.ModelSerializer):
             "first_name": user_profile.first_name if user_profile and user_profile.first_name else obj.user.first_name,
             "last_name": user_profile.last_name if user_profile and user_profile.last_name else obj.user.last_name,
             "username": obj.user.username,
+            **rating_summary(obj.user),
         }
 
     def create(self, validated_data):
         """Erstellt ein neues Angebot und speichert die dazugehörigen Angebotsdetails."""
-        details_data = validated_data.pop('details')
-        offer = Offer.objects.create(**validated_data)
-
-        for detail_data in details_data:
-            OfferDetail.objects.create(offer=offer, **detail_data)
-
-        return offer
+        return create_offer(validated_data)
 
     def update(self, instance, validated_data):
         """
         Aktualisiert ein `Offer`-Objekt und behandelt `details`.
         """
-        details_data = validated_data.pop("details", None)
-
-        instance.title = validated_data.get("title", instance.title)
-        instance.image = validated_data.get("image", instance.image)
-        instance.description = validated_data.get(
-            "description", instance.description)
-        instance.save()
-
-        if details_data is not None:
-            existing_details = {
-                detail.id: detail for detail in instance.details.all()}
-            request_detail_ids = set()
-
-            for detail_data in details_data:
-                detail_id = detail_data.get("id")
-
-                if detail_id and detail_id in existing_details:
-                    detail = existing_details[detail_id]
-                    for attr, value in detail_data.items():
-                        setattr(detail, attr, value)
-                    detail.save()
-                    request_detail_ids.add(detail_id)
-                else:
-                    new_detail = OfferDetail.objects.create(
-                        offer=instance, **detail_data)
-                    request_detail_ids.add(new_detail.id)
-
-            details_to_delete = set(
-                existing_details.keys()) - request_detail_ids
-            OfferDetail.objects.filter(id__in=details_to_delete).delete()
-
-        return instance
+        return update_offer(instance, validated_data)
 
 
 class OfferDetailViewSerializer(serializers.ModelSerializer):
@@ -128,24 +220,26 @@ class OfferDetailViewSerializer(serializers.ModelSerializer):
     min_price = serializers.SerializerMethodField()
     min_delivery_time = serializers.SerializerMethodField()
     user_details = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Offer
         fields = [
-            "id", "user", "title", "image", "description", "created_at", "updated_at",
+            "id", "user", "title", "image", "image_variants", "description", "created_at", "updated_at",
             "details", "min_price", "min_delivery_time", "user_details"
         ]
 
     def get_min_price(self, obj):
-        """Ermittelt den minimalen Preis aller Angebotsdetails."""
-        min_price = obj.details.aggregate(min_price=Min("price"))["min_price"]
-        return min_price if min_price is not None else 0.0
+        """Gibt den gespeicherten minimalen Preis aller Angebotsdetails zurück."""
+        return obj.min_price if obj.min_price is not None else 0.0
 
     def get_min_delivery_time(self, obj):
-        """Ermittelt die minimale Lieferzeit aller Angebotsdetails."""
-        min_time = obj.details.aggregate(
-            min_time=Min("delivery_time_in_days"))["min_time"]
-        return min_time if min_time is not None else 0
+        """Gibt die gespeicherte minimale Lieferzeit aller Angebotsdetails zurück."""
+        return obj.min_delivery_time if obj.min_delivery_time is not None else 0
+
+    def get_image_variants(self, obj):
+        """Gibt die URLs der verkleinerten Bildvarianten zurück (leer, solange sie fehlen)."""
+        return variant_urls(obj.image)
 
     def get_user_details(self, obj):
         """Gibt die Benutzerinformationen des Angebotsbesitzers zurück."""
@@ -162,44 +256,11 @@ class OfferDetailViewSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         """Erstellt ein neues Angebot mit den zugehörigen Angebotsdetails."""
-        details_data = validated_data.pop('details', [])
-        offer = Offer.objects.create(**validated_data)
-
-        for detail_data in details_data:
-            OfferDetail.objects.create(offer=offer, **detail_data)
-
-        return offer
+        return create_offer(validated_data)
     
     def update(self, instance, validated_data):
         """Ermöglicht das Aktualisieren von Offer und OfferDetails."""
-        details_data = validated_data.pop("details", None) 
-
-        instance.title = validated_data.get("title", instance.title)
-        instance.image = validated_data.get("image", instance.image)
-        instance.description = validated_data.get("description", instance.description)
-        instance.save()
-
-        if details_data is not None:
-            existing_details = {detail.id: detail for detail in instance.details.all()}
-            request_detail_ids = set()
-
-            for detail_data in details_data:
-                detail_id = detail_data.get("id")
-
-                if detail_id and detail_id in existing_details:
-                    detail = existing_details[detail_id]
-                    for attr, value in detail_data.items():
-                        setattr(detail, attr, value)
-                    detail.save()
-                    request_detail_ids.add(detail_id)
-                else:
-                    new_detail = OfferDetail.objects.create(offer=instance, **detail_data)
-                    request_detail_ids.add(new_detail.id)
-
-            details_to_delete = set(existing_details.keys()) - request_detail_ids
-            OfferDetail.objects.filter(id__in=details_to_delete).delete()
-
-        return instance
+        return update_offer(instance, validated_data)
 
 
 class OfferCreateSerializer(serializers.ModelSerializer):
@@ -216,10 +277,57 @@ class OfferCreateSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         """Erstellt ein neues Angebot mit den dazugehörigen Angebotsdetails."""
-        details_data = validated_data.pop("details")
-        offer = Offer.objects.create(**validated_data)
+        return create_offer(validated_data)
+
+
+class OfferBulkCreateSerializer(serializers.Serializer):
+    """
+    Serializer für das gebündelte Anlegen mehrerer Angebote.
 
-        for detail_data in details_data:
-            OfferDetail.objects.create(offer=offer, **detail_data)
+    - Validiert alle Angebote vorab mit denselben Regeln wie die Einzelanlage.
+    - Sammelt Fehler je Angebot (wie bei `many=True` als Liste, `{}` für gültige Angebote).
+    - Schreibt Angebote und Details in einer Transaktion per `bulk_create`.
+    """
+    offers = serializers.ListField(child=serializers.DictField(), allow_empty=False)
+
+    def validate_offers(self, offers_data):
+        """Validiert jedes Angebot einzeln und meldet Fehler an der Position des Angebots."""
+        max_items = self.context["max_items"]
+        if len(offers_data) > max_items:
+            raise serializers.ValidationError(f"Es können höchstens {max_items} Angebote auf einmal angelegt werden.")
+
+        validated, errors = [], []
+        for offer_data in offers_data:
+            serializer = OfferCreateSerializer(data=offer_data)
+            if not serializer.is_valid():
+                errors.append(serializer.errors)
+                continue
+            try:
+                validate_offer_details(serializer.validated_data["details"])
+            except serializers.ValidationError as exc:
+                errors.append({"details": exc.detail})
+                continue
+            validated.append(serializer.validated_data)
+            errors.append({})
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return validated
 
-        return offer
+    def create(self, validated_data):
+        """Legt alle Angebote und Details mit zwei `bulk_create`-Aufrufen an."""
+        user = validated_data["user"]
+        offers, details = [], []
+        for offer_data in validated_data["offers"]:
+            offer_data = dict(offer_data)
+            details_data = offer_data.pop("details")
+            offer = Offer(user=user, **offer_data)
+            set_min_values(offer, details_data)
+            offers.append(offer)
+            details.extend(OfferDetail(offer=offer, **detail_data) for detail_data in details_data)
+
+        with transaction.atomic():
+            Offer.objects.bulk_create(offers)
+            OfferDetail.objects.bulk_create(details)
+            invalidate_offer_list()
+        return offers
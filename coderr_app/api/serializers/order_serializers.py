@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from ...models import Order, OfferDetail
 from rest_framework.exceptions import ValidationError, PermissionDenied
+from django.db.models import Exists, F
+from user_auth_app.models import UserProfile
 
 
 class OrderSerializer(serializers.ModelSerializer):
@@ -14,8 +16,14 @@ class OrderSerializer(serializers.ModelSerializer):
                             'title', 'revisions', 'delivery_time_in_days', 'price', 'features', 'offer_type']
 
     def create(self, validated_data):
+        """
+        Legt eine Bestellung als Momentaufnahme eines Angebotsdetails an.
+
+        Angebotsdetail, Anbieter und Kundentyp des Bestellers werden in einer
+        Abfrage gelesen; die Bestellung selbst entsteht mit einem INSERT.
+        """
         request = self.context['request']
-        
+
         if not request.user.is_authenticated:
             raise PermissionDenied("Authentifizierung erforderlich, um eine Bestellung zu erstellen.")
 
@@ -24,35 +32,20 @@ class OrderSerializer(serializers.ModelSerializer):
         if not offer_detail_id:
             raise ValidationError({"offer_detail_id": "Dieses Feld ist erforderlich."})
 
-        try:
-            offer_detail = OfferDetail.objects.select_related('offer').get(id=offer_detail_id)
-        except OfferDetail.DoesNotExist:
-            raise ValidationError({"offer_detail_id": "Kein OfferDetail mit dieser ID gefunden."})
-
         customer_user = request.user
+        snapshot = OfferDetail.objects.filter(id=offer_detail_id).values(
+            'title', 'revisions', 'delivery_time_in_days', 'price', 'features', 'offer_type',
+            business_user_id=F('offer__user_id'),
+            is_customer=Exists(UserProfile.objects.filter(user_id=customer_user.id, type='customer')),
+        ).first()
 
-        user_profile = getattr(customer_user, 'userprofile', None)
-        if not user_profile or user_profile.type != 'customer':
-            raise PermissionDenied("Nur Kunden können Bestellungen erstellen.") 
-
-        business_user = offer_detail.offer.user
-        print(f"✅ OfferDetail ID: {offer_detail_id}")
-        print(f"🔍 Offer User ID: {business_user.id if business_user else 'None'}")
+        if snapshot is None:
+            raise ValidationError({"offer_detail_id": "Kein OfferDetail mit dieser ID gefunden."})
 
-        if not business_user:
-            raise ValidationError({"business_user": "Kein Business-User gefunden!"})
+        if not snapshot.pop('is_customer'):
+            raise PermissionDenied("Nur Kunden können Bestellungen erstellen.")
 
         validated_data.pop('customer_user', None)
         validated_data.pop('business_user', None)
 
-        return Order.objects.create(
-            customer_user=customer_user,
-            business_user=business_user,
-            title=offer_detail.title,
-            revisions=offer_detail.revisions,
-            delivery_time_in_days=offer_detail.delivery_time_in_days,
-            price=offer_detail.price,
-            features=offer_detail.features,
-            offer_type=offer_detail.offer_type,
-            **validated_data
-        )
\ No newline at end of file
+        return Order.objects.create(customer_user=customer_user, **snapshot, **validated_data)
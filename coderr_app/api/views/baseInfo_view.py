@@ -1,9 +1,7 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Avg
-from ...models import Offer, Review
-from user_auth_app.models import UserProfile
+from ...platform_stats import get_snapshot
 from rest_framework.permissions import AllowAny
 
 
@@ -15,25 +13,15 @@ class BaseInfoView(APIView):
 
     def get(self, request):
         """
-        Holt allgemeine Plattform-Statistiken und gibt sie als JSON-Response zurück.
-        
+        Gibt die zwischengespeicherten Plattform-Statistiken als JSON-Response zurück.
+
+        Die Werte werden höchstens alle `BASE_INFO_STATS_TTL` Sekunden neu berechnet.
+
         Rückgabe:
         - `review_count`: Gesamtanzahl der Bewertungen.
         - `average_rating`: Durchschnittliche Bewertung (gerundet auf eine Dezimalstelle).
         - `business_profile_count`: Anzahl der Geschäftsprofile.
         - `offer_count`: Anzahl der Angebote auf der Plattform.
+        - `generated_at`: Zeitpunkt, zu dem die Werte berechnet wurden.
         """
-        review_count = Review.objects.count()
-        average_rating = Review.objects.aggregate(
-            avg_rating=Avg('rating')).get('avg_rating', 0)
-        average_rating = round(average_rating or 0, 1)
-        business_profile_count = UserProfile.objects.filter(
-            type='business').count()
-        offer_count = Offer.objects.count()
-        data = {
-            "review_count": review_count,
-            "average_rating": average_rating,
-            "business_profile_count": business_profile_count,
-            "offer_count": offer_count,
-        }
-        return Response(data, status=status.HTTP_200_OK)
+        return Response(get_snapshot(), status=status.HTTP_200_OK)
@@ -1,28 +1,141 @@
 from rest_framework import viewsets, filters
+from django.core.cache import cache
+from rest_framework.decorators import action
+from django.conf import settings
 from ...models import Offer, OfferDetail
-from ..serializers.offer_serializers import OfferListSerializer, OfferDetailViewSerializer, OfferDetailSerializer, OfferCreateSerializer
+from ..serializers.offer_serializers import OfferListSerializer, OfferDetailViewSerializer, OfferDetailSerializer, OfferCreateSerializer, OfferBulkCreateSerializer, validate_offer_details
 from ..filters import OfferFilter
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
-from ..pagination import CustomPagination
-from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from ..pagination import CustomPagination, OfferCursorPagination
 from rest_framework.response import Response
 from ..permissions import AuthenticatedOwnerPermission, IsProvider
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from django.http import HttpResponse, Http404
+from django.db.models import F
+from ... import offer_cache
+from ...images import has_variants
+from ..facets import compute_offer_facets
+from ..conditional import ConditionalRetrieveMixin, make_etag, not_modified_response, set_validators
+from ..export import export_response
 
-class OfferViewSet(viewsets.ModelViewSet):
+class OfferViewSet(ConditionalRetrieveMixin, viewsets.ModelViewSet):
     """
     API-ViewSet für Angebote.
     
     - Unterstützt das Erstellen, Aktualisieren, Abrufen und Löschen von Angeboten.
     - Verwendet verschiedene Serializer je nach Aktion.
     - Implementiert Filter-, Such- und Paginierungsfunktionen.
+    - Mit `pagination=cursor` (oder einem `cursor`-Parameter) wird Keyset-Paginierung verwendet.
+    - Die JSON-Liste wird je Parameterkombination gerendert zwischengespeichert.
+    - Unterstützt bedingte GET-Anfragen über ETags für Liste und Einzelansicht.
+    - `facets/` liefert Preis-, Lieferzeit-, Typ- und Ersteller-Facetten zur Filterleiste.
     - Setzt verschiedene Berechtigungen für unterschiedliche Aktionen um.
     """
-    queryset = Offer.objects.prefetch_related("details").select_related("user").distinct()
+    queryset = Offer.objects.prefetch_related("details").select_related("user", "user__userprofile", "user__rating_stats")
     filter_backends = (DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter)
     filterset_class = OfferFilter
     pagination_class = CustomPagination
+    cursor_pagination_class = OfferCursorPagination
+    # Namen des Besitzers und fertige Bildvarianten haben keinen Zeitstempel; nur der ETag erfasst sie.
+    send_last_modified = False
+
+    @property
+    def paginator(self):
+        """Wählt die Cursor-Paginierung, wenn sie per Query-Parameter angefordert wird."""
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if params.get('pagination') == 'cursor' or 'cursor' in params:
+                self._paginator = self.cursor_pagination_class()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def list(self, request, *args, **kwargs):
+        """
+        Liefert die Angebotsliste aus dem Cache oder rendert und speichert sie.
+
+        Der ETag folgt aus Parametern und Katalog-Generation; passt er, gibt es 304.
+        Ein Last-Modified wird bewusst nicht gesetzt: Löschungen, Bewertungen und
+        Namensänderungen ändern die Liste, aber kein `updated_at` der übrigen Angebote.
+        """
+        if request.accepted_renderer.format != "json":
+            return super().list(request, *args, **kwargs)
+
+        key = offer_cache.cache_key("list", request)
+        etag = make_etag(key)
+        response = not_modified_response(request, etag, None)
+        if response is not None:
+            return response
+
+        content = offer_cache.get_list(key)
+        cache_status = "HIT"
+        if content is None:
+            content = JSONRenderer().render(super().list(request, *args, **kwargs).data)
+            offer_cache.set_list(key, content)
+            cache_status = "MISS"
+
+        response = HttpResponse(content, content_type="application/json")
+        response["X-Cache"] = cache_status
+        return set_validators(response, etag, None)
+
+    @action(detail=False, methods=["get"])
+    def facets(self, request):
+        """
+        Liefert Facetten (Preis, Lieferzeit, Angebotstyp, Ersteller) für die
+        aktuellen Filterparameter; das Ergebnis wird je Filterkombination gecacht.
+        """
+        key = offer_cache.cache_key("facets", request)
+        data = cache.get(key)
+        cache_status = "HIT"
+        if data is None:
+            data = compute_offer_facets(self.filter_queryset(self.get_queryset()))
+            cache.set(key, data, settings.OFFER_LIST_CACHE_TIMEOUT)
+            cache_status = "MISS"
+        response = Response(data)
+        response["X-Cache"] = cache_status
+        return response
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Exportiert den eigenen Angebotskatalog gestreamt als NDJSON oder CSV,
+        eine Zeile je Angebotsdetail (`file_format=ndjson|csv`).
+        """
+        queryset = (
+            OfferDetail.objects.filter(offer__user=request.user)
+            .annotate(
+                offer_title=F("offer__title"),
+                offer_description=F("offer__description"),
+                offer_created_at=F("offer__created_at"),
+                offer_updated_at=F("offer__updated_at"),
+            )
+            .order_by("offer_id", "id")
+        )
+        fields = [
+            "offer_id", "offer_title", "offer_description", "offer_created_at", "offer_updated_at",
+            "id", "offer_type", "title", "price", "delivery_time_in_days", "revisions", "features",
+        ]
+        return export_response(request, queryset, fields, "offers")
+
+    def get_last_modified(self, instance):
+        """Basis des ETags: neben dem Angebot auch das Profil des Besitzers (Namen in `user_details`)."""
+        profile = getattr(instance.user, "userprofile", None)
+        if profile is not None and profile.updated_at > instance.updated_at:
+            return profile.updated_at
+        return instance.updated_at
+
+    def get_etag(self, instance):
+        """
+        Bildvarianten entstehen nach dem Speichern und verändern daher ebenfalls den ETag,
+        ebenso die Namen des Benutzers, auf die `user_details` zurückfällt.
+        """
+        user = instance.user
+        return make_etag(
+            super().get_etag(instance), has_variants(instance.image),
+            user.username, user.first_name, user.last_name,
+        )
 
     def get_serializer_class(self):
         """Gibt den passenden Serializer basierend auf der aktuellen Aktion zurück."""
@@ -34,54 +147,63 @@ class OfferViewSet(viewsets.ModelViewSet):
 
     def get_permissions(self):
         """Setzt Berechtigungen je nach Aktion."""
-        if self.action == "create":
+        if self.action in ["create", "bulk_create"]:
             self.permission_classes = [IsProvider]
         elif self.action in ["update", "partial_update", "destroy"]:
             self.permission_classes = [AuthenticatedOwnerPermission]
+        elif self.action == "export":
+            self.permission_classes = [IsAuthenticated]
         else:
             self.permission_classes = [IsAuthenticatedOrReadOnly]
         return super().get_permissions()
 
     def perform_create(self, serializer):
         """Erstellt ein neues Angebot und validiert Angebotsdetails."""
-        details_data = self.request.data.get("details", [])
-
-        if len(details_data) != 3:
-            raise ValidationError("Es müssen genau 3 Angebotsdetails angegeben werden.")
-
-        offer_types = {detail["offer_type"] for detail in details_data}
-        if offer_types != {"basic", "standard", "premium"}:
-            raise ValidationError("Die Angebotsdetails müssen die Typen basic, standard und premium enthalten.")
-
-        for detail in details_data:
-            if not detail["features"]:
-                raise ValidationError("Jedes Angebotsdetail muss mindestens ein Feature enthalten.")
-            if int(detail["delivery_time_in_days"]) <= 0:
-                raise ValidationError("Die Lieferzeit muss eine positive Zahl sein.")
-            if int(detail["revisions"]) < -1:
-                raise ValidationError("Die Anzahl der Revisionen darf nicht kleiner als -1 sein (für unlimitierte Revisionen).")
+        validate_offer_details(serializer.validated_data["details"])
 
         offer = serializer.save(user=self.request.user)
         offer_serializer = OfferDetailViewSerializer(offer)
         return Response(offer_serializer.data)
 
-class OfferDetailViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk_create(self, request):
+        """
+        Legt mehrere Angebote (je mit drei Details) in einer Transaktion an.
+
+        Erwartet eine Liste von Angeboten oder `{"offers": [...]}`; jeder andere
+        Body wird vom Serializer mit 400 abgelehnt. Ist ein Angebot ungültig, wird
+        nichts angelegt und die Fehler werden je Position zurückgegeben.
+        """
+        offers_data = request.data.get("offers") if isinstance(request.data, dict) else request.data
+        serializer = OfferBulkCreateSerializer(
+            data={"offers": offers_data},
+            context={"max_items": settings.OFFER_BULK_CREATE_MAX_ITEMS},
+        )
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        offers = serializer.save(user=request.user)
+        return Response({"ids": [offer.id for offer in offers]}, status=status.HTTP_201_CREATED)
+
+class OfferDetailViewSet(ConditionalRetrieveMixin, viewsets.ModelViewSet):
     """
     API-ViewSet für Angebotsdetails.
     
     - Unterstützt das Abrufen, Aktualisieren und Löschen von Angebotsdetails.
     - Verwendet spezielle Berechtigungen, um den Zugriff zu steuern.
+    - Unterstützt bedingte GET-Anfragen (ETag / Last-Modified).
     """
-    queryset = OfferDetail.objects.all()
+    queryset = OfferDetail.objects.select_related("offer")
     serializer_class = OfferDetailSerializer
     permission_classes = [AuthenticatedOwnerPermission |
                           IsProvider | IsAuthenticatedOrReadOnly]
-    
+
+    def get_last_modified(self, instance):
+        """Details haben keinen eigenen Zeitstempel; jede Detailänderung aktualisiert das Angebot."""
+        return instance.offer.updated_at
+
     def retrieve(self, request, *args, **kwargs):
         """Falls kein OfferDetail existiert, gebe eine leere 200-Response zurück."""
         try:
-            instance = self.get_object()
-            serializer = self.get_serializer(instance)
-            return Response(serializer.data)
-        except:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
             return Response({}, status=status.HTTP_200_OK)
@@ -2,7 +2,28 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.auth.models import User
-from ...models import Order
+from ...models import BusinessOrderCounter
+from user_auth_app.models import UserProfile
+
+
+def order_count_response(business_user_id, field, key):
+    """
+    Liest Profiltyp und Bestellzähler mit einer Abfrage (LEFT JOIN auf den Zähler).
+
+    Wie in der Batch-Ansicht wird erst der Profiltyp geprüft, auch wenn eine
+    Zählerzeile existiert; ein Anbieter ohne Zählerzeile hat 0 Bestellungen.
+    """
+    row = UserProfile.objects.filter(user_id=business_user_id).values_list(
+        'type', f'user__order_counter__{field}').first()
+    if row is None:
+        if not User.objects.filter(id=business_user_id).exists():
+            return Response({"error": "Business user not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"error": "User is not a business provider."}, status=status.HTTP_400_BAD_REQUEST)
+    profile_type, count = row
+    if profile_type != 'business':
+        return Response({"error": "User is not a business provider."}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({key: count or 0}, status=status.HTTP_200_OK)
+
 
 class OrderCountView(APIView):
     """
@@ -13,16 +34,7 @@ class OrderCountView(APIView):
     """
     def get(self, request, business_user_id):
         """Ermittelt die Anzahl der laufenden Bestellungen für einen Geschäftsanbieter."""
-        try:
-            business_user = User.objects.get(id=business_user_id)
-            if not hasattr(business_user, 'userprofile') or business_user.userprofile.type != 'business':
-                return Response({"error": "User is not a business provider."}, status=status.HTTP_400_BAD_REQUEST)
-        except User.DoesNotExist:
-            return Response({"error": "Business user not found."}, status=status.HTTP_404_NOT_FOUND)
-
-        count = Order.objects.filter(
-            business_user=business_user, status='in_progress').count()
-        return Response({"order_count": count}, status=status.HTTP_200_OK)
+        return order_count_response(business_user_id, 'in_progress_count', 'order_count')
 
 class CompletedOrderCountView(APIView):
     """
@@ -33,13 +45,53 @@ class CompletedOrderCountView(APIView):
     """
     def get(self, request, business_user_id):
         """Ermittelt die Anzahl der abgeschlossenen Bestellungen für einen Geschäftsanbieter."""
+        return order_count_response(business_user_id, 'completed_count', 'completed_order_count')
+
+class BatchOrderCountView(APIView):
+    """
+    API-View zur Ermittlung der Bestellzahlen mehrerer Geschäftsanbieter auf einmal.
+    
+    - Erwartet `business_user_ids` als kommagetrennte Liste (höchstens 100 IDs).
+    - Prüft die Profiltypen aller Anbieter mit einer Abfrage.
+    - Gibt je Anbieter laufende und abgeschlossene Bestellungen zurück, ungültige IDs unter `errors`.
+    """
+    max_ids = 100
+
+    def get(self, request):
+        """Ermittelt laufende und abgeschlossene Bestellungen für alle angefragten Anbieter."""
+        raw_ids = ",".join(request.query_params.getlist('business_user_ids'))
         try:
-            business_user = User.objects.get(id=business_user_id)
-            if not hasattr(business_user, 'userprofile') or business_user.userprofile.type != 'business':
-                return Response({"error": "User is not a business provider."}, status=status.HTTP_400_BAD_REQUEST)
-        except User.DoesNotExist:
-            return Response({"error": "Business user not found."}, status=status.HTTP_404_NOT_FOUND)
+            business_user_ids = sorted({int(value) for value in raw_ids.split(",") if value.strip()})
+        except ValueError:
+            return Response({"error": "business_user_ids must be a comma-separated list of integers."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not business_user_ids:
+            return Response({"error": "business_user_ids is required."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(business_user_ids) > self.max_ids:
+            return Response({"error": f"At most {self.max_ids} business users per request."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        profile_types = dict(UserProfile.objects.filter(
+            user_id__in=business_user_ids).values_list('user_id', 'type'))
+        counters = {
+            row['business_user_id']: row
+            for row in BusinessOrderCounter.objects.filter(business_user_id__in=[
+                user_id for user_id, profile_type in profile_types.items() if profile_type == 'business'
+            ]).values('business_user_id', 'in_progress_count', 'completed_count')
+        }
+        missing = set(business_user_ids) - set(profile_types)
+        existing = set(User.objects.filter(id__in=missing).values_list('id', flat=True)) if missing else set()
 
-        count = Order.objects.filter(
-            business_user=business_user, status='completed').count()
-        return Response({"completed_order_count": count}, status=status.HTTP_200_OK)
+        results, errors = {}, {}
+        for user_id in business_user_ids:
+            if profile_types.get(user_id) == 'business':
+                counter = counters.get(user_id, {})
+                results[user_id] = {
+                    "order_count": counter.get('in_progress_count', 0),
+                    "completed_order_count": counter.get('completed_count', 0),
+                }
+            elif user_id in missing and user_id not in existing:
+                errors[user_id] = "Business user not found."
+            else:
+                errors[user_id] = "User is not a business provider."
+        return Response({"results": results, "errors": errors}, status=status.HTTP_200_OK)
@@ -1,12 +1,19 @@
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from ...models import Order
 from ..serializers.order_serializers import OrderSerializer
-from django.db import models
+from django.db import models, transaction
+from ... import order_counters
+from ...order_status import StatusConflict, transition_status
 from rest_framework.exceptions import MethodNotAllowed
+from ..filters import OrderFilter
+from ..pagination import OrderCursorPagination
+from ..export import export_response
+from ..idempotency import IdempotentCreateMixin
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(IdempotentCreateMixin, viewsets.ModelViewSet):
     """
     API-ViewSet für Bestellungen.
     
@@ -14,10 +21,15 @@ class OrderViewSet(viewsets.ModelViewSet):
     - Benutzer können nur ihre eigenen Bestellungen sehen.
     - Nur Admins können Bestellungen löschen.
     - Vollständige Updates (PUT) sind nicht erlaubt, nur partielle Updates (PATCH).
+    - Die Liste ist nach `created_at` cursor-paginiert und nach Status, Angebotstyp
+      und Zeitraum filterbar.
+    - Das Anlegen kann mit einem `Idempotency-Key`-Header gefahrlos wiederholt werden.
     """
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
+    filterset_class = OrderFilter
+    pagination_class = OrderCursorPagination
 
     def get_queryset(self):
         """Gibt nur die Bestellungen des authentifizierten Benutzers zurück."""
@@ -26,9 +38,40 @@ class OrderViewSet(viewsets.ModelViewSet):
             models.Q(customer_user=user) | models.Q(business_user=user)
         )
 
+    def list(self, request, *args, **kwargs):
+        """
+        Listet die Bestellungen des Benutzers als Kunde und als Anbieter.
+
+        Statt eines ODER über zwei Fremdschlüssel werden beide Seiten getrennt
+        über ihre Indizes gelesen und seitenweise zusammengeführt.
+        """
+        user = request.user
+        branches = [
+            self.filter_queryset(Order.objects.filter(customer_user=user)),
+            self.filter_queryset(Order.objects.filter(business_user=user)),
+        ]
+        page = self.paginator.paginate_branches(branches, request)
+        serializer = self.get_serializer(page, many=True)
+        return self.paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Exportiert alle eigenen Bestellungen gestreamt als NDJSON oder CSV
+        (`file_format=ndjson|csv`); die Listenfilter gelten auch hier.
+        """
+        queryset = self.filter_queryset(self.get_queryset()).order_by("created_at", "id")
+        fields = [
+            "id", "customer_user_id", "business_user_id", "title", "offer_type", "status",
+            "price", "revisions", "delivery_time_in_days", "features", "created_at", "updated_at",
+        ]
+        return export_response(request, queryset, fields, "orders")
+
     def perform_create(self, serializer):
         """Setzt den `customer_user` automatisch auf den aktuell angemeldeten Benutzer."""
-        serializer.save(customer_user=self.request.user)
+        with transaction.atomic():
+            order = serializer.save(customer_user=self.request.user)
+            order_counters.order_created(order)
 
     def destroy(self, request, *args, **kwargs):
         """Nur Admins dürfen Bestellungen löschen."""
@@ -44,5 +87,18 @@ class OrderViewSet(viewsets.ModelViewSet):
         return super().update(request, *args, **kwargs)
 
     def partial_update(self, request, *args, **kwargs):
-        """Erlaubt partielle Updates für eine Bestellung."""
-        return super().partial_update(request, *args, **kwargs)
+        """
+        Ändert den Status einer Bestellung gemäß `Order.ALLOWED_TRANSITIONS`.
+
+        Unerlaubte Wechsel und gleichzeitige Änderungen werden mit 409 abgelehnt.
+        """
+        order = self.get_object()
+        serializer = self.get_serializer(order, data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        new_status = serializer.validated_data.get("status", order.status)
+        if new_status != order.status:
+            try:
+                transition_status(order, new_status)
+            except StatusConflict as exc:
+                return Response({"error": str(exc)}, status=status.HTTP_409_CONFLICT)
+        return Response(self.get_serializer(order).data)
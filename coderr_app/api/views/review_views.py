@@ -3,10 +3,17 @@ from django.shortcuts import get_object_or_404
 from ...models import Review
 from ..serializers.review_serializers import ReviewSerializer
 from ..permissions import IsOwnerOrAdmin
+from ..idempotency import IdempotentCreateMixin
+from ..filters import ReviewFilter
+from ..pagination import ReviewCursorPagination
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from ... import review_stats
+from django.db import transaction
 from rest_framework import serializers
 from django.contrib.auth.models import User
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(IdempotentCreateMixin, viewsets.ModelViewSet):
     """
     API-ViewSet für Bewertungen.
     
@@ -14,9 +21,17 @@ class ReviewViewSet(viewsets.ModelViewSet):
     - Nutzer können nur ihre eigenen Bewertungen sehen und verwalten.
     - Nur Kunden dürfen Bewertungen erstellen.
     - Bewertungen dürfen nur für Geschäftsbenutzer abgegeben werden.
+    - Das Anlegen kann mit einem `Idempotency-Key`-Header gefahrlos wiederholt werden.
+    - Mit `business_user_id` oder `reviewer_id` ist die Liste öffentlich und
+      per `Cache-Control` cachebar; sie ist cursor-paginiert und nach
+      `updated_at` oder `rating` sortierbar.
+    - Die eigenen Bewertungen (ohne diese Filter) bleiben eine unpaginierte Liste.
     """
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
+    filterset_class = ReviewFilter
+    pagination_class = ReviewCursorPagination
+    public_filter_params = ('business_user_id', 'reviewer_id')
 
     def get_permissions(self):
         """Setzt die Berechtigungen basierend auf der Aktion."""
@@ -24,10 +39,36 @@ class ReviewViewSet(viewsets.ModelViewSet):
             return [permissions.IsAuthenticated(), IsOwnerOrAdmin()]
         elif self.action == 'create':
             return [permissions.IsAuthenticated()]
+        elif self.action == 'list' and self.is_public_listing():
+            return [permissions.AllowAny()]
         return [permissions.IsAuthenticated()]
 
+    def is_public_listing(self):
+        """Eine Liste, die nach Anbieter oder Verfasser gefiltert ist, ist öffentlich."""
+        return any(self.request.query_params.get(param) for param in self.public_filter_params)
+
+    @property
+    def paginator(self):
+        """Paginiert nur die öffentliche Liste; die eigenen Bewertungen behalten ihr Listenformat."""
+        if self.action == 'list' and not self.is_public_listing():
+            return None
+        return super().paginator
+
+    def list(self, request, *args, **kwargs):
+        """Liefert die Bewertungen; öffentliche Listen dürfen von Proxies zwischengespeichert werden."""
+        response = super().list(request, *args, **kwargs)
+        if self.is_public_listing() and response.status_code == 200:
+            patch_cache_control(response, public=True, max_age=settings.REVIEW_FEED_MAX_AGE)
+        return response
+
     def get_queryset(self):
-        """Gibt nur Bewertungen zurück, die entweder vom Benutzer erstellt wurden oder sich auf ihn beziehen."""
+        """
+        Gibt nur Bewertungen zurück, die entweder vom Benutzer erstellt wurden oder sich auf ihn beziehen.
+
+        Öffentliche Listen umfassen alle Bewertungen; eingeschränkt wird dort über die Filter.
+        """
+        if self.action == 'list' and self.is_public_listing():
+            return Review.objects.all()
         user = self.request.user
         if not user.is_authenticated:
             return Review.objects.none()
@@ -52,4 +93,14 @@ class ReviewViewSet(viewsets.ModelViewSet):
             raise serializers.ValidationError(
                 "You can only review business users.")
 
-        serializer.save(reviewer=user, business_user=business_user)
+        with transaction.atomic():
+            review = serializer.save(reviewer=user, business_user=business_user)
+            review_stats.review_created(review)
+
+    def perform_update(self, serializer):
+        """Speichert die Änderung und hält die Bewertungsstatistik des Anbieters aktuell."""
+        previous_rating = serializer.instance.rating
+        with transaction.atomic():
+            review = serializer.save()
+            review_stats.review_rating_changed(review, previous_rating)
+
@@ -0,0 +1,183 @@
+import atexit
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+VARIANTS = {"thumb": 160, "card": 480, "large": 1024}
+FORMATS = {"webp": "WEBP", "jpg": "JPEG"}
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_workers = None
+
+
+def variant_name(name, variant, extension):
+    """Speicherpfad einer Variante, z. B. `offers/variants/logo_card.webp` für `offers/logo.png`."""
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, "variants", f"{stem}_{variant}.{extension}")
+
+
+def variant_names(name):
+    """Alle Variantenpfade eines Bildes als Liste `(variant, width, extension, name)`."""
+    return [
+        (variant, width, extension, variant_name(name, variant, extension))
+        for variant, width in VARIANTS.items()
+        for extension in FORMATS
+    ]
+
+
+def render_variants(source_path, targets):
+    """
+    Erzeugt die verkleinerten Varianten eines Bildes (läuft im Worker-Prozess).
+
+    `targets` ist eine Liste `(width, extension, path)`; die letzte Datei wird
+    zuletzt geschrieben und dient als Marker für vollständig erzeugte Varianten.
+    """
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        for width, extension, path in targets:
+            variant = image.copy()
+            variant.thumbnail((width, width), Image.Resampling.LANCZOS)
+            if FORMATS[extension] == "JPEG" and variant.mode != "RGB":
+                variant = variant.convert("RGB")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary_path = f"{path}.tmp"
+            variant.save(temporary_path, FORMATS[extension], quality=82)
+            os.replace(temporary_path, path)
+    return len(targets)
+
+
+def get_executor():
+    """
+    Gibt den prozessweiten Pool für die Bildverarbeitung zurück (lazy erzeugt).
+
+    Ändert sich `IMAGE_VARIANT_WORKERS`, wird der alte Pool beendet und ein neuer erzeugt.
+    """
+    global _executor, _executor_workers
+    if _executor is not None and _executor_workers != settings.IMAGE_VARIANT_WORKERS:
+        shutdown_executor()
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_VARIANT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        _executor_workers = settings.IMAGE_VARIANT_WORKERS
+    return _executor
+
+
+def shutdown_executor():
+    """Beendet den Pool, ohne auf laufende Aufträge zu warten (beim Prozessende und nach Fehlern)."""
+    global _executor, _executor_workers
+    executor, _executor, _executor_workers = _executor, None, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(shutdown_executor)
+
+
+def local_paths(fieldfile):
+    """Quell- und Zielpfade für eine Datei im lokalen Storage oder `None`, falls nicht lokal."""
+    try:
+        source_path = fieldfile.storage.path(fieldfile.name)
+    except NotImplementedError:
+        return None
+    targets = [
+        (width, extension, fieldfile.storage.path(name))
+        for _, width, extension, name in variant_names(fieldfile.name)
+    ]
+    return source_path, targets
+
+
+def has_variants(fieldfile):
+    """Prüft anhand der zuletzt geschriebenen Variante, ob alle Varianten vorliegen."""
+    return bool(fieldfile) and fieldfile.storage.exists(variant_names(fieldfile.name)[-1][3])
+
+
+def schedule_variants(fieldfile, on_done=None):
+    """
+    Erzeugt die Varianten nach dem Commit im Hintergrund, ohne den Request zu blockieren.
+
+    `on_done` wird aufgerufen, sobald die Varianten vorliegen (z. B. um Caches zu invalidieren).
+    """
+    if not fieldfile or has_variants(fieldfile):
+        return
+    paths = local_paths(fieldfile)
+    if paths is None:
+        return
+    transaction.on_commit(lambda: submit_variants(*paths, on_done=on_done))
+
+
+def submit_variants(source_path, targets, on_done=None):
+    """
+    Übergibt die Varianten an den Pool (oder rendert sie ohne Worker direkt).
+
+    Fehler – auch ein defekter Pool – werden nur geloggt und erreichen den
+    aufrufenden `on_commit`-Callback nicht.
+    """
+    if settings.IMAGE_VARIANT_WORKERS:
+        try:
+            future = get_executor().submit(render_variants, source_path, targets)
+        except Exception as exc:
+            shutdown_executor()
+            log_failure(source_path, exc)
+            return
+        future.add_done_callback(lambda done: finish_in_pool_thread(source_path, done, on_done))
+        return
+    try:
+        render_variants(source_path, targets)
+    except Exception as exc:
+        log_failure(source_path, exc)
+        return
+    finish(source_path, on_done)
+
+
+def finish_in_pool_thread(source_path, future, on_done):
+    """Schließt einen Auftrag im Verwaltungsthread des Pools ab und gibt dessen DB-Verbindung frei."""
+    if future.cancelled():
+        return
+    if future.exception() is not None:
+        log_failure(source_path, future.exception())
+        return
+    try:
+        finish(source_path, on_done)
+    finally:
+        connections.close_all()
+
+
+def finish(source_path, on_done):
+    """Ruft `on_done` nach erfolgreicher Erzeugung auf; Fehler werden geloggt."""
+    if on_done is None:
+        return
+    try:
+        on_done()
+    except Exception as exc:
+        logger.warning("Nachbearbeitung der Bildvarianten für %s fehlgeschlagen: %s", source_path, exc)
+
+
+def log_failure(source_path, exc):
+    """Protokolliert fehlgeschlagene Bildverarbeitung, ohne den Request zu beeinträchtigen."""
+    if exc is not None:
+        logger.warning("Bildvarianten für %s konnten nicht erzeugt werden: %s", source_path, exc)
+
+
+def variant_urls(fieldfile):
+    """
+    URLs der Varianten als `{variant: {extension: url}}`.
+
+    Solange die Varianten noch nicht erzeugt sind, wird ein leeres Dict zurückgegeben.
+    """
+    if not has_variants(fieldfile):
+        return {}
+    urls = {}
+    for variant, _, extension, name in variant_names(fieldfile.name):
+        urls.setdefault(variant, {})[extension] = fieldfile.storage.url(name)
+    return urls
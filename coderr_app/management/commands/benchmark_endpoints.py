@@ -0,0 +1,169 @@
+import json
+import platform
+import subprocess
+import time
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from coderr_app.models import Offer, OfferDetail, Order, Review
+from user_auth_app.authentication import token_cache
+from user_auth_app.models import UserProfile
+
+
+def percentile(values, fraction):
+    """Perzentil nach dem Nearest-Rank-Verfahren auf einer sortierten Liste."""
+    index = max(0, min(len(values) - 1, round(fraction * len(values) + 0.5) - 1))
+    return values[index]
+
+
+def current_commit():
+    """Gibt den aktuellen Git-Commit zurück, falls das Projekt in einem Repository liegt."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    """
+    Misst Latenz (p50/p95/p99) und Abfrageanzahl der wichtigsten Endpunkte.
+
+    Die Anfragen laufen über den vollständigen Django-Stack (Middleware,
+    Token-Authentifizierung, Rendering) gegen die aktuelle Datenbank, z. B.
+    nach `generate_marketplace_data`. Das Ergebnis kann als JSON geschrieben
+    und mit `--compare` einem früheren Lauf gegenübergestellt werden.
+    """
+    help = "Misst die API-Endpunkte und schreibt maschinenlesbare Ergebnisse."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=100, help="Messungen je Endpunkt.")
+        parser.add_argument("--warmup", type=int, default=5, help="Ungezählte Anfragen vorab je Endpunkt.")
+        parser.add_argument("--cold", action="store_true", help="Vor jeder Anfrage alle Caches leeren.")
+        parser.add_argument("--username", help="Angemeldeter Benutzer (Standard: Anbieter mit den meisten Bestellungen).")
+        parser.add_argument("--output", help="Ergebnis als JSON in diese Datei schreiben.")
+        parser.add_argument("--compare", help="Früheres JSON-Ergebnis, dessen p95 zum Vergleich ausgegeben wird.")
+
+    def handle(self, *args, **options):
+        user = self.get_user(options["username"])
+        token, _ = Token.objects.get_or_create(user=user)
+        review = user.received_reviews.order_by("-id").first()
+        client = Client(HTTP_HOST=self.get_host(), HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        endpoints = {
+            "offers": "/api/offers/",
+            "offers_filtered": "/api/offers/?min_price=50&max_delivery_time=7&ordering=-updated_at",
+            "offers_search": "/api/offers/?search=design",
+            "offers_cursor": "/api/offers/?pagination=cursor&ordering=min_price",
+            "orders": "/api/orders/",
+            "reviews": f"/api/reviews/?business_user_id={review.business_user_id if review else user.id}",
+            "base_info": "/api/base-info/",
+            "business_profiles": "/api/profiles/business/",
+            "customer_profiles": "/api/profiles/customer/",
+        }
+
+        results = {}
+        for name, url in endpoints.items():
+            results[name] = self.measure(client, url, options)
+            self.report(name, results[name])
+
+        payload = {
+            "commit": current_commit(),
+            "created_at": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "database": connection.vendor,
+            "user": user.username,
+            "requests": options["requests"],
+            "cold": options["cold"],
+            "dataset": self.dataset(),
+            "endpoints": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as handle:
+                json.dump(payload, handle, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Ergebnis nach {options['output']} geschrieben."))
+        if options["compare"]:
+            self.compare(options["compare"], results)
+
+    def get_user(self, username):
+        """Wählt den angegebenen oder den Anbieter mit den meisten Bestellungen."""
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"Benutzer '{username}' existiert nicht.")
+        user = User.objects.filter(userprofile__type="business").order_by(
+            "-order_counter__in_progress_count", "-order_counter__completed_count", "id").first()
+        if user is None:
+            raise CommandError("Keine Anbieter vorhanden. Bitte zuerst `generate_marketplace_data` ausführen.")
+        return user
+
+    def get_host(self):
+        """Erster konkreter Eintrag aus `ALLOWED_HOSTS`, sonst `localhost` (mit DEBUG erlaubt)."""
+        return next(
+            (host for host in settings.ALLOWED_HOSTS if host != "*" and not host.startswith(".")), "localhost")
+
+    def measure(self, client, url, options):
+        """Führt Aufwärm- und Messanfragen aus und fasst Latenz und Abfragen zusammen."""
+        for _ in range(options["warmup"]):
+            client.get(url)
+        timings = []
+        queries = []
+        status_codes = set()
+        for _ in range(options["requests"]):
+            if options["cold"]:
+                cache.clear()
+                token_cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(len(captured))
+            status_codes.add(response.status_code)
+        timings.sort()
+        return {
+            "url": url,
+            "status": sorted(status_codes),
+            "p50_ms": round(percentile(timings, 0.50), 2),
+            "p95_ms": round(percentile(timings, 0.95), 2),
+            "p99_ms": round(percentile(timings, 0.99), 2),
+            "mean_ms": round(sum(timings) / len(timings), 2),
+            "queries_min": min(queries),
+            "queries_max": max(queries),
+        }
+
+    def report(self, name, result):
+        self.stdout.write(
+            f"{name:18} p50 {result['p50_ms']:8.2f} ms  p95 {result['p95_ms']:8.2f} ms"
+            f"  p99 {result['p99_ms']:8.2f} ms  Abfragen {result['queries_min']}-{result['queries_max']}"
+            f"  Status {','.join(map(str, result['status']))}"
+        )
+
+    def dataset(self):
+        """Zeilenanzahl der wichtigsten Tabellen, damit Läufe vergleichbar bleiben."""
+        return {
+            model._meta.label: model.objects.count()
+            for model in (User, UserProfile, Offer, OfferDetail, Order, Review)
+        }
+
+    def compare(self, path, results):
+        """Gibt je Endpunkt die Veränderung von p95 gegenüber einem früheren Lauf aus."""
+        with open(path, encoding="utf-8") as handle:
+            previous = json.load(handle)
+        self.stdout.write(f"Vergleich mit {previous.get('commit') or path}:")
+        for name, result in results.items():
+            before = previous.get("endpoints", {}).get(name)
+            if before is None:
+                continue
+            change = (result["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0
+            self.stdout.write(
+                f"{name:18} p95 {before['p95_ms']:8.2f} -> {result['p95_ms']:8.2f} ms ({change:+.1f} %)"
+            )
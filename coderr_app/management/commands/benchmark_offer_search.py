@@ -0,0 +1,81 @@
+import random
+import string
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from coderr_app.models import Offer
+from coderr_app.search import build_match_query, offer_search_available
+
+WORDS = [
+    "logo", "design", "website", "shop", "branding", "seo", "video", "schnitt", "texte",
+    "übersetzung", "app", "android", "ios", "backend", "django", "react", "marketing",
+    "fotografie", "illustration", "podcast", "beratung", "datenbank", "hosting", "wartung",
+]
+
+
+class Command(BaseCommand):
+    """
+    Vergleicht die Angebotssuche per FTS5-Index mit `icontains`.
+
+    Die Testdaten werden in einer Transaktion angelegt und danach zurückgerollt.
+    """
+    help = "Misst die Angebotssuche mit FTS5 gegenüber icontains."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--offers", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=50)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        if not offer_search_available():
+            raise CommandError("Kein FTS5-Index vorhanden. Bitte zuerst `migrate` ausführen.")
+        rng = random.Random(options["seed"])
+        vocabulary = WORDS + [
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10))) for _ in range(5000)
+        ]
+        terms = [rng.choice(vocabulary)[:rng.randint(3, 8)] for _ in range(options["queries"])]
+
+        with transaction.atomic():
+            self.create_offers(rng, vocabulary, options["offers"])
+            results = {
+                "icontains": self.measure(terms, lambda term: Offer.objects.filter(
+                    Q(title__icontains=term) | Q(description__icontains=term))),
+                "fts5": self.measure(terms, lambda term: Offer.objects.filter(
+                    search_index__match=build_match_query(term)).order_by("search_index__rank")),
+            }
+            transaction.set_rollback(True)
+
+        for name, timings in results.items():
+            timings.sort()
+            self.stdout.write(
+                f"{name:10} median {timings[len(timings) // 2] * 1000:8.2f} ms"
+                f"  p95 {timings[int(len(timings) * 0.95)] * 1000:8.2f} ms"
+            )
+
+    def create_offers(self, rng, vocabulary, count):
+        """Legt `count` Angebote mit zufälligen Titeln und Beschreibungen an."""
+        user = User.objects.create_user(username="benchmark-search")
+        batch = []
+        for index in range(count):
+            batch.append(Offer(
+                user=user,
+                title=" ".join(rng.choices(vocabulary, k=3)),
+                description=" ".join(rng.choices(vocabulary, k=30)),
+            ))
+            if len(batch) == 5000 or index == count - 1:
+                Offer.objects.bulk_create(batch)
+                batch = []
+        self.stdout.write(f"{count} Angebote angelegt.")
+
+    def measure(self, terms, build_queryset):
+        """Misst je Suchbegriff, was die Liste braucht: Trefferanzahl und erste Seite (6 Treffer)."""
+        timings = []
+        for term in terms:
+            start = time.perf_counter()
+            queryset = build_queryset(term)
+            queryset.count()
+            list(queryset.values_list("id", flat=True)[:6])
+            timings.append(time.perf_counter() - start)
+        return timings
@@ -0,0 +1,84 @@
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+from user_auth_app.api.views import BusinessProfilesListView, CustomerProfilesListView
+from user_auth_app.models import UserProfile
+
+LOCATIONS = ["Berlin", "Hamburg", "München", "Köln", "Leipzig", "Dresden", "Bremen", "Hannover"]
+
+
+class Command(BaseCommand):
+    """
+    Misst die Profillisten bei wachsender Profilanzahl.
+
+    Je Stufe werden Profile ergänzt und die erste Seite, eine tiefe Seite sowie
+    eine gefilterte Seite über die Views abgerufen. Alle Testdaten werden
+    in einer Transaktion angelegt und danach zurückgerollt.
+    """
+    help = "Misst Antwortzeit und Abfragen der Profillisten von 1k bis 100k Profilen."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+        parser.add_argument("--repeats", type=int, default=20)
+        parser.add_argument("--depth", type=int, default=10, help="Anzahl Seiten bis zur tiefen Seite.")
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        views = {
+            "business": BusinessProfilesListView.as_view(),
+            "customer": CustomerProfilesListView.as_view(),
+        }
+        with transaction.atomic():
+            viewer = User.objects.create_user(username="benchmark-profiles-viewer")
+            created = 0
+            for size in sorted(options["sizes"]):
+                self.create_profiles(created, size)
+                created = size
+                for kind, view in views.items():
+                    self.report(size, kind, factory, view, viewer, options)
+            transaction.set_rollback(True)
+
+    def create_profiles(self, start, stop):
+        """Ergänzt Benutzer mit Profil bis zur Gesamtzahl `stop` (abwechselnd Anbieter und Kunde)."""
+        for offset in range(start, stop, 5000):
+            end = min(offset + 5000, stop)
+            users = User.objects.bulk_create(
+                User(username=f"benchmark-profile-{index}", password="!", first_name=f"Name{index}")
+                for index in range(offset, end)
+            )
+            UserProfile.objects.bulk_create(
+                UserProfile(user=user, type="business" if index % 2 else "customer",
+                            location=LOCATIONS[index % len(LOCATIONS)])
+                for index, user in zip(range(offset, end), users)
+            )
+        self.stdout.write(f"{stop} Profile angelegt.")
+
+    def report(self, size, kind, factory, view, viewer, options):
+        """Gibt Median-Zeit und Abfragen für erste, tiefe und gefilterte Seite aus."""
+        deep_url = "/"
+        for _ in range(options["depth"]):
+            deep_url = self.fetch(factory, view, viewer, deep_url)[0] or deep_url
+        cases = {"erste Seite": "/", "tiefe Seite": deep_url, "Filter": "/?location=köln&name=name1"}
+        for label, url in cases.items():
+            timings = []
+            for _ in range(options["repeats"]):
+                start = time.perf_counter()
+                _, queries = self.fetch(factory, view, viewer, url)
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+            self.stdout.write(
+                f"{size:>7} {kind:8} {label:12} median {timings[len(timings) // 2] * 1000:7.2f} ms"
+                f"  Abfragen {queries}"
+            )
+
+    def fetch(self, factory, view, viewer, url):
+        """Ruft eine Seite ab und liefert den Link zur nächsten Seite und die Anzahl der Abfragen."""
+        request = factory.get(url, HTTP_HOST="localhost")
+        force_authenticate(request, user=viewer)
+        with CaptureQueriesContext(connection) as queries:
+            response = view(request)
+            response.render()
+        return response.data.get("next"), len(queries)
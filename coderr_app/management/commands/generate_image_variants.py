@@ -0,0 +1,55 @@
+from concurrent.futures import as_completed
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from coderr_app.images import get_executor, has_variants, local_paths, render_variants
+from coderr_app.models import Offer
+from coderr_app.offer_cache import invalidate_offer_list
+from user_auth_app.models import UserProfile
+
+
+class Command(BaseCommand):
+    """Erzeugt fehlende Bildvarianten für bereits hochgeladene Angebots- und Profilbilder."""
+    help = "Erzeugt verkleinerte WebP/JPEG-Varianten für bestehende Medien."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Vorhandene Varianten neu erzeugen.")
+
+    def handle(self, *args, **options):
+        fieldfiles = [offer.image for offer in Offer.objects.exclude(image="").only("image").iterator()]
+        fieldfiles += [profile.file for profile in UserProfile.objects.exclude(file="").only("file").iterator()]
+
+        jobs = {}
+        for fieldfile in fieldfiles:
+            if not fieldfile or (has_variants(fieldfile) and not options["force"]):
+                continue
+            paths = local_paths(fieldfile)
+            if paths is not None:
+                jobs[fieldfile.name] = paths
+
+        created = failed = 0
+        for name, error in self.run(jobs):
+            if error is None:
+                created += 1
+            else:
+                failed += 1
+                self.stderr.write(f"{name}: {error}")
+
+        if created:
+            invalidate_offer_list()
+        self.stdout.write(self.style.SUCCESS(
+            f"Varianten erzeugt: {created}, übersprungen: {len(fieldfiles) - len(jobs)}, "
+            f"fehlgeschlagen: {failed}"))
+
+    def run(self, jobs):
+        """Verarbeitet alle Bilder parallel im Pool und liefert `(name, fehler)` je Bild."""
+        if not settings.IMAGE_VARIANT_WORKERS:
+            for name, paths in jobs.items():
+                try:
+                    render_variants(*paths)
+                    yield name, None
+                except Exception as exc:
+                    yield name, exc
+            return
+        futures = {get_executor().submit(render_variants, *paths): name for name, paths in jobs.items()}
+        for future in as_completed(futures):
+            yield futures[future], future.exception()
@@ -0,0 +1,200 @@
+import random
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from coderr_app.models import BusinessOrderCounter, BusinessRatingStats, Offer, OfferDetail, Order, Review
+from coderr_app.offer_cache import invalidate_offer_list
+from coderr_app.order_counters import count_orders
+from coderr_app.platform_stats import SNAPSHOT_KEY
+from coderr_app.review_stats import count_reviews
+from user_auth_app.models import UserProfile
+
+BATCH_SIZE = 2000
+PASSWORD = "benchmark-password"
+
+WORDS = [
+    "Logo", "Design", "Website", "Shop", "Branding", "SEO", "Video", "Schnitt", "Texte", "Übersetzung",
+    "App", "Android", "iOS", "Backend", "Django", "React", "Marketing", "Fotografie", "Illustration",
+    "Podcast", "Beratung", "Datenbank", "Hosting", "Wartung", "Newsletter", "Social", "Media", "Audit",
+]
+FIRST_NAMES = ["Anna", "Ben", "Clara", "David", "Emma", "Felix", "Greta", "Hannes", "Ida", "Jonas", "Lea", "Max"]
+LAST_NAMES = ["Müller", "Schmidt", "Schneider", "Fischer", "Weber", "Meyer", "Wagner", "Becker", "Schulz", "Hoffmann"]
+LOCATIONS = ["Berlin", "Hamburg", "München", "Köln", "Frankfurt", "Stuttgart", "Leipzig", "Dresden", "Bremen"]
+STATUSES = [(Order.IN_PROGRESS, 3), (Order.COMPLETED, 6), (Order.CANCELLED, 1)]
+TIERS = [
+    (OfferDetail.BASIC, Decimal("1.0"), 1, 7),
+    (OfferDetail.STANDARD, Decimal("2.0"), 3, 5),
+    (OfferDetail.PREMIUM, Decimal("3.5"), 5, 3),
+]
+
+
+class Command(BaseCommand):
+    """
+    Erzeugt deterministisch einen synthetischen Marktplatz für Lasttests und Benchmarks.
+
+    Anbieter und Kunden mit Profil, Angebote mit je drei Details, Bestellungen und
+    Bewertungen werden per `bulk_create` angelegt. Mengen ergeben sich aus
+    `--scale` mal den Grundwerten; gleicher `--seed` ergibt dieselben Daten.
+    Danach werden Bestellzähler und Bewertungsstatistik neu aufgebaut und die
+    Caches invalidiert. Alle Benutzer erhalten das Passwort `benchmark-password`.
+    """
+    help = "Erzeugt Anbieter, Kunden, Angebote, Bestellungen und Bewertungen in großer Menge."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=float, default=1.0, help="Faktor auf alle Grundmengen (Standard: 1).")
+        parser.add_argument("--businesses", type=int, default=100, help="Anbieter bei Faktor 1.")
+        parser.add_argument("--customers", type=int, default=1000, help="Kunden bei Faktor 1.")
+        parser.add_argument("--offers-per-business", type=int, default=5)
+        parser.add_argument("--orders-per-customer", type=int, default=5)
+        parser.add_argument("--reviews-per-customer", type=int, default=2)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--prefix", default="bench", help="Präfix der erzeugten Benutzernamen.")
+        parser.add_argument("--clear", action="store_true", help="Vorher erzeugte Daten mit diesem Präfix löschen.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        prefix = options["prefix"]
+        businesses = max(1, round(options["businesses"] * options["scale"]))
+        customers = max(1, round(options["customers"] * options["scale"]))
+
+        existing = User.objects.filter(username__startswith=f"{prefix}-")
+        if options["clear"]:
+            deleted = existing.delete()[1].get(User._meta.label, 0)
+            self.stdout.write(f"{deleted} Benutzer mit Präfix '{prefix}' gelöscht.")
+        elif existing.exists():
+            raise CommandError(f"Es gibt bereits Benutzer mit Präfix '{prefix}'. --clear oder --prefix verwenden.")
+
+        with transaction.atomic():
+            password = make_password(PASSWORD)
+            business_users = self.create_users(rng, prefix, "business", businesses, password)
+            customer_users = self.create_users(rng, prefix, "customer", customers, password)
+            details = self.create_offers(rng, business_users, options["offers_per_business"])
+            orders = self.create_orders(rng, customer_users, details, options["orders_per_customer"])
+            reviews = self.create_reviews(rng, customer_users, business_users, options["reviews_per_customer"])
+            self.rebuild_aggregates()
+            invalidate_offer_list()
+        cache.delete(SNAPSHOT_KEY)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{businesses} Anbieter, {customers} Kunden, {len(details) // len(TIERS)} Angebote, "
+            f"{orders} Bestellungen und {reviews} Bewertungen erzeugt."
+        ))
+
+    def bulk(self, model, objects):
+        """Legt Objekte in Stapeln an und gibt sie (mit Primärschlüssel) zurück."""
+        created = []
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) == BATCH_SIZE:
+                created += model.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            created += model.objects.bulk_create(batch)
+        return created
+
+    def create_users(self, rng, prefix, kind, count, password):
+        """Legt `count` Benutzer mit Profil vom Typ `kind` an."""
+        users = self.bulk(User, (
+            User(
+                username=f"{prefix}-{kind}-{index}",
+                email=f"{prefix}-{kind}-{index}@example.com",
+                password=password,
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+            )
+            for index in range(count)
+        ))
+        self.bulk(UserProfile, (
+            UserProfile(
+                user=user,
+                type=kind,
+                location=rng.choice(LOCATIONS),
+                tel=f"0{rng.randint(100000000, 999999999)}",
+                description=" ".join(rng.choices(WORDS, k=12)),
+                working_hours="9-17" if kind == "business" else None,
+            )
+            for user in users
+        ))
+        return users
+
+    def create_offers(self, rng, business_users, per_business):
+        """Legt je Anbieter Angebote mit Basic-, Standard- und Premium-Detail an."""
+        specs = []
+        for user in business_users:
+            for _ in range(per_business):
+                base_price = Decimal(rng.randint(20, 400))
+                specs.append((user, base_price, rng.randint(0, 3)))
+        offers = self.bulk(Offer, (
+            Offer(
+                user=user,
+                title=" ".join(rng.choices(WORDS, k=3)),
+                description=" ".join(rng.choices(WORDS, k=30)),
+                min_price=base_price,
+                min_delivery_time=TIERS[-1][3] + extra_days,
+            )
+            for user, base_price, extra_days in specs
+        ))
+        details = self.bulk(OfferDetail, (
+            OfferDetail(
+                offer=offer,
+                title=f"{offer_type.capitalize()} {offer.title}",
+                revisions=revisions,
+                delivery_time_in_days=delivery_time + extra_days,
+                price=base_price * factor,
+                features=rng.sample(WORDS, 3),
+                offer_type=offer_type,
+            )
+            for offer, (_, base_price, extra_days) in zip(offers, specs)
+            for offer_type, factor, revisions, delivery_time in TIERS
+        ))
+        for detail in details:
+            detail.business_user_id = detail.offer.user_id
+        return details
+
+    def create_orders(self, rng, customer_users, details, per_customer):
+        """Legt je Kunde Bestellungen als Momentaufnahme zufälliger Angebotsdetails an."""
+        statuses, weights = zip(*STATUSES)
+        orders = self.bulk(Order, (
+            Order(
+                customer_user=customer,
+                business_user_id=detail.business_user_id,
+                title=detail.title,
+                revisions=detail.revisions,
+                delivery_time_in_days=detail.delivery_time_in_days,
+                price=detail.price,
+                features=detail.features,
+                offer_type=detail.offer_type,
+                status=rng.choices(statuses, weights)[0],
+            )
+            for customer in customer_users
+            for detail in rng.sample(details, min(per_customer, len(details)))
+        ))
+        return len(orders)
+
+    def create_reviews(self, rng, customer_users, business_users, per_customer):
+        """Legt je Kunde Bewertungen für verschiedene Anbieter an (eine je Paar)."""
+        reviews = self.bulk(Review, (
+            Review(
+                business_user=business,
+                reviewer=customer,
+                rating=rng.choices([1, 2, 3, 4, 5], [1, 1, 2, 4, 6])[0],
+                description=" ".join(rng.choices(WORDS, k=10)),
+            )
+            for customer in customer_users
+            for business in rng.sample(business_users, min(per_customer, len(business_users)))
+        ))
+        return len(reviews)
+
+    def rebuild_aggregates(self):
+        """Baut Bestellzähler und Bewertungsstatistik aus den Tabellen neu auf (bulk_create löst keine Signale aus)."""
+        BusinessOrderCounter.objects.all().delete()
+        BusinessOrderCounter.objects.bulk_create(
+            BusinessOrderCounter(business_user_id=business_user_id, **counts)
+            for business_user_id, counts in count_orders().items()
+        )
+        BusinessRatingStats.objects.all().delete()
+        BusinessRatingStats.objects.bulk_create(count_reviews().values())
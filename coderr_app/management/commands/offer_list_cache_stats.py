@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from coderr_app import offer_cache
+
+
+class Command(BaseCommand):
+    """
+    Zeigt Treffer, Fehlschläge und Invalidierungen des Angebotslisten-Caches an.
+
+    Die Zähler aller Worker liegen im gemeinsamen Cache; jeder Prozess überträgt
+    seine Werte spätestens nach `OFFER_LIST_STATS_FLUSH_INTERVAL` Sekunden.
+    """
+    help = "Gibt die Zähler des Angebotslisten-Caches aus."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Zähler nach der Ausgabe zurücksetzen.")
+
+    def handle(self, *args, **options):
+        stats = offer_cache.get_stats()
+        lookups = stats["hits"] + stats["misses"]
+        hit_rate = stats["hits"] / lookups * 100 if lookups else 0.0
+        self.stdout.write(
+            f"hits={stats['hits']} misses={stats['misses']} invalidations={stats['invalidations']} "
+            f"generation={offer_cache.get_generation()} hit_rate={hit_rate:.1f}%"
+        )
+        if options["reset"]:
+            offer_cache.reset_stats()
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from coderr_app.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    """Löscht abgelaufene Idempotency-Keys in Stapeln, damit keine lange Schreibsperre entsteht."""
+    help = "Entfernt abgelaufene Idempotency-Keys."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Einträge pro DELETE (Standard: 1000).")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = IdempotencyKey.objects.filter(expires_at__lte=now).order_by("expires_at")
+        deleted = 0
+        while True:
+            ids = list(expired.values_list("id", flat=True)[:options["batch_size"]])
+            if not ids:
+                break
+            deleted += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f"{deleted} abgelaufene Idempotency-Keys gelöscht."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from coderr_app.search import create_offer_search_index, offer_search_available
+
+
+class Command(BaseCommand):
+    """Legt den FTS5-Volltextindex der Angebote samt Triggern neu an und befüllt ihn."""
+    help = "Baut den Volltextindex für die Angebotssuche neu auf (nur SQLite)."
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("Der Volltextindex wird nur auf SQLite unterstützt.")
+        create_offer_search_index(connection)
+        if not offer_search_available():
+            raise CommandError("Der Volltextindex konnte nicht angelegt werden.")
+        self.stdout.write(self.style.SUCCESS("Volltextindex für Angebote neu aufgebaut."))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from coderr_app.models import BusinessOrderCounter
+from coderr_app.order_counters import count_orders
+
+
+class Command(BaseCommand):
+    """
+    Gleicht die Bestellzähler je Anbieter mit der Bestelltabelle ab und meldet Abweichungen.
+
+    Nur abweichende Zeilen werden an Ort und Stelle korrigiert, damit gleichzeitige
+    Zähleränderungen auf den korrigierten Stand aufsetzen statt verloren zu gehen.
+    """
+    help = "Gleicht die materialisierten Bestellzähler mit den tatsächlichen Bestellungen ab."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Nur Abweichungen melden, nichts schreiben.")
+
+    def handle(self, *args, **options):
+        fields = list(BusinessOrderCounter.STATUS_FIELDS.values())
+        with transaction.atomic():
+            # Erst sperren, dann zählen: Bestellungen, deren Zähleränderung auf die Sperre
+            # wartet, fehlen in der Zählung und werden danach auf den korrigierten Stand gebucht.
+            stored = {
+                row["business_user_id"]: row
+                for row in BusinessOrderCounter.objects.select_for_update().values("business_user_id", *fields)
+            }
+            expected = count_orders()
+
+            drift = 0
+            for business_user_id in sorted(set(expected) | set(stored)):
+                actual = expected.get(business_user_id, dict.fromkeys(fields, 0))
+                current = stored.get(business_user_id, dict.fromkeys(fields, 0))
+                differences = {field: (current[field], actual[field]) for field in fields if current[field] != actual[field]}
+                if not differences:
+                    continue
+                drift += 1
+                details = ", ".join(f"{field}: {old} -> {new}" for field, (old, new) in differences.items())
+                self.stdout.write(f"Anbieter #{business_user_id}: {details}")
+                if options["dry_run"]:
+                    continue
+                if business_user_id in stored:
+                    BusinessOrderCounter.objects.filter(business_user_id=business_user_id).update(**actual)
+                else:
+                    BusinessOrderCounter.objects.create(business_user_id=business_user_id, **actual)
+
+        action = "gefunden" if options["dry_run"] else "korrigiert"
+        self.stdout.write(self.style.SUCCESS(f"{drift} Anbieter mit Abweichungen {action}."))
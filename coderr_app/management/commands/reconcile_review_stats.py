@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from coderr_app.models import BusinessRatingStats
+from coderr_app.offer_cache import invalidate_offer_list
+from coderr_app.review_stats import count_reviews
+
+
+class Command(BaseCommand):
+    """
+    Gleicht die Bewertungsstatistik je Anbieter mit der Bewertungstabelle ab und meldet Abweichungen.
+
+    Nur abweichende Zeilen werden an Ort und Stelle korrigiert, damit gleichzeitige
+    Änderungen auf den korrigierten Stand aufsetzen statt verloren zu gehen.
+    """
+    help = "Gleicht die materialisierte Bewertungsstatistik mit den tatsächlichen Bewertungen ab."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Nur Abweichungen melden, nichts schreiben.")
+
+    def handle(self, *args, **options):
+        fields = ["review_count", "rating_sum", *BusinessRatingStats.RATING_FIELDS.values(), "rating_average"]
+        drift = 0
+        with transaction.atomic():
+            # Erst sperren, dann zählen (siehe `reconcile_order_counters`).
+            stored = {
+                row["business_user_id"]: row
+                for row in BusinessRatingStats.objects.select_for_update().values("business_user_id", *fields)
+            }
+            expected = count_reviews()
+
+            for business_user_id in sorted(set(expected) | set(stored)):
+                actual = expected.get(business_user_id, BusinessRatingStats(business_user_id=business_user_id))
+                current = stored.get(business_user_id, {**dict.fromkeys(fields, 0), "rating_average": None})
+                differences = {
+                    field: (current[field], getattr(actual, field))
+                    for field in fields if current[field] != getattr(actual, field)
+                }
+                if not differences:
+                    continue
+                drift += 1
+                details = ", ".join(f"{field}: {old} -> {new}" for field, (old, new) in differences.items())
+                self.stdout.write(f"Anbieter #{business_user_id}: {details}")
+                if options["dry_run"]:
+                    continue
+                values = {field: getattr(actual, field) for field in fields}
+                if business_user_id in stored:
+                    BusinessRatingStats.objects.filter(business_user_id=business_user_id).update(**values)
+                else:
+                    BusinessRatingStats.objects.create(business_user_id=business_user_id, **values)
+
+            if drift and not options["dry_run"]:
+                invalidate_offer_list()
+
+        action = "gefunden" if options["dry_run"] else "korrigiert"
+        self.stdout.write(self.style.SUCCESS(f"{drift} Anbieter mit Abweichungen {action}."))
@@ -0,0 +1,177 @@
+import heapq
+import logging
+import os
+import random
+import re
+import time
+import traceback
+from collections import Counter
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("coderr.sql")
+
+IN_LIST = re.compile(r"\((?:%s, )+%s\)")
+MAX_SQL_LENGTH = 300
+
+
+def query_shape(sql):
+    """Normalisiert eine Abfrage, sodass sich Wiederholungen mit anderen Parametern gleichen."""
+    return IN_LIST.sub("(%s, ...)", sql)
+
+
+def call_site():
+    """Gibt die innerste Stelle im Projektcode (außerhalb dieses Moduls) zurück, die gerade abfragt."""
+    root = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()):
+        filename = frame.filename
+        if filename.startswith(root) and filename != __file__ and "site-packages" not in filename:
+            return f"{os.path.relpath(filename, root)}:{frame.lineno} in {frame.name}"
+    return None
+
+
+class QueryRecorder:
+    """
+    Execute-Wrapper, der Anzahl, Dauer, langsamste Abfragen und Abfrageformen zählt.
+
+    Der Aufrufstapel wird nur einmal je Form ausgewertet, sobald sie die
+    N+1-Schwelle erreicht; normale Abfragen kosten nur eine Zeitmessung.
+    """
+
+    def __init__(self, threshold, slow_count):
+        self.threshold = threshold
+        self.slow_count = slow_count
+        self.count = 0
+        self.duration = 0.0
+        self.slowest = []
+        self.shapes = Counter()
+        self.call_sites = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.duration += duration
+            entry = (duration, self.count, sql)
+            if len(self.slowest) < self.slow_count:
+                heapq.heappush(self.slowest, entry)
+            elif self.slow_count:
+                heapq.heappushpop(self.slowest, entry)
+            shape = query_shape(sql)
+            self.shapes[shape] += 1
+            if self.shapes[shape] == self.threshold:
+                self.call_sites[shape] = call_site()
+
+    def repeated(self):
+        """Abfrageformen, die mindestens `threshold`-mal ausgeführt wurden (wahrscheinliche N+1)."""
+        return [
+            {"sql": shape[:MAX_SQL_LENGTH], "count": count, "call_site": self.call_sites.get(shape)}
+            for shape, count in self.shapes.most_common() if count >= self.threshold
+        ]
+
+
+class SQLInstrumentationMiddleware:
+    """
+    Misst die SQL-Abfragen einer Anfrage und meldet sie per `Server-Timing` und Log.
+
+    - Erfasst wird ein Anteil von `SQL_INSTRUMENTATION_SAMPLE_RATE` (0.0–1.0) der Anfragen.
+    - `Server-Timing` enthält DB-Zeit mit Abfrageanzahl, die langsamste Abfrage
+      und die Anzahl wahrscheinlicher N+1-Formen.
+    - Das Log `coderr.sql` erhält je Anfrage einen strukturierten Eintrag (INFO)
+      und bei Formen ab `SQL_N_PLUS_ONE_THRESHOLD` Wiederholungen eine Warnung
+      mit der auslösenden Stelle im Code.
+    - Abfragen in gestreamten Antworten laufen erst nach der Middleware und fehlen daher.
+    - Synchron und asynchron nutzbar, damit asynchrone Views unter ASGI nicht
+      in einen eigenen Thread umgeleitet werden.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.is_sampled():
+            return self.get_response(request)
+
+        recorder = self.create_recorder()
+        with self.recording(recorder):
+            response = self.get_response(request)
+        self.report(request, response, recorder)
+        return response
+
+    async def __acall__(self, request):
+        """
+        Asynchroner Pfad ohne Thread-Wechsel für nicht gemessene Anfragen.
+
+        Verbindungen gelten je Thread und das async ORM fragt im thread-sensitiven
+        Thread der Anfrage ab; dort wird der Recorder daher an- und abgehängt.
+        """
+        if not self.is_sampled():
+            return await self.get_response(request)
+
+        recorder = self.create_recorder()
+        stack = await sync_to_async(self.recording)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        self.report(request, response, recorder)
+        return response
+
+    def is_sampled(self):
+        return random.random() < settings.SQL_INSTRUMENTATION_SAMPLE_RATE
+
+    def create_recorder(self):
+        return QueryRecorder(settings.SQL_N_PLUS_ONE_THRESHOLD, settings.SQL_SLOW_QUERY_COUNT)
+
+    def recording(self, recorder):
+        """Hängt `recorder` an alle Datenbankverbindungen, solange der Kontext offen ist."""
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        return stack
+
+    def report(self, request, response, recorder):
+        """Schreibt `Server-Timing` und die Log-Einträge für eine gemessene Anfrage."""
+        repeated = recorder.repeated()
+        slowest = sorted(recorder.slowest, reverse=True)
+        timings = [f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries"']
+        if slowest:
+            timings.append(f"db-slowest;dur={slowest[0][0] * 1000:.1f}")
+        if repeated:
+            timings.append(f'db-n-plus-one;desc="{len(repeated)} repeated shapes"')
+        if response.has_header("Server-Timing"):
+            timings.insert(0, response["Server-Timing"])
+        response["Server-Timing"] = ", ".join(timings)
+
+        details = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "query_count": recorder.count,
+            "db_time_ms": round(recorder.duration * 1000, 2),
+            "slowest": [
+                {"sql": sql[:MAX_SQL_LENGTH], "duration_ms": round(duration * 1000, 2)}
+                for duration, _, sql in slowest
+            ],
+            "n_plus_one": repeated,
+        }
+        logger.info(
+            "%s %s: %d queries in %.1f ms", request.method, request.path, recorder.count,
+            recorder.duration * 1000, extra={"sql": details},
+        )
+        for entry in repeated:
+            logger.warning(
+                "Probable N+1 on %s %s: %d x %s (at %s)", request.method, request.path,
+                entry["count"], entry["sql"], entry["call_site"] or "unknown", extra={"sql": details},
+            )
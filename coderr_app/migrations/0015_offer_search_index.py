@@ -0,0 +1,38 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+from coderr_app.search import create_offer_search_index, drop_offer_search_index
+
+
+def create_index(apps, schema_editor):
+    create_offer_search_index(schema_editor.connection)
+
+
+def drop_index(apps, schema_editor):
+    drop_offer_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coderr_app', '0014_offer_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OfferSearchIndex',
+            fields=[
+                ('offer', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='coderr_app.offer')),
+                ('title', models.TextField()),
+                ('description', models.TextField()),
+                ('match', models.TextField(db_column='coderr_app_offer_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'coderr_app_offer_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:57
+
+from collections import Counter
+from django.db import migrations, models
+
+
+def count_references(apps, schema_editor):
+    Offer = apps.get_model('coderr_app', 'Offer')
+    UserProfile = apps.get_model('user_auth_app', 'UserProfile')
+    MediaBlob = apps.get_model('coderr_app', 'MediaBlob')
+    references = Counter(Offer.objects.exclude(image='').exclude(image=None).values_list('image', flat=True))
+    references.update(UserProfile.objects.exclude(file='').exclude(file=None).values_list('file', flat=True))
+    MediaBlob.objects.bulk_create(MediaBlob(name=name, ref_count=count) for name, count in references.items())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coderr_app', '0015_offer_search_index'),
+        ('user_auth_app', '0023_userprofile_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+STATUS_FIELDS = {
+    'in_progress': 'in_progress_count',
+    'completed': 'completed_count',
+    'cancelled': 'cancelled_count',
+}
+
+
+def backfill_counters(apps, schema_editor):
+    Order = apps.get_model('coderr_app', 'Order')
+    BusinessOrderCounter = apps.get_model('coderr_app', 'BusinessOrderCounter')
+    counters = {}
+    for row in Order.objects.order_by().values('business_user_id', 'status').annotate(total=Count('id')):
+        if row['status'] in STATUS_FIELDS:
+            counter = counters.setdefault(
+                row['business_user_id'], BusinessOrderCounter(business_user_id=row['business_user_id']))
+            setattr(counter, STATUS_FIELDS[row['status']], row['total'])
+    BusinessOrderCounter.objects.bulk_create(counters.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('coderr_app', '0016_mediablob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BusinessOrderCounter',
+            fields=[
+                ('business_user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='order_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('in_progress_count', models.PositiveIntegerField(default=0)),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('cancelled_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
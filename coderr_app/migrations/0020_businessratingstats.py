@@ -0,0 +1,48 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_stats(apps, schema_editor):
+    Review = apps.get_model('coderr_app', 'Review')
+    BusinessRatingStats = apps.get_model('coderr_app', 'BusinessRatingStats')
+    stats = {}
+    for row in Review.objects.order_by().values('business_user_id', 'rating').annotate(total=Count('id')):
+        if 1 <= row['rating'] <= 5:
+            entry = stats.setdefault(
+                row['business_user_id'], BusinessRatingStats(business_user_id=row['business_user_id']))
+            setattr(entry, f"rating_{row['rating']}_count", row['total'])
+            entry.review_count += row['total']
+            entry.rating_sum += row['rating'] * row['total']
+    for entry in stats.values():
+        entry.rating_average = entry.rating_sum / entry.review_count
+    BusinessRatingStats.objects.bulk_create(stats.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('coderr_app', '0019_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BusinessRatingStats',
+            fields=[
+                ('business_user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('rating_1_count', models.PositiveIntegerField(default=0)),
+                ('rating_2_count', models.PositiveIntegerField(default=0)),
+                ('rating_3_count', models.PositiveIntegerField(default=0)),
+                ('rating_4_count', models.PositiveIntegerField(default=0)),
+                ('rating_5_count', models.PositiveIntegerField(default=0)),
+                ('rating_average', models.FloatField(blank=True, db_index=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
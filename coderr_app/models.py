@@ -1,5 +1,8 @@
 from django.db import models
+from django.db.models import Min
+from django.core.serializers.json import DjangoJSONEncoder
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -12,10 +15,36 @@ class Offer(models.Model):
     description = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    min_price = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True, db_index=True, editable=False
+    )
+    min_delivery_time = models.IntegerField(null=True, blank=True, db_index=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='offer_updated_at_id_idx'),
+            models.Index(fields=['min_price', 'id'], name='offer_min_price_id_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def update_min_values(self):
+        """
+        Berechnet Mindestpreis und minimale Lieferzeit aus den Angebotsdetails neu
+        und schreibt sie ohne vollständiges `save()` in die Angebotszeile.
+        """
+        values = self.details.aggregate(
+            min_price=Min("price"), min_delivery_time=Min("delivery_time_in_days"))
+        self.min_price = values["min_price"]
+        self.min_delivery_time = values["min_delivery_time"]
+        self.updated_at = timezone.now()
+        Offer.objects.filter(pk=self.pk).update(
+            min_price=self.min_price,
+            min_delivery_time=self.min_delivery_time,
+            updated_at=self.updated_at,
+        )
+
 
 class OfferDetail(models.Model):
     BASIC = 'basic'
@@ -39,6 +68,23 @@ class OfferDetail(models.Model):
     def __str__(self):
         return f"{self.offer.title} - {self.offer_type}"
 
+    def save(self, *args, **kwargs):
+        """
+        Speichert das Detail und hält die Mindestwerte des Angebots aktuell.
+
+        Gilt für einzelne Änderungen (z. B. über `/api/offerdetails/`); beim Anlegen
+        ganzer Angebote berechnen die Serializer die Werte einmal und nutzen `bulk_create`.
+        """
+        super().save(*args, **kwargs)
+        self.offer.update_min_values()
+
+    def delete(self, *args, **kwargs):
+        """Löscht das Detail und hält die Mindestwerte des Angebots aktuell."""
+        offer = self.offer
+        result = super().delete(*args, **kwargs)
+        offer.update_min_values()
+        return result
+
 
 class Order(models.Model):
     IN_PROGRESS = 'in_progress'
@@ -51,6 +97,13 @@ class Order(models.Model):
         (CANCELLED, 'Cancelled'),
     ]
 
+    # Erlaubte Statuswechsel; abgeschlossene und stornierte Bestellungen sind endgültig.
+    ALLOWED_TRANSITIONS = {
+        IN_PROGRESS: {COMPLETED, CANCELLED},
+        COMPLETED: set(),
+        CANCELLED: set(),
+    }
+
     customer_user = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name='customer_orders'
     )
@@ -69,6 +122,14 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['business_user', 'status', 'created_at'], name='order_business_status_idx'),
+            models.Index(fields=['customer_user', 'status', 'created_at'], name='order_customer_status_idx'),
+            models.Index(fields=['business_user', 'created_at'], name='order_business_created_idx'),
+            models.Index(fields=['customer_user', 'created_at'], name='order_customer_created_idx'),
+        ]
+
     def __str__(self):
         return f"Order #{self.id} - {self.title}"
     
@@ -83,6 +144,123 @@ class Review(models.Model):
 
     class Meta:
         unique_together = ('business_user', 'reviewer')
+        indexes = [
+            models.Index(fields=['business_user', 'updated_at'], name='review_business_updated_idx'),
+            models.Index(fields=['business_user', 'rating'], name='review_business_rating_idx'),
+            models.Index(fields=['reviewer', 'updated_at'], name='review_reviewer_updated_idx'),
+        ]
+
+    def __str__(self):
+        return f"Review by {self.reviewer.username} for {self.business_user.username} - {self.rating}"
+
+class OfferSearchIndex(models.Model):
+    """
+    Volltextindex (SQLite FTS5) über Titel und Beschreibung der Angebote.
+
+    Die virtuelle Tabelle wird per Migration angelegt und über Trigger
+    auf `coderr_app_offer` aktuell gehalten; `match` ist die FTS5-Spalte
+    mit dem Tabellennamen, `rank` die bm25-Relevanz eines Treffers.
+    """
+    offer = models.OneToOneField(
+        Offer, on_delete=models.DO_NOTHING, primary_key=True, db_column='rowid', related_name='search_index'
+    )
+    title = models.TextField()
+    description = models.TextField()
+    match = models.TextField(db_column='coderr_app_offer_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'coderr_app_offer_fts'
+
+
+class MediaBlob(models.Model):
+    """
+    Referenzzähler für inhaltsadressierte Mediendateien.
+
+    Jede eindeutige Datei wird nur einmal gespeichert; `ref_count` zählt die
+    Angebote und Profile, die darauf verweisen. Fällt er auf 0, wird die Datei gelöscht.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    ref_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count})"
+
+
+class BusinessOrderCounter(models.Model):
+    """
+    Materialisierte Anzahl der Bestellungen je Status für einen Geschäftsanbieter.
+
+    Wird in derselben Transaktion wie das Anlegen, Statusändern und Löschen
+    von Bestellungen gepflegt; `reconcile_order_counters` baut sie neu auf.
+    """
+    business_user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name='order_counter'
+    )
+    in_progress_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    cancelled_count = models.PositiveIntegerField(default=0)
+
+    STATUS_FIELDS = {
+        Order.IN_PROGRESS: 'in_progress_count',
+        Order.COMPLETED: 'completed_count',
+        Order.CANCELLED: 'cancelled_count',
+    }
+
+    def __str__(self):
+        return f"Order counter for user #{self.business_user_id}"
+
+
+class BusinessRatingStats(models.Model):
+    """
+    Materialisierte Bewertungsstatistik je Geschäftsanbieter.
+
+    Anzahl, Summe und Histogramm (1–5 Sterne) werden in derselben Transaktion
+    wie das Anlegen, Ändern und Löschen von Bewertungen fortgeschrieben;
+    `rating_average` ist indiziert und dient zum Filtern und Sortieren von Angeboten.
+    """
+    business_user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name='rating_stats'
+    )
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+    rating_average = models.FloatField(null=True, blank=True, db_index=True)
+
+    RATING_FIELDS = {rating: f'rating_{rating}_count' for rating in range(1, 6)}
+
+    def histogram(self):
+        """Anzahl der Bewertungen je Sternezahl."""
+        return {str(rating): getattr(self, field) for rating, field in self.RATING_FIELDS.items()}
+
+    def __str__(self):
+        return f"Rating stats for user #{self.business_user_id}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Gespeicherte Antwort auf ein POST mit `Idempotency-Key`-Header.
+
+    Wiederholt ein Client die Anfrage mit demselben Schlüssel, wird die Antwort
+    aus `response_body` erneut ausgeliefert, ohne erneut zu schreiben.
+    Abgelaufene Einträge entfernt `purge_idempotency_keys`.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField()
+    response_body = models.JSONField(encoder=DjangoJSONEncoder)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_unique'),
+        ]
 
     def __str__(self):
-        return f"Review by {self.reviewer.username} for {self.business_user.username} - {self.rating}"
\ No newline at end of file
+        return f"{self.key} (user #{self.user_id})"
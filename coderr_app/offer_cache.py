@@ -0,0 +1,120 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+
+GENERATION_KEY = "offers:generation"
+STATS_KEY = "offers:list-cache:{}"
+STATS = ("hits", "misses", "invalidations")
+
+_pending = Counter()
+_pending_since = [time.monotonic()]
+_pending_lock = threading.Lock()
+
+CACHED_QUERY_PARAMS = (
+    "creator_id", "min_price", "max_delivery_time", "min_rating", "search", "ordering",
+    "page", "page_size", "pagination", "cursor", "with_total",
+)
+
+
+def get_generation():
+    """Gibt die aktuelle Generation des Angebotskatalogs zurück."""
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, 1, None)
+        generation = cache.get(GENERATION_KEY, 1)
+    return generation
+
+
+def bump_generation():
+    """Erhöht die Generation; alle bisher zwischengespeicherten Listen werden damit ungültig."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, 2, None)
+    record("invalidations")
+
+
+def invalidate_offer_list():
+    """
+    Invalidiert den Listen-Cache nach einer Änderung am Katalog.
+
+    Innerhalb einer Transaktion wird nach dem Commit ein weiteres Mal erhöht,
+    damit kein paralleler Leser den alten Stand unter der neuen Generation ablegt.
+    """
+    bump_generation()
+    if connection.in_atomic_block:
+        transaction.on_commit(bump_generation)
+
+
+def cache_key(prefix, request):
+    """
+    Baut aus Schema und Host, den relevanten, sortierten Query-Parametern und der
+    Generation einen Cache-Key; die gerenderten Listen enthalten absolute URLs.
+    """
+    items = sorted(
+        (name, value)
+        for name in CACHED_QUERY_PARAMS
+        for value in request.query_params.getlist(name)
+        if value != ""
+    )
+    items.insert(0, ("origin", request.build_absolute_uri("/")))
+    digest = hashlib.sha1(urlencode(items).encode()).hexdigest()
+    return f"offers:{prefix}:{get_generation()}:{digest}"
+
+
+def get_list(key):
+    """Liest eine zwischengespeicherte, gerenderte Angebotsliste."""
+    content = cache.get(key)
+    record("hits" if content is not None else "misses")
+    return content
+
+
+def set_list(key, content):
+    """Legt eine gerenderte Angebotsliste im Cache ab."""
+    cache.set(key, content, settings.OFFER_LIST_CACHE_TIMEOUT)
+
+
+def record(stat):
+    """
+    Zählt Treffer, Fehlschläge und Invalidierungen des Listen-Caches.
+
+    Gezählt wird zunächst im Prozess; spätestens alle `OFFER_LIST_STATS_FLUSH_INTERVAL`
+    Sekunden werden die Zähler in den gemeinsamen Cache übertragen, damit nicht jeder
+    Treffer einen Schreibzugriff kostet.
+    """
+    with _pending_lock:
+        _pending[stat] += 1
+        due = time.monotonic() - _pending_since[0] >= settings.OFFER_LIST_STATS_FLUSH_INTERVAL
+    if due:
+        flush_stats()
+
+
+def flush_stats():
+    """Überträgt die im Prozess gezählten Werte in den gemeinsamen Cache."""
+    with _pending_lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _pending_since[0] = time.monotonic()
+    for stat, delta in pending.items():
+        key = STATS_KEY.format(stat)
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            if not cache.add(key, delta, None):
+                cache.incr(key, delta)
+
+
+def get_stats():
+    """Gibt die Zählerstände des Listen-Caches aller Prozesse zurück (bis zur letzten Übertragung)."""
+    return {stat: cache.get(STATS_KEY.format(stat), 0) for stat in STATS}
+
+
+def reset_stats():
+    """Setzt die Zählerstände des Listen-Caches zurück."""
+    cache.delete_many([STATS_KEY.format(stat) for stat in STATS])
@@ -0,0 +1,59 @@
+from collections import defaultdict
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from .models import BusinessOrderCounter, Order
+
+
+def change_counts(business_user_id, changes):
+    """
+    Ändert die Zähler eines Anbieters um `changes` (`{status: delta}`) in einem UPDATE.
+
+    Fehlt die Zählerzeile, wird sie angelegt – außer bei reinen Abzügen, z. B. wenn
+    der Anbieter samt Zählerzeile gerade gelöscht wird. Muss innerhalb der
+    Transaktion aufgerufen werden, in der die Bestellung geschrieben wird.
+    """
+    updates = {
+        BusinessOrderCounter.STATUS_FIELDS[status]: F(BusinessOrderCounter.STATUS_FIELDS[status]) + delta
+        for status, delta in changes.items() if delta
+    }
+    if not updates:
+        return
+    if BusinessOrderCounter.objects.filter(business_user_id=business_user_id).update(**updates):
+        return
+    initial = {
+        BusinessOrderCounter.STATUS_FIELDS[status]: max(delta, 0) for status, delta in changes.items()
+    }
+    if not any(initial.values()):
+        return
+    try:
+        with transaction.atomic():
+            BusinessOrderCounter.objects.create(business_user_id=business_user_id, **initial)
+    except IntegrityError:
+        BusinessOrderCounter.objects.filter(business_user_id=business_user_id).update(**updates)
+
+
+def order_created(order):
+    """Zählt eine neue Bestellung."""
+    change_counts(order.business_user_id, {order.status: 1})
+
+
+def order_status_changed(order, previous_status):
+    """Verschiebt eine Bestellung vom alten in den neuen Status."""
+    if previous_status != order.status:
+        change_counts(order.business_user_id, {previous_status: -1, order.status: 1})
+
+
+def order_deleted(order):
+    """Nimmt eine gelöschte Bestellung aus den Zählern (per `post_delete`, auch bei kaskadierendem Löschen)."""
+    change_counts(order.business_user_id, {order.status: -1})
+
+
+def count_orders():
+    """Zählt alle Bestellungen je Anbieter und Status direkt aus der Bestelltabelle."""
+    counts = defaultdict(lambda: dict.fromkeys(BusinessOrderCounter.STATUS_FIELDS.values(), 0))
+    rows = Order.objects.order_by().values("business_user_id", "status").annotate(total=Count("id"))
+    for row in rows:
+        field = BusinessOrderCounter.STATUS_FIELDS.get(row["status"])
+        if field:
+            counts[row["business_user_id"]][field] = row["total"]
+    return counts
@@ -0,0 +1,32 @@
+from django.db import transaction
+from django.utils import timezone
+from . import order_counters
+from .models import Order
+
+
+class StatusConflict(Exception):
+    """Der Statuswechsel ist nicht erlaubt oder die Bestellung wurde zwischenzeitlich geändert."""
+
+
+def transition_status(order, new_status):
+    """
+    Wechselt den Status einer Bestellung per Compare-and-Swap.
+
+    Das UPDATE greift nur, wenn die Bestellung noch den gelesenen Status hat,
+    und schreibt ausschließlich `status` und `updated_at`. Die Bestellzähler
+    werden in derselben Transaktion angepasst.
+    """
+    previous_status = order.status
+    if new_status not in Order.ALLOWED_TRANSITIONS.get(previous_status, ()):
+        raise StatusConflict(f"Status cannot change from '{previous_status}' to '{new_status}'.")
+
+    now = timezone.now()
+    with transaction.atomic():
+        updated = Order.objects.filter(pk=order.pk, status=previous_status).update(
+            status=new_status, updated_at=now)
+        if not updated:
+            raise StatusConflict("Order status was changed concurrently.")
+        order.status = new_status
+        order.updated_at = now
+        order_counters.order_status_changed(order, previous_status)
+    return order
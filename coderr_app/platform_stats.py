@@ -0,0 +1,58 @@
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+from user_auth_app.models import UserProfile
+from .models import BusinessRatingStats, Offer
+
+
+SNAPSHOT_KEY = "platform:stats"
+LOCK_KEY = "platform:stats:lock"
+LOCK_TIMEOUT = 30
+
+
+def compute_stats():
+    """Ermittelt die Plattform-Kennzahlen direkt aus der Datenbank."""
+    totals = BusinessRatingStats.objects.aggregate(
+        review_count=Sum('review_count'), rating_sum=Sum('rating_sum'))
+    review_count = totals['review_count'] or 0
+    return {
+        "review_count": review_count,
+        "average_rating": round(totals['rating_sum'] / review_count, 1) if review_count else 0,
+        "business_profile_count": UserProfile.objects.filter(type='business').count(),
+        "offer_count": Offer.objects.count(),
+        "generated_at": timezone.now(),
+    }
+
+
+def refresh_snapshot():
+    """Berechnet die Kennzahlen neu und legt sie mit Ablaufzeitpunkt im Cache ab."""
+    stats = compute_stats()
+    expires_at = stats["generated_at"].timestamp() + settings.BASE_INFO_STATS_TTL
+    cache.set(SNAPSHOT_KEY, (stats, expires_at), None)
+    return stats
+
+
+def get_snapshot():
+    """
+    Liefert die zwischengespeicherten Plattform-Kennzahlen.
+
+    Ist der Stand abgelaufen, berechnet ihn nur der Worker neu, der die Sperre im
+    gemeinsamen Cache erhält (Single-Flight über alle Prozesse); alle anderen
+    liefern bis dahin den alten Stand aus. Nur ohne jeden Stand (Kaltstart) wird
+    ohne Sperre gerechnet. Die Sperre wird nur von ihrem Inhaber wieder freigegeben.
+    """
+    entry = cache.get(SNAPSHOT_KEY)
+    if entry is not None and entry[1] > timezone.now().timestamp():
+        return entry[0]
+    token = uuid.uuid4().hex
+    if not cache.add(LOCK_KEY, token, LOCK_TIMEOUT):
+        if entry is not None:
+            return entry[0]
+        return refresh_snapshot()
+    try:
+        return refresh_snapshot()
+    finally:
+        if cache.get(LOCK_KEY) == token:
+            cache.delete(LOCK_KEY)
@@ -0,0 +1,95 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, FloatField
+from django.db.models.functions import Cast, NullIf
+from .models import BusinessRatingStats, Review
+from .offer_cache import invalidate_offer_list
+
+
+def change_stats(business_user_id, changes):
+    """
+    Ändert die Statistik eines Anbieters um `changes` (`{rating: delta}`) in einem UPDATE.
+
+    Anzahl, Summe, Histogramm und Durchschnitt werden gemeinsam fortgeschrieben.
+    Fehlt die Zeile, wird sie angelegt – außer bei reinen Abzügen, z. B. wenn der
+    Anbieter samt Statistik gerade gelöscht wird. Muss innerhalb der Transaktion
+    aufgerufen werden, in der die Bewertung geschrieben wird.
+    """
+    changes = {rating: delta for rating, delta in changes.items() if delta}
+    if not changes:
+        return
+    count_delta = sum(changes.values())
+    sum_delta = sum(rating * delta for rating, delta in changes.items())
+    updates = {
+        BusinessRatingStats.RATING_FIELDS[rating]: F(BusinessRatingStats.RATING_FIELDS[rating]) + delta
+        for rating, delta in changes.items()
+    }
+    updates.update(
+        review_count=F('review_count') + count_delta,
+        rating_sum=F('rating_sum') + sum_delta,
+        rating_average=Cast(F('rating_sum') + sum_delta, FloatField()) / NullIf(F('review_count') + count_delta, 0),
+    )
+    if not BusinessRatingStats.objects.filter(business_user_id=business_user_id).update(**updates):
+        initial = {
+            BusinessRatingStats.RATING_FIELDS[rating]: max(delta, 0) for rating, delta in changes.items()
+        }
+        review_count = sum(initial.values())
+        rating_sum = sum(rating * max(delta, 0) for rating, delta in changes.items())
+        if not review_count:
+            invalidate_offer_list()
+            return
+        try:
+            with transaction.atomic():
+                BusinessRatingStats.objects.create(
+                    business_user_id=business_user_id, review_count=review_count, rating_sum=rating_sum,
+                    rating_average=rating_sum / review_count if review_count else None, **initial)
+        except IntegrityError:
+            BusinessRatingStats.objects.filter(business_user_id=business_user_id).update(**updates)
+    invalidate_offer_list()
+
+
+def review_created(review):
+    """Zählt eine neue Bewertung."""
+    change_stats(review.business_user_id, {review.rating: 1})
+
+
+def review_rating_changed(review, previous_rating):
+    """Verschiebt eine Bewertung von der alten in die neue Sternezahl."""
+    if previous_rating != review.rating:
+        change_stats(review.business_user_id, {previous_rating: -1, review.rating: 1})
+
+
+def review_deleted(review):
+    """Nimmt eine gelöschte Bewertung aus der Statistik (per `post_delete`, auch bei kaskadierendem Löschen)."""
+    change_stats(review.business_user_id, {review.rating: -1})
+
+
+def rating_summary(user, histogram=False):
+    """Bewertungsanzahl und Durchschnitt eines Anbieters (optional mit Histogramm) für die API."""
+    try:
+        stats = user.rating_stats
+    except BusinessRatingStats.DoesNotExist:
+        stats = BusinessRatingStats(business_user=user)
+    summary = {
+        "review_count": stats.review_count,
+        "rating_average": round(stats.rating_average, 1) if stats.rating_average is not None else None,
+    }
+    if histogram:
+        summary["histogram"] = stats.histogram()
+    return summary
+
+
+def count_reviews():
+    """Berechnet die Bewertungsstatistik aller Anbieter direkt aus der Bewertungstabelle."""
+    stats = {}
+    rows = Review.objects.order_by().values("business_user_id", "rating").annotate(total=Count("id"))
+    for row in rows:
+        field = BusinessRatingStats.RATING_FIELDS.get(row["rating"])
+        if field is None:
+            continue
+        entry = stats.setdefault(row["business_user_id"], BusinessRatingStats(business_user_id=row["business_user_id"]))
+        setattr(entry, field, row["total"])
+        entry.review_count += row["total"]
+        entry.rating_sum += row["rating"] * row["total"]
+    for entry in stats.values():
+        entry.rating_average = entry.rating_sum / entry.review_count
+    return stats
@@ -0,0 +1,78 @@
+import re
+from django.db import connection
+
+
+OFFER_SEARCH_TABLE = 'coderr_app_offer_fts'
+
+OFFER_SEARCH_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {OFFER_SEARCH_TABLE} USING fts5(
+        title, description, content='coderr_app_offer', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3 4'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {OFFER_SEARCH_TABLE}_ai AFTER INSERT ON coderr_app_offer BEGIN
+        INSERT INTO {OFFER_SEARCH_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {OFFER_SEARCH_TABLE}_ad AFTER DELETE ON coderr_app_offer BEGIN
+        INSERT INTO {OFFER_SEARCH_TABLE}({OFFER_SEARCH_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {OFFER_SEARCH_TABLE}_au AFTER UPDATE OF title, description
+    ON coderr_app_offer BEGIN
+        INSERT INTO {OFFER_SEARCH_TABLE}({OFFER_SEARCH_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {OFFER_SEARCH_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+DROP_OFFER_SEARCH_SQL = [
+    f"DROP TRIGGER IF EXISTS {OFFER_SEARCH_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {OFFER_SEARCH_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {OFFER_SEARCH_TABLE}_au",
+    f"DROP TABLE IF EXISTS {OFFER_SEARCH_TABLE}",
+]
+
+_available = {}
+
+
+def create_offer_search_index(db_connection):
+    """Legt Tabelle und Trigger des Volltextindex an (idempotent) und befüllt ihn neu."""
+    if db_connection.vendor != 'sqlite':
+        return
+    with db_connection.cursor() as cursor:
+        for statement in OFFER_SEARCH_SQL:
+            cursor.execute(statement)
+        cursor.execute(f"INSERT INTO {OFFER_SEARCH_TABLE}({OFFER_SEARCH_TABLE}) VALUES ('rebuild')")
+    _available.pop(db_connection.alias, None)
+
+
+def drop_offer_search_index(db_connection):
+    """Entfernt Tabelle und Trigger des Volltextindex."""
+    if db_connection.vendor != 'sqlite':
+        return
+    with db_connection.cursor() as cursor:
+        for statement in DROP_OFFER_SEARCH_SQL:
+            cursor.execute(statement)
+    _available.pop(db_connection.alias, None)
+
+
+def offer_search_available(db_connection=connection):
+    """Prüft (einmal pro Prozess und Datenbank), ob der FTS5-Index genutzt werden kann."""
+    if db_connection.alias not in _available:
+        _available[db_connection.alias] = (
+            db_connection.vendor == 'sqlite'
+            and OFFER_SEARCH_TABLE in db_connection.introspection.table_names()
+        )
+    return _available[db_connection.alias]
+
+
+def build_match_query(value):
+    """
+    Wandelt eine Sucheingabe in einen sicheren FTS5-Ausdruck um.
+
+    Jedes Wort wird als Phrase mit Präfixsuche gequotet, damit Sonderzeichen
+    der FTS5-Syntax keine Fehler auslösen und Teilwörter beim Tippen treffen.
+    """
+    terms = re.findall(r"\w+", value)
+    return " ".join(f'"{term}"*' for term in terms)
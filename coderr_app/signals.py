@@ -0,0 +1,115 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+from user_auth_app.models import UserProfile
+from .images import schedule_variants
+from . import order_counters, review_stats
+from .models import Offer, OfferDetail, Order, Review
+from .offer_cache import invalidate_offer_list
+from .storage import acquire_blob, release_blob
+
+NAME_FIELDS = {
+    User: ("username", "first_name", "last_name"),
+    UserProfile: ("first_name", "last_name"),
+}
+
+MEDIA_FIELDS = {
+    Offer: "image",
+    UserProfile: "file",
+}
+
+
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+@receiver(post_save, sender=OfferDetail)
+@receiver(post_delete, sender=OfferDetail)
+def invalidate_offer_list_on_catalog_change(sender, **kwargs):
+    """Invalidiert die Angebotsliste bei jeder Änderung an Angeboten oder Details."""
+    invalidate_offer_list()
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=UserProfile)
+def remember_previous_names(sender, instance, update_fields=None, **kwargs):
+    """Merkt sich die bisher gespeicherten Namen, um echte Namensänderungen zu erkennen."""
+    instance._previous_names = None
+    if update_fields is not None and not set(update_fields) & set(NAME_FIELDS[sender]):
+        instance._previous_names = tuple(getattr(instance, field) for field in NAME_FIELDS[sender])
+    elif instance.pk:
+        instance._previous_names = sender.objects.filter(
+            pk=instance.pk).values_list(*NAME_FIELDS[sender]).first()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=UserProfile)
+def invalidate_offer_list_on_name_change(sender, instance, created, **kwargs):
+    """Invalidiert die Angebotsliste, wenn sich der Name eines Angebotsbesitzers ändert."""
+    if created:
+        return
+    current_names = tuple(getattr(instance, field) for field in NAME_FIELDS[sender])
+    if getattr(instance, "_previous_names", None) == current_names:
+        return
+    user_id = instance.pk if sender is User else instance.user_id
+    if Offer.objects.filter(user_id=user_id).exists():
+        invalidate_offer_list()
+
+
+@receiver(post_delete, sender=Order)
+def count_deleted_order(sender, instance, **kwargs):
+    """Nimmt jede gelöschte Bestellung aus den Zählern, auch beim Löschen eines Benutzers."""
+    order_counters.order_deleted(instance)
+
+
+@receiver(post_delete, sender=Review)
+def count_deleted_review(sender, instance, **kwargs):
+    """Nimmt jede gelöschte Bewertung aus der Statistik, auch beim Löschen eines Benutzers."""
+    review_stats.review_deleted(instance)
+
+
+@receiver(post_save, sender=Offer)
+def create_offer_image_variants(sender, instance, **kwargs):
+    """Erzeugt nach dem Hochladen eines Angebotsbildes die Varianten; danach ändert sich die Liste."""
+    schedule_variants(instance.image, on_done=invalidate_offer_list)
+
+
+@receiver(post_save, sender=UserProfile)
+def create_profile_image_variants(sender, instance, **kwargs):
+    """Erzeugt nach dem Hochladen eines Profilbildes die verkleinerten Varianten."""
+    schedule_variants(instance.file)
+
+
+def stored_media_name(instance):
+    """Name der Mediendatei, ohne ein ggf. zurückgestelltes Feld nachzuladen."""
+    value = instance.__dict__.get(MEDIA_FIELDS[type(instance)])
+    return getattr(value, "name", value) or ""
+
+
+@receiver(post_init, sender=Offer)
+@receiver(post_init, sender=UserProfile)
+def remember_media_name(sender, instance, **kwargs):
+    """Merkt sich die gespeicherte Mediendatei, um Austausch und Löschung zu erkennen."""
+    instance._stored_media_name = stored_media_name(instance) if instance.pk else ""
+
+
+@receiver(post_save, sender=Offer)
+@receiver(post_save, sender=UserProfile)
+def update_media_references(sender, instance, **kwargs):
+    """Passt die Referenzzähler an, wenn eine Mediendatei hinzukommt oder ersetzt wird."""
+    previous_name = getattr(instance, "_stored_media_name", "")
+    current_name = stored_media_name(instance)
+    if current_name == previous_name:
+        return
+    if current_name:
+        acquire_blob(current_name)
+    if previous_name:
+        release_blob(previous_name)
+    instance._stored_media_name = current_name
+
+
+@receiver(post_delete, sender=Offer)
+@receiver(post_delete, sender=UserProfile)
+def release_media_reference(sender, instance, **kwargs):
+    """Gibt die Mediendatei eines gelöschten Angebots oder Profils frei."""
+    name = getattr(instance, "_stored_media_name", "") or stored_media_name(instance)
+    if name:
+        release_blob(name)
@@ -0,0 +1,156 @@
+import glob
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import uuid
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from .images import variant_names
+from .models import MediaBlob
+
+# Höchstalter (Sekunden) einer Lease; ältere stammen von abgebrochenen Uploads.
+LEASE_TIMEOUT = 60 * 60
+
+_pending_leases = threading.local()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Dateisystem-Storage, der Uploads unter ihrem SHA-256-Hash ablegt.
+
+    - Der Hash wird beim Streamen in eine temporäre Datei berechnet.
+    - Identische Inhalte landen unter demselben Namen (`blobs/ab/<hash>.png`)
+      und werden nur einmal gespeichert; die URLs sind damit unveränderlich.
+    - Vor der Prüfung, ob die Datei schon existiert, wird eine Lease-Datei angelegt.
+      Sie schützt die Datei vor dem Löschen, bis die Referenz committet ist
+      (siehe `acquire_blob` und `delete_media_file`).
+    """
+    blob_directory = "blobs"
+
+    def get_available_name(self, name, max_length=None):
+        """Der endgültige Name ergibt sich erst aus dem Inhalt (siehe `_save`)."""
+        return name
+
+    def _save(self, name, content):
+        """Speichert den Inhalt unter seinem Hash, sofern er noch nicht vorhanden ist."""
+        temporary_directory = self.path("tmp")
+        os.makedirs(temporary_directory, exist_ok=True)
+        hasher = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=temporary_directory, delete=False) as temporary_file:
+            for chunk in content.chunks():
+                hasher.update(chunk)
+                temporary_file.write(chunk)
+
+        digest = hasher.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        blob_name = f"{self.blob_directory}/{digest[:2]}/{digest}{extension}"
+        blob_path = self.path(blob_name)
+        remember_lease(blob_name, take_lease(blob_path))
+        if os.path.exists(blob_path):
+            os.remove(temporary_file.name)
+        else:
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            os.replace(temporary_file.name, blob_path)
+            if self.file_permissions_mode is not None:
+                os.chmod(blob_path, self.file_permissions_mode)
+        return blob_name
+
+
+def take_lease(blob_path):
+    """Legt eine Lease-Datei neben der Mediendatei an und gibt ihren Pfad zurück."""
+    lease_path = f"{blob_path}.lease-{uuid.uuid4().hex}"
+    os.makedirs(os.path.dirname(lease_path), exist_ok=True)
+    open(lease_path, "x").close()
+    return lease_path
+
+
+def remember_lease(name, lease_path):
+    """Merkt sich die Lease eines Uploads im Thread, bis `acquire_blob` die Referenz zählt."""
+    if not hasattr(_pending_leases, "paths"):
+        _pending_leases.paths = {}
+    _pending_leases.paths.setdefault(name, []).append(lease_path)
+
+
+def release_lease(name):
+    """Gibt nach dem Commit der Referenz die älteste offene Lease dieses Threads für `name` frei."""
+    paths = getattr(_pending_leases, "paths", {}).get(name)
+    if not paths:
+        return
+    lease_path = paths.pop(0)
+    if not paths:
+        del _pending_leases.paths[name]
+    transaction.on_commit(lambda: remove_file(lease_path))
+
+
+def has_active_lease(blob_path):
+    """Prüft, ob ein laufender Upload die Datei verwendet; abgelaufene Leases werden entfernt."""
+    active = False
+    expired_before = time.time() - LEASE_TIMEOUT
+    for lease_path in glob.glob(f"{glob.escape(blob_path)}.lease-*"):
+        try:
+            if os.path.getmtime(lease_path) < expired_before:
+                os.remove(lease_path)
+            else:
+                active = True
+        except FileNotFoundError:
+            continue
+    return active
+
+
+def remove_file(path):
+    """Löscht eine Datei, falls sie (noch) existiert."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def acquire_blob(name):
+    """Erhöht den Referenzzähler einer Mediendatei (legt ihn bei Bedarf an) und gibt die Lease frei."""
+    if not MediaBlob.objects.filter(name=name).update(ref_count=F("ref_count") + 1):
+        try:
+            with transaction.atomic():
+                MediaBlob.objects.create(name=name, ref_count=1)
+        except IntegrityError:
+            MediaBlob.objects.filter(name=name).update(ref_count=F("ref_count") + 1)
+    release_lease(name)
+
+
+def release_blob(name):
+    """
+    Verringert den Referenzzähler einer Mediendatei.
+
+    Wird sie nicht mehr verwendet, werden Datei und Bildvarianten nach dem Commit gelöscht.
+    Dateien ohne Zähler (z. B. von außen angelegt) bleiben unangetastet.
+    """
+    MediaBlob.objects.filter(name=name, ref_count__gt=0).update(ref_count=F("ref_count") - 1)
+    deleted, _ = MediaBlob.objects.filter(name=name, ref_count=0).delete()
+    if deleted:
+        transaction.on_commit(lambda: delete_media_file(name))
+
+
+def delete_media_file(name):
+    """
+    Löscht eine Mediendatei samt ihrer Bildvarianten, sofern sie nicht wieder referenziert wurde.
+
+    Die Datei wird zuerst atomar beiseite umbenannt und erst dann auf Leases geprüft:
+    Ein paralleler Upload desselben Inhalts hat seine Lease entweder vorher angelegt
+    (die Datei wird zurückbenannt) oder findet die Datei nicht mehr und schreibt sie neu.
+    """
+    if MediaBlob.objects.filter(name=name).exists():
+        return
+    blob_path = default_storage.path(name)
+    tombstone_path = f"{blob_path}.deleted-{uuid.uuid4().hex}"
+    try:
+        os.replace(blob_path, tombstone_path)
+    except FileNotFoundError:
+        return
+    if has_active_lease(blob_path):
+        os.replace(tombstone_path, blob_path)
+        return
+    for variant in variant_names(name):
+        default_storage.delete(variant[3])
+    os.remove(tombstone_path)
@@ -1,8 +1,49 @@
 from django.test import TestCase
+from decimal import Decimal
+import csv
+import json
+import io
+import os
+import glob
+import asyncio
+import warnings
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+from PIL import Image
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.utils import timezone
+from django.core.cache import cache
+from django.core.cache.backends.db import DatabaseCache
+from datetime import timedelta
 from django.contrib.auth.models import User
-from .models import Offer, OfferDetail, Order, Review
+from .models import Offer, OfferDetail, Order, Review, MediaBlob, BusinessOrderCounter, IdempotencyKey, BusinessRatingStats
+from .api.pagination import OrderCursorPagination
+from .api.serializers.offer_serializers import update_offer
+from .images import local_paths, submit_variants, variant_name
+from . import offer_cache
+from .order_status import StatusConflict, transition_status
+from .platform_stats import LOCK_KEY, SNAPSHOT_KEY
+from .middleware import SQLInstrumentationMiddleware, query_shape
+from django.http import HttpResponse
+from django.core.handlers.asgi import ASGIHandler
+from asgiref.sync import iscoroutinefunction
+from django.test import RequestFactory
+from user_auth_app.models import UserProfile
+from rest_framework.authtoken.models import Token
 from django.test import TestCase
 
+# Abfragebudgets zählen nur die Anwendung; die Abfragen des Datenbank-Caches blieben sonst mitgezählt.
+in_memory_cache = override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+
+
 class OfferModelTests(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(username="testuser", password="password")
@@ -137,3 +178,1196 @@ class ReviewModelTests(TestCase):
         review_id = review.id
         review.delete()
         self.assertFalse(Review.objects.filter(id=review_id).exists())
+
+
+@in_memory_cache
+class OfferMinValueTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="business", password="password")
+        self.offer = Offer.objects.create(user=self.user, title="Test Offer", description="Test Description")
+
+    def create_detail(self, price, delivery_time_in_days, offer_type=OfferDetail.BASIC):
+        return OfferDetail.objects.create(
+            offer=self.offer,
+            title=f"{offer_type} Plan",
+            revisions=1,
+            delivery_time_in_days=delivery_time_in_days,
+            price=price,
+            offer_type=offer_type
+        )
+
+    def test_min_values_follow_detail_writes(self):
+        basic = self.create_detail(100, 7)
+        premium = self.create_detail(50, 3, OfferDetail.PREMIUM)
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.min_price, Decimal("50.00"))
+        self.assertEqual(self.offer.min_delivery_time, 3)
+
+        premium.price = 150
+        premium.save()
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.min_price, Decimal("100.00"))
+
+        basic.delete()
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.min_price, Decimal("150.00"))
+        self.assertEqual(self.offer.min_delivery_time, 3)
+
+    def test_min_values_without_details(self):
+        self.assertIsNone(self.offer.min_price)
+        self.assertIsNone(self.offer.min_delivery_time)
+
+    def test_offer_list_reads_stored_min_values(self):
+        self.create_detail(100, 7)
+        self.create_detail(50, 3, OfferDetail.PREMIUM)
+        for index in range(3):
+            offer = Offer.objects.create(user=self.user, title=f"Offer {index}", description="Test")
+            OfferDetail.objects.create(
+                offer=offer, title="Basic", revisions=1, delivery_time_in_days=5, price=20 + index)
+
+        with self.assertNumQueries(3):
+            response = self.client.get("/api/offers/", {"ordering": "min_price"})
+
+        self.assertEqual(response.status_code, 200)
+        prices = [offer["min_price"] for offer in response.json()["results"]]
+        self.assertEqual(prices, [20.0, 21.0, 22.0, 50.0])
+
+
+class OfferCursorPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="business", password="password")
+        for index in range(8):
+            offer = Offer.objects.create(user=self.user, title=f"Offer {index}", description="Test")
+            OfferDetail.objects.create(
+                offer=offer, title="Basic", revisions=1, delivery_time_in_days=5, price=10 * (index % 4) + 10)
+
+    def collect_pages(self, params):
+        ids, url, data = [], "/api/offers/", params
+        while url:
+            response = self.client.get(url, data)
+            self.assertEqual(response.status_code, 200)
+            ids += [offer["id"] for offer in response.json()["results"]]
+            url, data = response.json()["next"], None
+        return ids
+
+    def test_cursor_pages_cover_all_offers_once(self):
+        ids = self.collect_pages({"pagination": "cursor", "page_size": 3})
+        self.assertEqual(len(ids), 8)
+        self.assertEqual(len(set(ids)), 8)
+
+    def test_cursor_pages_follow_min_price_ordering(self):
+        ids = self.collect_pages({"pagination": "cursor", "page_size": 3, "ordering": "min_price"})
+        expected = list(Offer.objects.order_by("min_price", "id").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_tied_prices_are_paged_by_keyset_without_offset(self):
+        first = self.client.get("/api/offers/", {"pagination": "cursor", "page_size": 3, "ordering": "-min_price"})
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(first.json()["next"])
+        self.assertFalse([query for query in queries if "OFFSET" in query["sql"]])
+        self.assertEqual(self.client.get(second.json()["previous"]).json()["results"], first.json()["results"])
+
+    def test_cursor_pages_follow_rating_ordering(self):
+        expected = []
+        for name, average in [("top", 4.5), ("mid", 3.0)]:
+            user = User.objects.create_user(username=name, password="password")
+            BusinessRatingStats.objects.create(business_user=user, review_count=2, rating_average=average)
+            offers = [Offer.objects.create(user=user, title=f"{name} {index}", description="Test") for index in range(2)]
+            expected += [offer.id for offer in reversed(offers)]
+        expected += list(Offer.objects.filter(user=self.user).order_by("-id").values_list("id", flat=True))
+        ids = self.collect_pages({"pagination": "cursor", "page_size": 3, "ordering": "-rating"})
+        self.assertEqual(ids, expected)
+
+    def test_cursor_from_other_ordering_is_rejected(self):
+        first = self.client.get("/api/offers/", {"pagination": "cursor", "page_size": 3})
+        response = self.client.get(first.json()["next"] + "&ordering=min_price")
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_page_skips_count_unless_requested(self):
+        response = self.client.get("/api/offers/", {"pagination": "cursor"})
+        self.assertNotIn("count", response.json())
+
+        response = self.client.get("/api/offers/", {"pagination": "cursor", "with_total": "true"})
+        self.assertEqual(response.json()["count"], 8)
+
+
+class OfferSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="business", password="password")
+        self.logo = Offer.objects.create(user=self.user, title="Logo Design", description="Ein neues Logo")
+        self.website = Offer.objects.create(user=self.user, title="Website", description="Mit Logo im Header")
+        Offer.objects.create(user=self.user, title="Videoschnitt", description="Für Social Media")
+
+    def search(self, value):
+        response = self.client.get("/api/offers/", {"search": value})
+        self.assertEqual(response.status_code, 200)
+        return [offer["id"] for offer in response.json()["results"]]
+
+    def test_search_orders_by_relevance(self):
+        self.assertEqual(self.search("logo"), [self.logo.id, self.website.id])
+
+    def test_cursor_search_pages_by_relevance(self):
+        ids, url, data = [], "/api/offers/", {"search": "logo", "pagination": "cursor", "page_size": 1}
+        while url:
+            response = self.client.get(url, data)
+            self.assertEqual(response.status_code, 200)
+            ids += [offer["id"] for offer in response.json()["results"]]
+            url, data = response.json()["next"], None
+        self.assertEqual(ids, [self.logo.id, self.website.id])
+
+    def test_search_matches_prefixes_and_ignores_syntax(self):
+        self.assertEqual(self.search('web"'), [self.website.id])
+        self.assertEqual(self.search("video AND"), [])
+
+    def test_search_without_word_characters_does_not_return_everything(self):
+        self.assertEqual(self.search("!!!"), [])
+        Offer.objects.create(user=self.user, title="Sale!!!", description="Nur heute")
+        self.assertEqual(len(self.search("!!!")), 1)
+        self.assertEqual(self.client.get("/api/offers/facets/", {"search": "?"}).json()["count"], 0)
+
+    def test_search_index_follows_updates_and_deletes(self):
+        self.website.title = "Onlineshop"
+        self.website.description = "Shopsystem"
+        self.website.save()
+        self.assertEqual(self.search("logo"), [self.logo.id])
+        self.assertEqual(self.search("shop"), [self.website.id])
+
+        self.logo.delete()
+        self.assertEqual(self.search("logo"), [])
+
+
+@in_memory_cache
+class OfferListCacheTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="business", password="password")
+        self.profile = UserProfile.objects.create(user=self.user, type="business", first_name="Anna")
+        self.offer = Offer.objects.create(user=self.user, title="Logo Design", description="Test")
+        self.detail = OfferDetail.objects.create(
+            offer=self.offer, title="Basic", revisions=1, delivery_time_in_days=5, price=50)
+
+    def get_list(self, params=None):
+        response = self.client.get("/api/offers/", params or {"page_size": 5, "ordering": "min_price"})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_repeated_request_is_served_from_cache(self):
+        self.assertEqual(self.get_list()["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            response = self.get_list({"ordering": "min_price", "page_size": 5, "_": "123"})
+        self.assertEqual(response["X-Cache"], "HIT")
+
+    def test_detail_change_invalidates_cache(self):
+        self.get_list()
+        self.detail.price = 80
+        self.detail.save()
+        response = self.get_list()
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["results"][0]["min_price"], 80.0)
+
+    def test_owner_name_change_invalidates_cache(self):
+        self.get_list()
+        self.profile.first_name = "Berta"
+        self.profile.save()
+        response = self.get_list()
+        self.assertEqual(response.json()["results"][0]["user_details"]["first_name"], "Berta")
+
+    def test_unrelated_profile_save_keeps_cache(self):
+        self.get_list()
+        self.profile.location = "Berlin"
+        self.profile.save()
+        self.assertEqual(self.get_list()["X-Cache"], "HIT")
+
+    @override_settings(ALLOWED_HOSTS=["testserver", "api.example.com"])
+    def test_cache_key_includes_host(self):
+        self.get_list()
+        response = self.client.get("/api/offers/", {"page_size": 5, "ordering": "min_price"}, HTTP_HOST="api.example.com")
+        self.assertEqual(response["X-Cache"], "MISS")
+
+
+class SharedOfferCacheTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username="business", password="password")
+        Offer.objects.create(user=user, title="Logo Design", description="Test")
+        offer_cache.flush_stats()
+        offer_cache.reset_stats()
+
+    def test_list_and_stats_are_stored_in_the_database_cache(self):
+        self.assertEqual(self.client.get("/api/offers/")["X-Cache"], "MISS")
+        self.assertEqual(self.client.get("/api/offers/")["X-Cache"], "HIT")
+        offer_cache.flush_stats()
+        self.assertEqual(offer_cache.get_stats()["hits"], 1)
+        self.assertEqual(offer_cache.get_stats()["misses"], 1)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM coderr_cache")
+            self.assertGreater(cursor.fetchone()[0], 0)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="business", password="password")
+        UserProfile.objects.create(user=self.user, type="business")
+        self.offer = Offer.objects.create(user=self.user, title="Logo Design", description="Test")
+        self.detail = OfferDetail.objects.create(
+            offer=self.offer, title="Basic", revisions=1, delivery_time_in_days=5, price=50)
+
+    def assertNotModifiedAfterFirstGet(self, url, last_modified=True):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual("Last-Modified" in response, last_modified)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+        return response
+
+    def test_offer_retrieve_returns_304_until_detail_changes(self):
+        url = f"/api/offers/{self.offer.id}/"
+        etag = self.assertNotModifiedAfterFirstGet(url, last_modified=False)["ETag"]
+        self.detail.price = 70
+        self.detail.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_offer_detail_retrieve_returns_304(self):
+        self.assertNotModifiedAfterFirstGet(f"/api/offerdetails/{self.detail.id}/")
+
+    def test_offer_retrieve_etag_follows_user_name(self):
+        url = f"/api/offers/{self.offer.id}/"
+        etag = self.assertNotModifiedAfterFirstGet(url, last_modified=False)["ETag"]
+        self.user.first_name = "Anna"
+        self.user.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT")
+        self.assertEqual(response.status_code, 200)
+
+    def test_offer_list_uses_generation_etag_only(self):
+        etag = self.assertNotModifiedAfterFirstGet("/api/offers/?ordering=min_price", last_modified=False)["ETag"]
+        other = Offer.objects.create(user=self.user, title="Website", description="Test")
+        other.delete()
+        response = self.client.get("/api/offers/?ordering=min_price", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_profile_returns_304(self):
+        self.client.force_login(self.user)
+        self.assertNotModifiedAfterFirstGet(f"/api/profile/{self.user.id}/", last_modified=False)
+
+
+def offer_payload(title, base_price=100):
+    return {
+        "title": title,
+        "description": "Beschreibung",
+        "details": [
+            {"title": "Basic", "revisions": 1, "delivery_time_in_days": 7, "price": base_price,
+             "features": ["Logo"], "offer_type": "basic"},
+            {"title": "Standard", "revisions": 3, "delivery_time_in_days": 5, "price": base_price * 2,
+             "features": ["Logo", "Visitenkarte"], "offer_type": "standard"},
+            {"title": "Premium", "revisions": -1, "delivery_time_in_days": 3, "price": base_price * 3,
+             "features": ["Logo", "Visitenkarte", "Flyer"], "offer_type": "premium"},
+        ],
+    }
+
+
+@in_memory_cache
+class OfferCreateTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="business", password="password")
+        UserProfile.objects.create(user=self.user, type="business")
+        self.client.force_login(self.user)
+
+    def test_create_offer(self):
+        response = self.client.post("/api/offers/", offer_payload("Logo Design"), content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        offer = Offer.objects.get(id=response.json()["id"])
+        self.assertEqual(offer.details.count(), 3)
+        self.assertEqual(offer.min_price, Decimal("100.00"))
+        self.assertEqual(offer.min_delivery_time, 3)
+
+    def test_create_offer_computes_min_values_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post("/api/offers/", offer_payload("Logo Design"), content_type="application/json")
+        statements = [query["sql"] for query in queries.captured_queries]
+        self.assertFalse([sql for sql in statements if sql.startswith('UPDATE "coderr_app_offer"')])
+        self.assertEqual(len([sql for sql in statements if sql.startswith('INSERT INTO "coderr_app_offerdetail"')]), 1)
+
+    def test_create_offer_requires_all_offer_types(self):
+        payload = offer_payload("Logo Design")
+        payload["details"][2]["offer_type"] = "basic"
+        response = self.client.post("/api/offers/", payload, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Offer.objects.exists())
+
+    def test_bulk_create_offers(self):
+        payload = [offer_payload("Logo Design"), offer_payload("Website", base_price=500)]
+        with self.assertNumQueries(7):
+            response = self.client.post("/api/offers/bulk/", payload, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        ids = response.json()["ids"]
+        self.assertEqual(len(ids), 2)
+        website = Offer.objects.get(id=ids[1])
+        self.assertEqual(website.details.count(), 3)
+        self.assertEqual(website.min_price, Decimal("500.00"))
+        self.assertEqual(website.min_delivery_time, 3)
+
+    def test_bulk_create_reports_errors_per_item(self):
+        invalid = offer_payload("Website")
+        invalid["details"][0]["features"] = []
+        payload = {"offers": [offer_payload("Logo Design"), invalid, {"title": "Ohne Details"}]}
+        response = self.client.post("/api/offers/bulk/", payload, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()["offers"]
+        self.assertEqual(errors[0], {})
+        self.assertIn("details", errors[1])
+        self.assertIn("details", errors[2])
+        self.assertFalse(Offer.objects.exists())
+
+    def test_bulk_create_rejects_scalar_body(self):
+        for body in ['"abc"', "42", "null"]:
+            response = self.client.post("/api/offers/bulk/", body, content_type="application/json")
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("offers", response.json())
+
+    def test_bulk_create_requires_business_user(self):
+        customer = User.objects.create_user(username="customer", password="password")
+        UserProfile.objects.create(user=customer, type="customer")
+        self.client.force_login(customer)
+        response = self.client.post("/api/offers/bulk/", [offer_payload("Logo")], content_type="application/json")
+        self.assertEqual(response.status_code, 403)
+
+
+@in_memory_cache
+class OfferUpdateTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="business", password="password")
+        UserProfile.objects.create(user=self.user, type="business")
+        self.client.force_login(self.user)
+        response = self.client.post("/api/offers/", offer_payload("Logo Design"), content_type="application/json")
+        self.offer = Offer.objects.get(id=response.json()["id"])
+        self.detail_ids = {detail.offer_type: detail.id for detail in self.offer.details.all()}
+
+    def patch(self, payload):
+        response = self.client.patch(f"/api/offers/{self.offer.id}/", payload, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_patch_updates_changed_details_in_place(self):
+        details = offer_payload("Logo Design")["details"]
+        details[0]["price"] = 80
+        details[2]["features"] = ["Alles"]
+        data = self.patch({"title": "Neues Logo", "details": details})
+
+        self.assertEqual({detail["offer_type"]: detail["id"] for detail in data["details"]}, self.detail_ids)
+        self.assertEqual(data["min_price"], 80.0)
+        self.assertEqual(data["title"], "Neues Logo")
+        premium = OfferDetail.objects.get(id=self.detail_ids["premium"])
+        self.assertEqual(premium.features, ["Alles"])
+
+    def test_patch_replaces_removed_details(self):
+        details = offer_payload("Logo Design", base_price=40)["details"][:2]
+        data = self.patch({"details": details})
+        self.assertEqual(sorted(detail["offer_type"] for detail in data["details"]), ["basic", "standard"])
+        self.assertFalse(OfferDetail.objects.filter(id=self.detail_ids["premium"]).exists())
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.min_price, Decimal("40.00"))
+        self.assertEqual(self.offer.min_delivery_time, 5)
+
+    def test_patch_keeps_min_values_saved_concurrently(self):
+        stale = Offer.objects.get(id=self.offer.id)
+        basic = OfferDetail.objects.get(id=self.detail_ids["basic"])
+        basic.price = 10
+        basic.save()
+        update_offer(stale, {"title": "Neues Logo"})
+        self.offer.refresh_from_db()
+        self.assertEqual((self.offer.title, self.offer.min_price), ("Neues Logo", Decimal("10.00")))
+
+    def test_patch_query_count_is_fixed(self):
+        details = offer_payload("Logo Design")["details"]
+        for detail in details:
+            detail["price"] += 1
+        with self.assertNumQueries(9):
+            self.patch({"details": details})
+
+
+@in_memory_cache
+class OfferFacetTests(TestCase):
+    def setUp(self):
+        self.anna = User.objects.create_user(username="anna", password="password")
+        self.ben = User.objects.create_user(username="ben", password="password")
+        for user, price, days in [(self.anna, 40, 2), (self.anna, 120, 5), (self.ben, 600, 20)]:
+            offer = Offer.objects.create(user=user, title="Angebot", description="Test")
+            OfferDetail.objects.create(
+                offer=offer, title="Basic", revisions=1, delivery_time_in_days=days, price=price)
+
+    def test_facets_count_buckets_types_and_creators(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/offers/facets/")
+        data = response.json()
+        self.assertEqual(data["count"], 3)
+        self.assertEqual([bucket["count"] for bucket in data["price"]], [1, 0, 1, 0, 1])
+        self.assertEqual([bucket["count"] for bucket in data["delivery_time"]], [0, 1, 1, 0, 1])
+        self.assertEqual(data["offer_type"], {"basic": 3, "standard": 0, "premium": 0})
+        self.assertEqual(data["creator"][0], {"creator_id": self.anna.id, "username": "anna", "count": 2})
+
+    def test_facets_follow_filters_and_are_cached(self):
+        params = {"creator_id": self.ben.id}
+        self.assertEqual(self.client.get("/api/offers/facets/", params).json()["count"], 1)
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/offers/facets/", params)
+        self.assertEqual(response["X-Cache"], "HIT")
+
+
+def image_upload(name="logo.png", size=(1600, 900)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "orange").save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        self.override = override_settings(MEDIA_ROOT=self.media_root.name, IMAGE_VARIANT_WORKERS=0)
+        self.override.enable()
+        self.addCleanup(self.override.disable)
+        self.user = User.objects.create_user(username="business", password="password")
+
+    def listed_variants(self):
+        return self.client.get("/api/offers/", {"ordering": "-updated_at"}).json()["results"][0]["image_variants"]
+
+    def test_upload_creates_variants_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            offer = Offer.objects.create(
+                user=self.user, title="Logo", description="Test", image=image_upload())
+
+        response = self.client.get(f"/api/offers/{offer.id}/")
+        variants = response.json()["image_variants"]
+        self.assertEqual(set(variants), {"thumb", "card", "large"})
+        card_name = variant_name(offer.image.name, "card", "jpg")
+        self.assertTrue(variants["card"]["jpg"].endswith(card_name))
+        with Image.open(os.path.join(self.media_root.name, card_name)) as card:
+            self.assertEqual(card.size, (480, 270))
+
+    def test_backfill_command_uses_pool_and_refreshes_offer_list(self):
+        offer = Offer.objects.create(user=self.user, title="Logo", description="Test", image=image_upload())
+        self.assertEqual(self.client.get(f"/api/offers/{offer.id}/").json()["image_variants"], {})
+        self.assertEqual(self.listed_variants(), {})
+
+        with ThreadPoolExecutor(max_workers=1) as pool, override_settings(IMAGE_VARIANT_WORKERS=1), \
+                mock.patch("coderr_app.management.commands.generate_image_variants.get_executor",
+                           return_value=pool):
+            call_command("generate_image_variants", stdout=io.StringIO())
+        self.assertIn("thumb", self.client.get(f"/api/offers/{offer.id}/").json()["image_variants"])
+        self.assertIn("thumb", self.listed_variants())
+
+    def test_broken_pool_is_logged_not_raised(self):
+        offer = Offer.objects.create(user=self.user, title="Logo", description="Test", image=image_upload())
+        with override_settings(IMAGE_VARIANT_WORKERS=1), \
+                mock.patch("coderr_app.images.get_executor", side_effect=BrokenProcessPool("kaputt")), \
+                self.assertLogs("coderr_app.images", "WARNING"):
+            submit_variants(*local_paths(offer.image))
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        self.override = override_settings(MEDIA_ROOT=self.media_root.name, IMAGE_VARIANT_WORKERS=0)
+        self.override.enable()
+        self.addCleanup(self.override.disable)
+        self.user = User.objects.create_user(username="business", password="password")
+
+    def create_offer(self, upload):
+        return Offer.objects.create(user=self.user, title="Logo", description="Test", image=upload)
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.create_offer(image_upload("logo.png"))
+        second = self.create_offer(image_upload("kopie.png"))
+        profile = UserProfile.objects.create(user=self.user, type="business", file=image_upload("profil.png"))
+
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(first.image.name, profile.file.name)
+        self.assertTrue(first.image.name.startswith("blobs/"))
+        self.assertEqual(MediaBlob.objects.get(name=first.image.name).ref_count, 3)
+
+    def test_blob_is_deleted_when_last_reference_goes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.create_offer(image_upload())
+            second = self.create_offer(image_upload())
+        path = first.image.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(os.path.exists(path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.image = image_upload(size=(10, 10))
+            second.save()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(MediaBlob.objects.filter(name=first.image.name).exists())
+        self.assertEqual(MediaBlob.objects.get(name=second.image.name).ref_count, 1)
+
+    def test_concurrent_reuse_keeps_blob_until_reference_commits(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.create_offer(image_upload())
+        path = first.image.path
+
+        name = default_storage.save("offers/kopie.png", image_upload())
+        self.assertEqual(name, first.image.name)
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(os.path.exists(path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_offer(name)
+        self.assertEqual(MediaBlob.objects.get(name=name).ref_count, 1)
+        self.assertEqual(glob.glob(f"{path}.*"), [])
+
+
+class OrderCounterTests(TestCase):
+    def setUp(self):
+        self.business = User.objects.create_user(username="business", password="password")
+        UserProfile.objects.create(user=self.business, type="business")
+        self.customer = User.objects.create_user(username="customer", password="password")
+        UserProfile.objects.create(user=self.customer, type="customer")
+        offer = Offer.objects.create(user=self.business, title="Logo", description="Test")
+        self.detail = OfferDetail.objects.create(
+            offer=offer, title="Basic", revisions=1, delivery_time_in_days=5, price=50, features=["Logo"])
+        self.client.force_login(self.customer)
+
+    def create_order(self):
+        response = self.client.post("/api/orders/", {"offer_detail_id": self.detail.id}, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        return response.json()["id"]
+
+    def counts(self):
+        return (
+            self.client.get(f"/api/order-count/{self.business.id}/").json()["order_count"],
+            self.client.get(f"/api/completed-order-count/{self.business.id}/").json()["completed_order_count"],
+        )
+
+    def test_counts_follow_order_creation_and_status_changes(self):
+        self.assertEqual(self.counts(), (0, 0))
+        order_id = self.create_order()
+        self.create_order()
+        self.assertEqual(self.counts(), (2, 0))
+
+        response = self.client.patch(f"/api/orders/{order_id}/", {"status": "completed"}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.counts(), (1, 1))
+
+    def test_order_creation_query_budget(self):
+        self.create_order()
+        with CaptureQueriesContext(connection) as queries:
+            order_id = self.create_order()
+        statements = [q["sql"] for q in queries if not q["sql"].startswith(("SAVEPOINT", "RELEASE SAVEPOINT"))]
+        self.assertEqual(len(statements), 5, "\n".join(statements))
+        self.assertEqual(sum(sql.startswith('INSERT INTO "coderr_app_order"') for sql in statements), 1)
+        order = Order.objects.get(id=order_id)
+        self.assertEqual((order.business_user, order.title, order.price, order.features),
+                         (self.business, "Basic", Decimal("50.00"), ["Logo"]))
+
+    def test_only_customers_can_order(self):
+        self.client.force_login(self.business)
+        response = self.client.post("/api/orders/", {"offer_detail_id": self.detail.id}, content_type="application/json")
+        self.assertEqual(response.status_code, 403)
+        response = self.client.post("/api/orders/", {"offer_detail_id": 9999}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_count_is_a_single_read(self):
+        self.create_order()
+        with self.assertNumQueries(3):
+            self.client.get(f"/api/order-count/{self.business.id}/")
+
+    def test_count_validates_business_user(self):
+        response = self.client.get(f"/api/order-count/{self.customer.id}/")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get("/api/completed-order-count/9999/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_count_rejects_former_business_with_counter(self):
+        self.create_order()
+        UserProfile.objects.filter(user=self.business).update(type="customer")
+        for url in (f"/api/order-count/{self.business.id}/", f"/api/completed-order-count/{self.business.id}/"):
+            self.assertEqual(self.client.get(url).status_code, 400)
+        response = self.client.get("/api/order-counts/", {"business_user_ids": self.business.id})
+        self.assertEqual(response.json()["errors"], {str(self.business.id): "User is not a business provider."})
+
+    def test_batch_counts_for_several_businesses(self):
+        other = User.objects.create_user(username="other", password="password")
+        UserProfile.objects.create(user=other, type="business")
+        order_id = self.create_order()
+        self.create_order()
+        self.client.patch(f"/api/orders/{order_id}/", {"status": "completed"}, content_type="application/json")
+
+        ids = f"{self.business.id},{other.id},{self.customer.id},9999"
+        with self.assertNumQueries(5):
+            response = self.client.get("/api/order-counts/", {"business_user_ids": ids})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["results"], {
+            str(self.business.id): {"order_count": 1, "completed_order_count": 1},
+            str(other.id): {"order_count": 0, "completed_order_count": 0},
+        })
+        self.assertEqual(data["errors"], {
+            str(self.customer.id): "User is not a business provider.",
+            "9999": "Business user not found.",
+        })
+
+    def test_batch_counts_reject_invalid_ids(self):
+        response = self.client.get("/api/order-counts/", {"business_user_ids": "1,abc"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_deleting_a_customer_account_updates_counts(self):
+        other = User.objects.create_user(username="other", password="password")
+        UserProfile.objects.create(user=other, type="customer")
+        self.create_order()
+        self.client.force_login(other)
+        self.create_order()
+        self.assertEqual(self.counts(), (2, 0))
+
+        other.delete()
+        self.client.force_login(self.customer)
+        self.assertEqual(self.counts(), (1, 0))
+        self.business.delete()
+        self.assertFalse(BusinessOrderCounter.objects.exists())
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        self.create_order()
+        BusinessOrderCounter.objects.filter(business_user=self.business).update(in_progress_count=7)
+
+        output = io.StringIO()
+        call_command("reconcile_order_counters", stdout=output)
+        self.assertIn("in_progress_count: 7 -> 1", output.getvalue())
+        self.assertEqual(self.counts(), (1, 0))
+
+
+class OrderStatusTests(TestCase):
+    def setUp(self):
+        self.business = User.objects.create_user(username="business", password="password")
+        self.customer = User.objects.create_user(username="customer", password="password")
+        self.order = Order.objects.create(
+            customer_user=self.customer, business_user=self.business, title="Logo", revisions=1,
+            delivery_time_in_days=5, price=50, offer_type="basic")
+        BusinessOrderCounter.objects.create(business_user=self.business, in_progress_count=1)
+        self.client.force_login(self.business)
+
+    def patch(self, new_status):
+        return self.client.patch(f"/api/orders/{self.order.id}/", {"status": new_status}, content_type="application/json")
+
+    def test_update_writes_only_status_and_updated_at(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.patch("cancelled")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "cancelled")
+        order_update = next(q["sql"] for q in queries if q["sql"].startswith('UPDATE "coderr_app_order"'))
+        self.assertNotIn('"title"', order_update)
+        self.assertIn('"status" = \'in_progress\'', order_update.split("WHERE")[1])
+        counter = BusinessOrderCounter.objects.get(business_user=self.business)
+        self.assertEqual((counter.in_progress_count, counter.cancelled_count), (0, 1))
+
+    def test_final_status_cannot_be_reopened(self):
+        self.assertEqual(self.patch("completed").status_code, 200)
+        response = self.patch("in_progress")
+        self.assertEqual(response.status_code, 409)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, "completed")
+
+    def test_stale_read_is_rejected(self):
+        stale = Order.objects.get(pk=self.order.pk)
+        transition_status(self.order, "completed")
+        with self.assertRaises(StatusConflict):
+            transition_status(stale, "cancelled")
+        counter = BusinessOrderCounter.objects.get(business_user=self.business)
+        self.assertEqual((counter.completed_count, counter.cancelled_count), (1, 0))
+
+    def test_invalid_status_value(self):
+        self.assertEqual(self.patch("unknown").status_code, 400)
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        self.business = User.objects.create_user(username="business", password="password")
+        UserProfile.objects.create(user=self.business, type="business")
+        self.customer = User.objects.create_user(username="customer", password="password")
+        UserProfile.objects.create(user=self.customer, type="customer")
+        offer = Offer.objects.create(user=self.business, title="Logo", description="Test")
+        self.detail = OfferDetail.objects.create(
+            offer=offer, title="Basic", revisions=1, delivery_time_in_days=5, price=50, features=["Logo"])
+        self.client.force_login(self.customer)
+
+    def post_order(self, key, detail_id=None):
+        return self.client.post("/api/orders/", {"offer_detail_id": detail_id or self.detail.id},
+                                content_type="application/json", HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_response_without_creating_again(self):
+        first = self.post_order("abc")
+        with self.assertNumQueries(3):
+            second = self.post_order("abc")
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(BusinessOrderCounter.objects.get(business_user=self.business).in_progress_count, 1)
+
+    def test_key_reused_for_other_request_is_rejected(self):
+        self.post_order("abc")
+        self.assertEqual(self.post_order("abc", detail_id=9999).status_code, 422)
+
+    def test_failed_request_is_not_stored(self):
+        self.assertEqual(self.post_order("abc", detail_id=9999).status_code, 400)
+        self.assertEqual(self.post_order("abc").status_code, 201)
+
+    def test_expired_key_is_used_again(self):
+        self.post_order("abc")
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.post_order("abc").status_code, 201)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_review_creation_is_idempotent(self):
+        payload = {"business_user": self.business.id, "rating": 5, "description": "Top"}
+        for _ in range(2):
+            response = self.client.post("/api/reviews/", payload, content_type="application/json",
+                                        HTTP_IDEMPOTENCY_KEY="review-1")
+            self.assertEqual(response.status_code, 201)
+        self.assertEqual(Review.objects.count(), 1)
+
+    def test_purge_deletes_only_expired_keys(self):
+        self.post_order("alt")
+        self.post_order("neu")
+        IdempotencyKey.objects.filter(key="alt").update(expires_at=timezone.now() - timedelta(seconds=1))
+        output = io.StringIO()
+        call_command("purge_idempotency_keys", "--batch-size", "1", stdout=output)
+        self.assertIn("1 abgelaufene", output.getvalue())
+        self.assertEqual(list(IdempotencyKey.objects.values_list("key", flat=True)), ["neu"])
+
+
+class OrderListTests(TestCase):
+    def setUp(self):
+        self.business = User.objects.create_user(username="business", password="password")
+        self.customer = User.objects.create_user(username="customer", password="password")
+        self.other = User.objects.create_user(username="other", password="password")
+        self.orders = []
+        for index in range(7):
+            customer, business = (self.customer, self.business) if index % 3 else (self.business, self.other)
+            self.orders.append(Order.objects.create(
+                customer_user=customer, business_user=business, title=f"Order {index}", revisions=1,
+                delivery_time_in_days=5, price=50, offer_type="premium" if index == 4 else "basic",
+                status=Order.COMPLETED if index in (1, 2) else Order.IN_PROGRESS))
+        Order.objects.create(
+            customer_user=self.customer, business_user=self.other, title="Fremd", revisions=1,
+            delivery_time_in_days=5, price=50, offer_type="basic")
+        self.client.force_login(self.business)
+
+    def collect(self, params):
+        ids, url, data, pages = [], "/api/orders/", params, 0
+        while url:
+            response = self.client.get(url, data)
+            self.assertEqual(response.status_code, 200)
+            ids += [order["id"] for order in response.json()["results"]]
+            url, data, pages = response.json()["next"], None, pages + 1
+        return ids, pages
+
+    def test_pages_cover_customer_and_business_orders_newest_first(self):
+        ids, pages = self.collect({"page_size": 3})
+        self.assertEqual(ids, [order.id for order in reversed(self.orders)])
+        self.assertEqual(pages, 3)
+
+    def test_previous_link_returns_to_first_page(self):
+        first = self.client.get("/api/orders/", {"page_size": 3}).json()
+        second = self.client.get(first["next"]).json()
+        self.assertEqual(self.client.get(second["previous"]).json()["results"], first["results"])
+
+    def test_filters(self):
+        ids, _ = self.collect({"status": "completed"})
+        self.assertEqual(ids, [self.orders[2].id, self.orders[1].id])
+        ids, _ = self.collect({"offer_type": "premium"})
+        self.assertEqual(ids, [self.orders[4].id])
+        ids, _ = self.collect({"created_after": self.orders[5].created_at.isoformat()})
+        self.assertEqual(ids, [self.orders[6].id, self.orders[5].id])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get("/api/orders/", {"cursor": "kaputt"}).status_code, 404)
+
+    def test_invalid_page_size_falls_back_to_default(self):
+        for page_size in ("-5", "0", "abc"):
+            response = self.client.get("/api/orders/", {"page_size": page_size})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()["results"]), 7)
+        response = self.client.get("/api/orders/", {"page_size": "2"})
+        self.assertEqual(len(response.json()["results"]), 2)
+        with mock.patch.object(OrderCursorPagination, "max_page_size", 3):
+            response = self.client.get("/api/orders/", {"page_size": "500"})
+        self.assertEqual(len(response.json()["results"]), 3)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.business = User.objects.create_user(username="business", password="password")
+        self.customer = User.objects.create_user(username="customer", password="password")
+        UserProfile.objects.create(user=self.business, type="business")
+        for index in range(3):
+            Order.objects.create(
+                customer_user=self.customer, business_user=self.business, title=f"Order {index}",
+                revisions=1, delivery_time_in_days=5, price=Decimal("50.00"), offer_type="basic",
+                features=["Logo"], status=Order.COMPLETED if index == 0 else Order.IN_PROGRESS)
+        for owner, title in [(self.business, "Eigenes Angebot"), (self.customer, "Fremdes Angebot")]:
+            offer = Offer.objects.create(user=owner, title=title, description="Beschreibung")
+            OfferDetail.objects.create(offer=offer, title="Basic", revisions=1, delivery_time_in_days=5,
+                                       price=100, features=["A"], offer_type="basic")
+        self.client.force_login(self.business)
+
+    def read(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_orders_ndjson(self):
+        response = self.client.get("/api/orders/export/")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([row["title"] for row in rows], ["Order 0", "Order 1", "Order 2"])
+        self.assertEqual(rows[0]["price"], "50.00")
+        self.assertEqual(rows[0]["features"], ["Logo"])
+
+    def test_orders_csv_with_filter(self):
+        response = self.client.get("/api/orders/export/", {"file_format": "csv", "status": "completed"})
+        self.assertIn('filename="orders.csv"', response["Content-Disposition"])
+        rows = list(csv.DictReader(io.StringIO(self.read(response))))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["title"], "Order 0")
+        self.assertEqual(json.loads(rows[0]["features"]), ["Logo"])
+
+    def test_offers_export_contains_only_own_offers(self):
+        rows = list(csv.DictReader(io.StringIO(self.read(
+            self.client.get("/api/offers/export/", {"file_format": "csv"})))))
+        self.assertEqual([row["offer_title"] for row in rows], ["Eigenes Angebot"])
+        self.assertEqual(rows[0]["price"], "100.00")
+
+    def test_invalid_format_and_anonymous(self):
+        self.assertEqual(self.client.get("/api/orders/export/", {"file_format": "xml"}).status_code, 400)
+        self.client.logout()
+        self.assertIn(self.client.get("/api/offers/export/").status_code, (401, 403))
+
+
+class ExportASGITests(TransactionTestCase):
+    # Der ASGI-Handler fragt in einem eigenen Thread ab und sieht nur festgeschriebene Daten.
+    def setUp(self):
+        business = User.objects.create_user(username="business", password="password")
+        customer = User.objects.create_user(username="customer", password="password")
+        UserProfile.objects.create(user=business, type="business")
+        for index in range(5):
+            Order.objects.create(
+                customer_user=customer, business_user=business, title=f"Order {index}", revisions=1,
+                delivery_time_in_days=5, price=Decimal("50.00"), offer_type="basic", features=[])
+        self.token = Token.objects.create(user=business)
+
+    async def request(self, path):
+        messages = []
+        incoming = asyncio.Queue()
+        incoming.put_nowait({"type": "http.request", "body": b"", "more_body": False})
+
+        async def receive():
+            return await incoming.get()
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            "type": "http", "method": "GET", "path": path, "query_string": b"",
+            "headers": [(b"host", b"testserver"), (b"authorization", f"Token {self.token.key}".encode())],
+            "server": ("testserver", 80),
+        }
+        await ASGIHandler()(scope, receive, send)
+        return messages
+
+    async def test_export_streams_asynchronously_under_asgi(self):
+        with mock.patch("coderr_app.api.export.EXPORT_CHUNK_SIZE", 2), \
+                warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            messages = await self.request("/api/orders/export/")
+        self.assertEqual(messages[0]["status"], 200)
+        bodies = [message["body"] for message in messages[1:] if message.get("body")]
+        self.assertEqual([json.loads(body)["title"] for body in bodies], [f"Order {index}" for index in range(5)])
+        self.assertFalse([warning for warning in caught if "synchronous iterators" in str(warning.message)])
+
+
+class RatingStatsTests(TestCase):
+    def setUp(self):
+        self.business = User.objects.create_user(username="business", password="password")
+        UserProfile.objects.create(user=self.business, type="business", tel="0123")
+        self.other = User.objects.create_user(username="other", password="password")
+        UserProfile.objects.create(user=self.other, type="business", tel="0123")
+        self.customers = []
+        for index in range(3):
+            customer = User.objects.create_user(username=f"customer{index}", password="password")
+            UserProfile.objects.create(user=customer, type="customer")
+            self.customers.append(customer)
+        for owner in (self.business, self.other):
+            offer = Offer.objects.create(user=owner, title=f"Angebot {owner.username}", description="Test")
+            OfferDetail.objects.create(offer=offer, title="Basic", revisions=1, delivery_time_in_days=5, price=50)
+
+    def review(self, customer, rating, business=None):
+        self.client.force_login(customer)
+        response = self.client.post("/api/reviews/", {"business_user": (business or self.business).id, "rating": rating},
+                                    content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        return response.json()["id"]
+
+    def stats(self):
+        return BusinessRatingStats.objects.get(business_user=self.business)
+
+    def test_stats_follow_create_update_and_delete(self):
+        first = self.review(self.customers[0], 5)
+        self.review(self.customers[1], 3)
+        self.assertEqual((self.stats().review_count, self.stats().rating_sum, self.stats().rating_average), (2, 8, 4.0))
+
+        self.client.force_login(self.customers[0])
+        self.client.patch(f"/api/reviews/{first}/", {"rating": 4}, content_type="application/json")
+        self.assertEqual(self.stats().histogram(), {"1": 0, "2": 0, "3": 1, "4": 1, "5": 0})
+        self.assertEqual(self.stats().rating_average, 3.5)
+
+        self.client.delete(f"/api/reviews/{first}/")
+        self.client.force_login(self.customers[1])
+        self.client.delete(f"/api/reviews/{Review.objects.get().id}/")
+        self.assertEqual((self.stats().review_count, self.stats().rating_average), (0, None))
+
+    def test_offer_cards_filter_and_order_by_rating(self):
+        self.review(self.customers[0], 5)
+        self.review(self.customers[1], 2, business=self.other)
+
+        response = self.client.get("/api/offers/", {"ordering": "-rating"})
+        results = response.json()["results"]
+        self.assertEqual([offer["user"] for offer in results], [self.business.id, self.other.id])
+        self.assertEqual(results[0]["user_details"]["rating_average"], 5.0)
+        self.assertEqual(results[0]["user_details"]["review_count"], 1)
+
+        response = self.client.get("/api/offers/", {"min_rating": 4})
+        self.assertEqual([offer["user"] for offer in response.json()["results"]], [self.business.id])
+
+    def test_business_profiles_and_base_info(self):
+        self.review(self.customers[0], 5)
+        self.review(self.customers[1], 4)
+        self.review(self.customers[2], 1, business=self.other)
+
+        profiles = {profile["user"]["pk"]: profile for profile in self.client.get("/api/profiles/business/").json()["results"]}
+        self.assertEqual(profiles[self.business.id]["rating"]["rating_average"], 4.5)
+        self.assertEqual(profiles[self.business.id]["rating"]["histogram"]["4"], 1)
+
+        cache.delete(SNAPSHOT_KEY)
+        data = self.client.get("/api/base-info/").json()
+        self.assertEqual((data["review_count"], data["average_rating"]), (3, 3.3))
+
+    def test_deleting_a_reviewer_account_updates_stats(self):
+        self.review(self.customers[0], 5)
+        self.review(self.customers[1], 3)
+        self.customers[0].delete()
+        self.assertEqual((self.stats().review_count, self.stats().rating_average), (1, 3.0))
+        self.business.delete()
+        self.assertFalse(BusinessRatingStats.objects.filter(business_user_id=self.business.id).exists())
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        self.review(self.customers[0], 5)
+        self.review(self.customers[1], 3)
+        BusinessRatingStats.objects.filter(business_user=self.business).update(
+            review_count=7, rating_5_count=0, rating_average=1.0)
+
+        output = io.StringIO()
+        call_command("reconcile_review_stats", "--dry-run", stdout=output)
+        self.assertIn("review_count: 7 -> 2", output.getvalue())
+        self.assertEqual(self.stats().review_count, 7)
+
+        call_command("reconcile_review_stats", stdout=io.StringIO())
+        self.assertEqual((self.stats().review_count, self.stats().rating_5_count, self.stats().rating_average),
+                         (2, 1, 4.0))
+
+
+class ReviewFeedTests(TestCase):
+    def setUp(self):
+        self.business = User.objects.create_user(username="business", password="password")
+        self.other = User.objects.create_user(username="other", password="password")
+        self.reviews = []
+        for index in range(5):
+            customer = User.objects.create_user(username=f"customer{index}", password="password")
+            self.reviews.append(Review.objects.create(
+                business_user=self.business, reviewer=customer, rating=index % 5 + 1))
+        Review.objects.create(business_user=self.other, reviewer=customer, rating=5)
+
+    def test_public_feed_pages_newest_first(self):
+        response = self.client.get("/api/reviews/", {"business_user_id": self.business.id, "page_size": 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn("max-age=60", response["Cache-Control"])
+        first = response.json()
+        self.assertEqual([review["id"] for review in first["results"]],
+                         [review.id for review in reversed(self.reviews)][:3])
+        second = self.client.get(first["next"]).json()
+        self.assertEqual([review["id"] for review in second["results"]], [self.reviews[1].id, self.reviews[0].id])
+        self.assertIsNone(second["next"])
+
+    def test_feed_ordering_by_rating_and_reviewer_filter(self):
+        response = self.client.get("/api/reviews/", {"business_user_id": self.business.id, "ordering": "-rating"})
+        self.assertEqual([review["rating"] for review in response.json()["results"]], [5, 4, 3, 2, 1])
+        response = self.client.get("/api/reviews/", {"reviewer_id": self.reviews[4].reviewer_id})
+        self.assertEqual(len(response.json()["results"]), 2)
+
+    def test_rating_ordering_pages_by_keyset_without_offset(self):
+        for index in range(5, 9):
+            customer = User.objects.create_user(username=f"customer{index}", password="password")
+            Review.objects.create(business_user=self.business, reviewer=customer, rating=5)
+        url = f"/api/reviews/?business_user_id={self.business.id}&ordering=-rating&page_size=2"
+        ratings = []
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                data = self.client.get(url).json()
+                ratings += [review["rating"] for review in data["results"]]
+                url = data["next"]
+        self.assertEqual(ratings, [5, 5, 5, 5, 5, 4, 3, 2, 1])
+        self.assertFalse(any("OFFSET" in query["sql"] for query in queries.captured_queries))
+
+    def test_own_reviews_still_require_login(self):
+        self.assertIn(self.client.get("/api/reviews/").status_code, (401, 403))
+        self.client.force_login(self.other)
+        response = self.client.get("/api/reviews/")
+        self.assertEqual(len(response.json()), 1)
+        self.assertNotIn("public", response.get("Cache-Control", ""))
+
+
+@in_memory_cache
+class BaseInfoTests(TestCase):
+    def setUp(self):
+        cache.delete_many([SNAPSHOT_KEY, LOCK_KEY])
+        business = User.objects.create_user(username="business", password="password")
+        UserProfile.objects.create(user=business, type="business")
+        Offer.objects.create(user=business, title="Logo", description="Test")
+
+    def expire_snapshot(self):
+        stats, _ = cache.get(SNAPSHOT_KEY)
+        cache.set(SNAPSHOT_KEY, (stats, 0), None)
+
+    def test_snapshot_is_served_without_queries(self):
+        first = self.client.get("/api/base-info/").json()
+        self.assertEqual((first["offer_count"], first["business_profile_count"]), (1, 1))
+        self.assertIn("generated_at", first)
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/base-info/").json()
+        self.assertEqual(second, first)
+
+    def test_only_the_lock_holder_refreshes(self):
+        first = self.client.get("/api/base-info/").json()
+        Offer.objects.create(user=User.objects.get(), title="Neu", description="Test")
+        self.expire_snapshot()
+
+        cache.add(LOCK_KEY, True)
+        with self.assertNumQueries(0):
+            stale = self.client.get("/api/base-info/").json()
+        self.assertEqual(stale, first)
+
+        cache.delete(LOCK_KEY)
+        fresh = self.client.get("/api/base-info/").json()
+        self.assertEqual(fresh["offer_count"], 2)
+        self.assertGreater(fresh["generated_at"], first["generated_at"])
+        self.assertIsNone(cache.get(LOCK_KEY))
+
+
+class SharedBaseInfoLockTests(TestCase):
+    def test_lock_from_another_worker_is_respected(self):
+        business = User.objects.create_user(username="business", password="password")
+        first = self.client.get("/api/base-info/").json()
+        Offer.objects.create(user=business, title="Neu", description="Test")
+        stats, _ = cache.get(SNAPSHOT_KEY)
+        cache.set(SNAPSHOT_KEY, (stats, 0), None)
+
+        other_worker = DatabaseCache("coderr_cache", {})
+        self.assertTrue(other_worker.add(LOCK_KEY, "other", 30))
+        self.assertEqual(self.client.get("/api/base-info/").json(), first)
+        self.assertEqual(other_worker.get(LOCK_KEY), "other")
+
+
+@override_settings(SQL_INSTRUMENTATION_SAMPLE_RATE=1.0)
+class SQLInstrumentationTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(username=f"user{index}") for index in range(4)]
+
+    def load_profiles_one_by_one(self, request):
+        for user in User.objects.all():
+            UserProfile.objects.filter(user=user).first()
+        return HttpResponse("ok")
+
+    @override_settings(SQL_N_PLUS_ONE_THRESHOLD=3)
+    def test_reports_timing_and_flags_repeated_queries(self):
+        middleware = SQLInstrumentationMiddleware(self.load_profiles_one_by_one)
+        with self.assertLogs("coderr.sql", level="INFO") as logs:
+            response = middleware(RequestFactory().get("/api/profiles/"))
+
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="5 queries", db-slowest;dur=[\d.]+')
+        self.assertIn('db-n-plus-one;desc="1 repeated shapes"', response["Server-Timing"])
+        info, warning = logs.records
+        self.assertEqual(info.sql["query_count"], 5)
+        self.assertEqual(len(info.sql["slowest"]), 3)
+        self.assertEqual(info.sql["n_plus_one"][0]["count"], 4)
+        self.assertIn("coderr_app/tests.py", info.sql["n_plus_one"][0]["call_site"])
+        self.assertIn("load_profiles_one_by_one", warning.getMessage())
+
+    @override_settings(SQL_INSTRUMENTATION_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_are_untouched(self):
+        response = SQLInstrumentationMiddleware(self.load_profiles_one_by_one)(RequestFactory().get("/"))
+        self.assertFalse(response.has_header("Server-Timing"))
+
+    async def test_async_requests_are_measured_without_adaptation(self):
+        async def count_users(request):
+            await User.objects.acount()
+            return HttpResponse("ok")
+
+        middleware = SQLInstrumentationMiddleware(count_users)
+        self.assertTrue(iscoroutinefunction(middleware))
+        with self.assertLogs("coderr.sql", level="INFO"):
+            response = await middleware(RequestFactory().get("/api/login/"))
+        self.assertIn('desc="1 queries"', response["Server-Timing"])
+
+    @override_settings(DEBUG=True)
+    def test_asgi_handler_keeps_async_views_on_the_event_loop(self):
+        # Mit DEBUG protokolliert Django jede Middleware, für die es den Handler anpassen muss.
+        with self.assertNoLogs("django.request", level="DEBUG"):
+            ASGIHandler()
+
+    def test_in_lists_share_one_shape(self):
+        self.assertEqual(query_shape('WHERE "id" IN (%s, %s)'), query_shape('WHERE "id" IN (%s, %s, %s)'))
+
+    def test_header_on_api_responses(self):
+        self.client.force_login(self.users[0])
+        self.assertTrue(self.client.get("/api/orders/")["Server-Timing"].startswith("db;dur="))
+
+
+class MarketplaceDataTests(TestCase):
+    def generate(self, **options):
+        call_command("generate_marketplace_data", scale=0.05, seed=7, stdout=io.StringIO(), **options)
+
+    def test_generates_consistent_marketplace(self):
+        self.generate()
+        self.assertEqual(UserProfile.objects.filter(type="business").count(), 5)
+        self.assertEqual(UserProfile.objects.filter(type="customer").count(), 50)
+        self.assertEqual(Offer.objects.count(), 25)
+        self.assertEqual(OfferDetail.objects.count(), 75)
+        self.assertEqual(Order.objects.count(), 250)
+        self.assertEqual(Review.objects.count(), 100)
+        self.assertFalse(Offer.objects.filter(min_price__isnull=True).exists())
+
+        output = io.StringIO()
+        call_command("reconcile_order_counters", "--dry-run", stdout=output)
+        self.assertIn("0 Anbieter mit Abweichungen", output.getvalue())
+        self.assertEqual(
+            sum(BusinessRatingStats.objects.values_list("review_count", flat=True)), Review.objects.count())
+
+    def test_same_seed_gives_same_data(self):
+        self.generate()
+        first = list(Order.objects.order_by("id").values_list("business_user__username", "title", "price"))
+        self.generate(clear=True)
+        second = list(Order.objects.order_by("id").values_list("business_user__username", "title", "price"))
+        self.assertEqual(first, second)
+
+    def test_benchmark_writes_results(self):
+        self.generate()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.json")
+            call_command("benchmark_endpoints", requests=2, warmup=0, output=path, stdout=io.StringIO())
+            with open(path, encoding="utf-8") as handle:
+                results = json.load(handle)
+        self.assertEqual(results["dataset"]["coderr_app.Order"], 250)
+        self.assertEqual(results["endpoints"]["orders"]["status"], [200])
+        self.assertLessEqual(results["endpoints"]["orders"]["p50_ms"], results["endpoints"]["orders"]["p99_ms"])
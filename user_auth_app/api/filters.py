@@ -0,0 +1,26 @@
+import django_filters
+from django.db.models import Q
+from ..models import UserProfile
+
+
+class ProfileFilter(django_filters.FilterSet):
+    """
+    Filterklasse für Benutzerprofile.
+
+    - Ermöglicht das Filtern nach Standort (Teilstring, ohne Groß-/Kleinschreibung).
+    - `name` sucht in Benutzername sowie Vor- und Nachname aus Profil und Benutzer.
+    """
+    location = django_filters.CharFilter(field_name='location', lookup_expr='icontains', label='Location')
+    name = django_filters.CharFilter(method='filter_name', label='Name')
+
+    class Meta:
+        model = UserProfile
+        fields = ['location', 'name']
+
+    def filter_name(self, queryset, name, value):
+        """Filtert Profile, deren Benutzer- oder Anzeigename den Suchbegriff enthält."""
+        return queryset.filter(
+            Q(user__username__icontains=value)
+            | Q(first_name__icontains=value) | Q(last_name__icontains=value)
+            | Q(user__first_name__icontains=value) | Q(user__last_name__icontains=value)
+        )
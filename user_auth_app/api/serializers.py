@@ -1,18 +1,22 @@
 from django.contrib.auth.models import User
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from rest_framework import serializers
 from ..models import UserProfile
 from rest_framework import serializers
 from django.conf import settings
 from rest_framework.exceptions import PermissionDenied
 import re
+from coderr_app.images import variant_urls
+from coderr_app.review_stats import rating_summary
 
 class RegistrationSerializer(serializers.ModelSerializer):
     """
     Serialisiert die Benutzerregistrierung.
     
     - Überprüft, ob die Passwörter übereinstimmen.
-    - Stellt sicher, dass Benutzername und E-Mail-Adresse eindeutig sind.
-    - Erstellt einen Benutzer und ein zugehöriges UserProfile.
+    - Prüft keine Eindeutigkeit in der Datenbank; das übernimmt die asynchrone
+      `RegistrationView`, damit die Validierung ohne synchrones ORM auskommt.
+    - Legt selbst nichts an; Benutzer, UserProfile und Token erstellt die `RegistrationView`.
     """
     repeated_password = serializers.CharField(write_only=True)
     type = serializers.ChoiceField(choices=UserProfile.USER_TYPE_CHOICES)
@@ -22,6 +26,7 @@ class RegistrationSerializer(serializers.ModelSerializer):
         fields = ['username', 'email', 'password', 'repeated_password', 'type']
         extra_kwargs = {
             'password': {'write_only': True},
+            'username': {'validators': [UnicodeUsernameValidator()]},
         }
 
     def validate(self, data):
@@ -31,31 +36,11 @@ class RegistrationSerializer(serializers.ModelSerializer):
         if data['password'] != data['repeated_password']:
             errors['password'] = ["Das Passwort ist nicht gleich mit dem wiederholten Passwort."]
 
-        if User.objects.filter(username=data['username']).exists():
-            errors['username'] = ["Dieser Benutzername ist bereits vergeben."]
-
-        if User.objects.filter(email=data['email']).exists():
-            errors['email'] = ["Diese E-Mail-Adresse wird bereits verwendet."]
-
         if errors:
             raise serializers.ValidationError(errors)
 
         return data
 
-    def create(self, validated_data):
-        """Erstellt einen neuen Benutzer und ein zugehöriges UserProfile."""
-        validated_data.pop('repeated_password') 
-        user = User.objects.create_user(
-            username=validated_data['username'],
-            email=validated_data['email'],
-            password=validated_data['password']
-        )
-        UserProfile.objects.create(
-            user=user,
-            type=validated_data['type']
-        )
-        return user
-
 class LoginSerializer(serializers.Serializer):
     """
     Serialisiert die Benutzerauthentifizierung.
@@ -91,11 +76,12 @@ class UserProfileDetailSerializer(serializers.ModelSerializer):
     email = serializers.CharField(source="user.email", read_only=True)
     created_at = serializers.DateTimeField(source="user.date_joined", read_only=True) 
     file = serializers.SerializerMethodField()
+    file_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = UserProfile
         fields = [
-            "user", "username", "first_name", "last_name", "email", "file",
+            "user", "username", "first_name", "last_name", "email", "file", "file_variants",
             "location", "tel", "description", "working_hours",
             "type", "created_at", "uploaded_at"
         ]
@@ -106,6 +92,10 @@ class UserProfileDetailSerializer(serializers.ModelSerializer):
             file_url = obj.file.url  
             return file_url if file_url.startswith("http") else settings.MEDIA_URL + obj.file.name 
         return None 
+
+    def get_file_variants(self, obj):
+        """Gibt die URLs der verkleinerten Bildvarianten zurück (leer, solange sie fehlen)."""
+        return variant_urls(obj.file)
     
     def update(self, instance, validated_data):
         """Aktualisiert ein Benutzerprofil nur, wenn der angemeldete Benutzer der Besitzer ist."""
@@ -132,10 +122,15 @@ class UserSerializer(serializers.ModelSerializer):
 class CustomerProfileSerializer(serializers.ModelSerializer):
     """Serialisiert Kundenprofile mit Benutzerinformationen."""
     user = serializers.SerializerMethodField()
+    file_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = UserProfile
-        fields = ["user", "file", "uploaded_at", "type"]  
+        fields = ["user", "file", "file_variants", "uploaded_at", "type"]  
+
+    def get_file_variants(self, obj):
+        """Gibt die URLs der verkleinerten Bildvarianten zurück (leer, solange sie fehlen)."""
+        return variant_urls(obj.file)
 
     def get_user(self, obj):
         """Gibt grundlegende Benutzerdaten zurück."""
@@ -147,17 +142,27 @@ class CustomerProfileSerializer(serializers.ModelSerializer):
         }
 
 class BusinessProfileSerializer(serializers.ModelSerializer):
-    """Serialisiert Geschäftsprofile mit zusätzlichen Feldern wie Telefonnummer und Standort."""
+    """Serialisiert Geschäftsprofile mit zusätzlichen Feldern wie Telefonnummer, Standort und Bewertung."""
     user = serializers.SerializerMethodField()
     tel = serializers.CharField()
+    file_variants = serializers.SerializerMethodField()
+    rating = serializers.SerializerMethodField()
 
     class Meta:
         model = UserProfile
         fields = [
-            "user", "file", "location", "tel", "description",
-            "working_hours", "type"
+            "user", "file", "file_variants", "location", "tel", "description",
+            "working_hours", "type", "rating"
         ]  
 
+    def get_rating(self, obj):
+        """Gibt Bewertungsanzahl, Durchschnitt und Histogramm (1–5 Sterne) zurück."""
+        return rating_summary(obj.user, histogram=True)
+
+    def get_file_variants(self, obj):
+        """Gibt die URLs der verkleinerten Bildvarianten zurück (leer, solange sie fehlen)."""
+        return variant_urls(obj.file)
+
     def get_user(self, obj):
         """Gibt grundlegende Benutzerdaten zurück."""
         return {
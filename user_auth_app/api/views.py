@@ -1,85 +1,174 @@
 from rest_framework import status
-from rest_framework.views import APIView
 from .serializers import RegistrationSerializer, LoginSerializer, CustomerProfileSerializer, UserProfileDetailSerializer, BusinessProfileSerializer
 from rest_framework.authtoken.models import Token
-from rest_framework.response import Response
+import json
+from asgiref.sync import sync_to_async
 from django.contrib.auth import authenticate
-from rest_framework.permissions import AllowAny
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connections
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from ..hashing import HashingOverloaded, run_hashing
 from ..models import UserProfile
 from rest_framework.generics import RetrieveUpdateAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.generics import ListAPIView
 from rest_framework.exceptions import NotFound
 from django.db import transaction
+from coderr_app.api.conditional import ConditionalRetrieveMixin, make_etag
+from coderr_app.api.pagination import ProfileCursorPagination
+from .filters import ProfileFilter
+from coderr_app.images import has_variants
 
-class RegistrationView(APIView):
+def auth_response(data, status_code):
+    """Baut eine JSON-Response im Format der übrigen API-Views."""
+    return JsonResponse(data, status=status_code)
+
+
+def overloaded_response():
+    """Antwort, wenn der Hashing-Pool ausgelastet ist; der Client soll es kurz darauf erneut versuchen."""
+    response = auth_response(
+        {"detail": ["Zu viele Anmeldungen gleichzeitig. Bitte versuchen Sie es gleich erneut."]},
+        status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+    response["Retry-After"] = "1"
+    return response
+
+
+def read_payload(request):
+    """Liest JSON- oder Formulardaten aus dem Request-Body; `None` bei ungültigem JSON."""
+    if request.content_type == "application/json":
+        try:
+            payload = json.loads(request.body or b"{}")
+        except ValueError:
+            return None
+        return payload if isinstance(payload, dict) else None
+    return request.POST.dict()
+
+
+def token_payload(token, user):
+    return {
+        "token": token.key,
+        "username": user.username,
+        "email": user.email,
+        "user_id": user.id
+    }
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class RegistrationView(View):
     """
     API-View zur Registrierung neuer Benutzer.
     
     - Erstellt einen neuen Benutzer mit den angegebenen Daten.
     - Generiert ein Authentifizierungstoken für den neuen Benutzer.
     - Nutzt eine atomare Transaktion zur Fehlervermeidung.
+    - Läuft asynchron: Eindeutigkeitsprüfungen nutzen das async ORM, das
+      Passwort-Hashing läuft im begrenzten Thread-Pool.
     """
-    permission_classes = [AllowAny]
 
-    def post(self, request):
+    async def post(self, request):
         """Registriert einen neuen Benutzer und gibt ein Token zurück."""
-        serializer = RegistrationSerializer(data=request.data)
-        if serializer.is_valid():
-            try:
-                with transaction.atomic():
-                    user = serializer.save()
-                    token, _ = Token.objects.get_or_create(user=user)
-                    return Response({
-                        "token": token.key,
-                        "username": user.username,
-                        "email": user.email,
-                        "user_id": user.id
-                    }, status=status.HTTP_201_CREATED)
-            except Exception:
-                return Response(
-                    {"detail": ["Interner Serverfehler. Bitte versuchen Sie es später erneut."]},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-class CustomLoginView(APIView):
+        payload = read_payload(request)
+        if payload is None:
+            return auth_response({"detail": ["Ungültiges JSON."]}, status.HTTP_400_BAD_REQUEST)
+        serializer = RegistrationSerializer(data=payload)
+        if not serializer.is_valid():
+            return auth_response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        errors = {}
+        if await User.objects.filter(username=data['username']).aexists():
+            errors['username'] = ["Dieser Benutzername ist bereits vergeben."]
+        if await User.objects.filter(email=data['email']).aexists():
+            errors['email'] = ["Diese E-Mail-Adresse wird bereits verwendet."]
+        if errors:
+            return auth_response(errors, status.HTTP_400_BAD_REQUEST)
+
+        try:
+            password = await run_hashing(make_password, data['password'])
+        except HashingOverloaded:
+            return overloaded_response()
+
+        try:
+            user, token = await sync_to_async(create_account)(data, password)
+        except IntegrityError:
+            return auth_response(
+                {"username": ["Dieser Benutzername ist bereits vergeben."]}, status.HTTP_400_BAD_REQUEST)
+        return auth_response(token_payload(token, user), status.HTTP_201_CREATED)
+
+
+def create_account(data, password):
+    """Legt Benutzer (mit bereits gehashtem Passwort), UserProfile und Token in einer Transaktion an."""
+    with transaction.atomic():
+        user = User.objects.create(username=data['username'], email=data['email'], password=password)
+        UserProfile.objects.create(user=user, type=data['type'])
+        token = Token.objects.create(user=user)
+    return user, token
+
+
+def authenticate_in_pool(request, username, password):
+    """Ruft `authenticate()` im Hashing-Pool auf und gibt danach die DB-Verbindung des Pool-Threads frei."""
+    try:
+        return authenticate(request, username=username, password=password)
+    finally:
+        connections.close_all()
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class CustomLoginView(View):
     """
     API-View für die Benutzeranmeldung.
     
     - Überprüft die Anmeldedaten.
     - Gibt ein Authentifizierungstoken zurück, wenn die Anmeldung erfolgreich ist.
+    - Läuft asynchron: `authenticate()` (mit allen `AUTHENTICATION_BACKENDS`,
+      dem Signal `user_login_failed` und dem Aktualisieren veralteter Hashes)
+      läuft im begrenzten Thread-Pool, das Token kommt über das async ORM.
     """
-    permission_classes = [AllowAny]
 
-    def post(self, request):
+    async def post(self, request):
         """Authentifiziert einen Benutzer und gibt ein Token zurück."""
-        serializer = LoginSerializer(data=request.data)
-        if serializer.is_valid():
-            username = serializer.validated_data['username']
-            password = serializer.validated_data['password']
-            user = authenticate(username=username, password=password)
-            if user is not None:
-                token, _ = Token.objects.get_or_create(user=user)
-                return Response({
-                    "token": token.key,
-                    "username": user.username,
-                    "email": user.email,
-                    "user_id": user.id
-                }, status=status.HTTP_200_OK)
-            return Response({"detail": ["Falsche Anmeldedaten."]}, status=status.HTTP_400_BAD_REQUEST)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-class UserProfileDetailView(RetrieveUpdateAPIView):
+        payload = read_payload(request)
+        if payload is None:
+            return auth_response({"detail": ["Ungültiges JSON."]}, status.HTTP_400_BAD_REQUEST)
+        serializer = LoginSerializer(data=payload)
+        if not serializer.is_valid():
+            return auth_response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+        username = serializer.validated_data['username']
+        password = serializer.validated_data['password']
+        try:
+            user = await run_hashing(authenticate_in_pool, request, username, password)
+        except HashingOverloaded:
+            return overloaded_response()
+
+        if user is None:
+            return auth_response({"detail": ["Falsche Anmeldedaten."]}, status.HTTP_400_BAD_REQUEST)
+        token, _ = await Token.objects.aget_or_create(user=user)
+        return auth_response(token_payload(token, user), status.HTTP_200_OK)
+
+class UserProfileDetailView(ConditionalRetrieveMixin, RetrieveUpdateAPIView):
     """
     API-View zur Anzeige und Aktualisierung eines Benutzerprofils.
     
     - Gibt Details eines bestimmten Benutzerprofils basierend auf der ID zurück.
     - Erlaubt das Aktualisieren des Profils für authentifizierte Benutzer.
+    - Unterstützt bedingte GET-Anfragen über den ETag; Benutzername, E-Mail
+      und Bildvarianten haben keinen Zeitstempel, daher kein Last-Modified.
     """
     queryset = UserProfile.objects.all()
     serializer_class = UserProfileDetailSerializer
     permission_classes = [IsAuthenticated]
+    send_last_modified = False
+
+    def get_etag(self, instance):
+        """Benutzername, E-Mail und vorhandene Bildvarianten fließen mit in den ETag ein."""
+        return make_etag("UserProfile", instance.pk, instance.updated_at.isoformat(),
+                         instance.user.username, instance.user.email, has_variants(instance.file))
 
     def get_object(self):
         """Holt das Benutzerprofil basierend auf der angegebenen ID."""
@@ -92,20 +181,30 @@ class UserProfileDetailView(RetrieveUpdateAPIView):
             raise NotFound("❌ Fehler: Keine gültige ID gefunden.")
 
         try:
-            return UserProfile.objects.get(user__id=profile_id)
+            return UserProfile.objects.select_related("user").get(user__id=profile_id)
         except UserProfile.DoesNotExist:
             raise NotFound("❌ Fehler: Das angeforderte UserProfile existiert nicht.")
 
 class CustomerProfilesListView(ListAPIView):
     """
     API-View zur Auflistung aller Kundenprofile.
+
+    - Cursor-paginiert und nach Standort (`location`) und Name (`name`) filterbar.
+    - Benutzerdaten werden per JOIN mitgeladen; die Anzahl der Abfragen ist fest.
     """
-    queryset = UserProfile.objects.filter(type='customer')
+    queryset = UserProfile.objects.filter(type='customer').select_related("user")
     serializer_class = CustomerProfileSerializer
+    pagination_class = ProfileCursorPagination
+    filterset_class = ProfileFilter
 
 class BusinessProfilesListView(ListAPIView):
     """
     API-View zur Auflistung aller Geschäftsprofile.
+
+    - Cursor-paginiert und nach Standort (`location`) und Name (`name`) filterbar.
+    - Benutzerdaten und Bewertungsstatistik werden per JOIN mitgeladen; die Anzahl der Abfragen ist fest.
     """
-    queryset = UserProfile.objects.filter(type='business')
+    queryset = UserProfile.objects.filter(type='business').select_related("user", "user__rating_stats")
     serializer_class = BusinessProfileSerializer
+    pagination_class = ProfileCursorPagination
+    filterset_class = ProfileFilter
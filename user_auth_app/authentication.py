@@ -0,0 +1,111 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+
+class TokenCache:
+    """
+    Begrenzter LRU-Cache mit TTL für Token, Benutzer und Profil im Prozess.
+
+    Die gespeicherten Objekte werden nie direkt herausgegeben, sondern je
+    Anfrage kopiert, damit Änderungen einer Anfrage keine andere erreichen.
+    """
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.keys_by_user = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            token, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self.entries.move_to_end(key)
+        return copy_token(token)
+
+    def set(self, token):
+        with self.lock:
+            self._remove(token.key)
+            self.entries[token.key] = (copy_token(token), time.monotonic() + settings.TOKEN_AUTH_CACHE_TTL)
+            self.keys_by_user.setdefault(token.user_id, set()).add(token.key)
+            while len(self.entries) > settings.TOKEN_AUTH_CACHE_SIZE:
+                self._remove(next(iter(self.entries)))
+
+    def evict_key(self, key):
+        with self.lock:
+            self._remove(key)
+
+    def evict_user(self, user_id):
+        with self.lock:
+            for key in list(self.keys_by_user.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.keys_by_user.clear()
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        user_id = entry[0].user_id
+        keys = self.keys_by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.keys_by_user[user_id]
+
+
+def copy_token(token):
+    """Kopiert Token, Benutzer und (falls geladen) Profil, ohne die Datenbank zu berühren."""
+    token = copy.copy(token)
+    token.user = copy.copy(token.user)
+    profile = token.user._state.fields_cache.get("userprofile")
+    if profile is not None:
+        token.user.userprofile = copy.copy(profile)
+    return token
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token-Authentifizierung mit Prozess-Cache.
+
+    - Token, Benutzer und Benutzerprofil werden mit einer Abfrage geladen und
+      für `TOKEN_AUTH_CACHE_TTL` Sekunden vorgehalten (höchstens
+      `TOKEN_AUTH_CACHE_SIZE` Einträge, zuletzt benutzte bleiben erhalten).
+    - Bei warmem Cache entstehen keine Abfragen für die Authentifizierung.
+    - Gelöschte Token sowie geänderte Benutzer und Profile werden über Signale
+      entfernt, allerdings nur im Prozess, der die Änderung ausführt. Andere
+      Worker akzeptieren ein gelöschtes Token oder einen deaktivierten Benutzer
+      noch bis zu `TOKEN_AUTH_CACHE_TTL` Sekunden; das ist die zugesicherte Obergrenze.
+    """
+
+    def authenticate_credentials(self, key):
+        token = token_cache.get(key)
+        if token is None:
+            model = self.get_model()
+            try:
+                token = model.objects.select_related("user", "user__userprofile").get(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_("Invalid token."))
+            if token.user.is_active:
+                token_cache.set(token)
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+
+        return (token.user, token)
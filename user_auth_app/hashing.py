@@ -0,0 +1,51 @@
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+
+
+class HashingOverloaded(Exception):
+    """Es ist innerhalb der Wartezeit kein Platz im Hashing-Pool frei geworden."""
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def get_executor():
+    """Gibt den prozessweiten Thread-Pool für Passwort-Hashing zurück (wird bei Bedarf angelegt)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.AUTH_HASHING_WORKERS, thread_name_prefix="auth-hashing")
+        return _executor
+
+
+def get_semaphore():
+    """Begrenzt die gleichzeitigen Hash-Vorgänge je Event-Loop auf `AUTH_HASHING_WORKERS`."""
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(settings.AUTH_HASHING_WORKERS)
+    return semaphore
+
+
+async def run_hashing(func, *args):
+    """
+    Führt eine Passwort-Hashfunktion im Thread-Pool aus, ohne den Event-Loop zu blockieren.
+
+    Wer länger als `AUTH_HASHING_WAIT_TIMEOUT` Sekunden auf einen freien Platz
+    wartet, erhält `HashingOverloaded`, statt die Warteschlange zu verlängern.
+    """
+    semaphore = get_semaphore()
+    try:
+        await asyncio.wait_for(semaphore.acquire(), settings.AUTH_HASHING_WAIT_TIMEOUT)
+    except TimeoutError:
+        raise HashingOverloaded()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(get_executor(), func, *args)
+    finally:
+        semaphore.release()
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_auth_app', '0023_userprofile_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['type', 'id'], name='userprofile_type_id_idx'),
+        ),
+    ]
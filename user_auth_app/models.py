@@ -19,6 +19,12 @@ class UserProfile(models.Model):
     working_hours = models.CharField(max_length=50, blank=True, null=True)
     file = models.ImageField(upload_to="profiles/", blank=True, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['type', 'id'], name='userprofile_type_id_idx'),
+        ]
 
 
     def __str__(self):
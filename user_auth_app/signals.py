@@ -0,0 +1,33 @@
+"""
+Räumen den Token-Cache bei Änderungen auf.
+
+Der Cache liegt im Prozess; die Signale erreichen nur den Prozess, der die
+Änderung speichert. Andere Worker sehen sie spätestens nach `TOKEN_AUTH_CACHE_TTL` Sekunden.
+"""
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from .authentication import token_cache
+from .models import UserProfile
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def evict_cached_token(sender, instance, **kwargs):
+    """Entfernt ein geändertes oder gelöschtes Token aus dem Authentifizierungs-Cache."""
+    token_cache.evict_key(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def evict_cached_user(sender, instance, **kwargs):
+    """Entfernt die Token eines geänderten (z. B. deaktivierten) Benutzers aus dem Cache."""
+    token_cache.evict_user(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def evict_cached_profile(sender, instance, **kwargs):
+    """Entfernt die Token eines Benutzers, dessen Profil (z. B. der Typ) sich geändert hat."""
+    token_cache.evict_user(instance.user_id)
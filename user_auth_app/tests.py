@@ -1,12 +1,20 @@
 from django.contrib.auth.models import User
-from rest_framework.test import APITestCase
+from rest_framework.test import APITestCase, APITransactionTestCase
 from rest_framework import status
 from rest_framework.authtoken.models import Token
+from django.contrib.auth.signals import user_login_failed
 from django.urls import reverse
 from .models import UserProfile
+from .authentication import token_cache
+from .hashing import HashingOverloaded, run_hashing
+import asyncio
+import time
+from unittest import mock
+from django.conf import settings
 
 
-class AuthTestCase(APITestCase):
+class AuthTestCase(APITransactionTestCase):
+    # Transaktional, weil der Login im Hashing-Pool mit eigener DB-Verbindung prüft.
 
     def setUp(self):
         """Erstelle einen Test-Benutzer"""
@@ -33,9 +41,9 @@ class AuthTestCase(APITestCase):
         response = self.client.post(url, data, format="json")
 
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertIn("token", response.data)
-        self.assertEqual(response.data["username"], "newuser")
-        self.assertEqual(response.data["email"], "newuser@example.com")
+        self.assertIn("token", response.json())
+        self.assertEqual(response.json()["username"], "newuser")
+        self.assertEqual(response.json()["email"], "newuser@example.com")
 
     def test_registration_password_mismatch(self):
         """Testet Registrierung mit nicht übereinstimmenden Passwörtern"""
@@ -50,8 +58,8 @@ class AuthTestCase(APITestCase):
         response = self.client.post(url, data, format="json")
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertIn("password", response.data)
-        self.assertEqual(response.data["password"], [
+        self.assertIn("password", response.json())
+        self.assertEqual(response.json()["password"], [
                          "Das Passwort ist nicht gleich mit dem wiederholten Passwort."])
 
     def test_registration_username_taken(self):
@@ -70,8 +78,8 @@ class AuthTestCase(APITestCase):
             "A user with that username already exists."
         ]
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertIn("username", response.data)
-        self.assertIn(response.data["username"][0], expected_messages)
+        self.assertIn("username", response.json())
+        self.assertIn(response.json()["username"][0], expected_messages)
 
     def test_registration_email_taken(self):
         """Testet Registrierung mit bereits verwendeter E-Mail"""
@@ -86,8 +94,8 @@ class AuthTestCase(APITestCase):
         response = self.client.post(url, data, format="json")
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertIn("email", response.data)
-        self.assertEqual(response.data["email"], [
+        self.assertIn("email", response.json())
+        self.assertEqual(response.json()["email"], [
                          "Diese E-Mail-Adresse wird bereits verwendet."])
 
     def test_login_success(self):
@@ -100,9 +108,9 @@ class AuthTestCase(APITestCase):
         response = self.client.post(url, data, format="json")
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIn("token", response.data)
-        self.assertEqual(response.data["username"], "testuser")
-        self.assertEqual(response.data["email"], "test@example.com")
+        self.assertIn("token", response.json())
+        self.assertEqual(response.json()["username"], "testuser")
+        self.assertEqual(response.json()["email"], "test@example.com")
 
     def test_login_invalid_password(self):
         """Testet Login mit falschem Passwort"""
@@ -114,8 +122,8 @@ class AuthTestCase(APITestCase):
         response = self.client.post(url, data, format="json")
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertIn("detail", response.data)
-        self.assertEqual(response.data["detail"], ["Falsche Anmeldedaten."])
+        self.assertIn("detail", response.json())
+        self.assertEqual(response.json()["detail"], ["Falsche Anmeldedaten."])
 
     def test_login_nonexistent_user(self):
         """Testet Login mit nicht existierendem Benutzer"""
@@ -127,5 +135,175 @@ class AuthTestCase(APITestCase):
         response = self.client.post(url, data, format="json")
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertIn("detail", response.data)
-        self.assertEqual(response.data["detail"], ["Falsche Anmeldedaten."])
+        self.assertIn("detail", response.json())
+        self.assertEqual(response.json()["detail"], ["Falsche Anmeldedaten."])
+
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+
+    def setUp(self):
+        """Erstelle einen Anbieter mit Token und leere den Token-Cache"""
+        token_cache.clear()
+        self.user = User.objects.create_user(username="provider", password="securepassword123")
+        self.profile = UserProfile.objects.create(user=self.user, type="business")
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.client.get("/api/base-info/")
+
+    def test_warm_cache_needs_no_queries(self):
+        """Testet, dass Token, Benutzer und Profiltyp bei warmem Cache ohne Abfrage vorliegen"""
+        with self.assertNumQueries(0):
+            response = self.client.post("/api/offers/bulk/", {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_deleted_token_is_rejected(self):
+        """Testet, dass ein gelöschtes Token im ändernden Prozess sofort ungültig ist"""
+        self.token.delete()
+        response = self.client.post("/api/offers/bulk/", {}, format="json")
+        self.assertEqual(response.data["detail"].code, "authentication_failed")
+
+    def test_deactivated_user_is_rejected(self):
+        """Testet, dass ein deaktivierter Benutzer im ändernden Prozess sofort abgewiesen wird"""
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post("/api/offers/bulk/", {}, format="json")
+        self.assertEqual(response.data["detail"].code, "authentication_failed")
+
+    def test_change_in_other_process_applies_after_ttl(self):
+        """Testet, dass eine Löschung ohne Signal (wie in einem anderen Worker) spätestens nach der TTL greift"""
+        Token.objects.filter(pk=self.token.pk)._raw_delete("default")
+        response = self.client.post("/api/offers/bulk/", {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        later = time.monotonic() + settings.TOKEN_AUTH_CACHE_TTL
+        with mock.patch("user_auth_app.authentication.time.monotonic", return_value=later):
+            response = self.client.post("/api/offers/bulk/", {}, format="json")
+        self.assertEqual(response.data["detail"].code, "authentication_failed")
+
+    def test_profile_type_change_is_applied(self):
+        """Testet, dass ein geänderter Profiltyp die Berechtigungen sofort ändert"""
+        self.profile.type = "customer"
+        self.profile.save()
+        response = self.client.post("/api/offers/bulk/", {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.data["detail"].code, "permission_denied")
+
+    def test_cache_is_bounded(self):
+        """Testet, dass der Cache die zuletzt benutzten Einträge behält"""
+        with self.settings(TOKEN_AUTH_CACHE_SIZE=1):
+            other = User.objects.create_user(username="other", password="securepassword123")
+            other_token = Token.objects.create(user=other)
+            self.client.credentials(HTTP_AUTHORIZATION=f"Token {other_token.key}")
+            self.client.get("/api/base-info/")
+        self.assertIsNone(token_cache.get(self.token.key))
+        self.assertIsNotNone(token_cache.get(other_token.key))
+
+
+
+class AsyncAuthViewTests(APITransactionTestCase):
+    # `authenticate()` läuft im Hashing-Pool mit eigener DB-Verbindung und sieht nur festgeschriebene Daten.
+
+    def setUp(self):
+        """Erstelle einen Test-Benutzer"""
+        self.user = User.objects.create_user(username="testuser", password="securepassword123")
+
+    def test_login_inactive_user(self):
+        """Testet, dass deaktivierte Benutzer sich nicht anmelden können"""
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post(reverse("login"), {"username": "testuser", "password": "securepassword123"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_failed_login_sends_signal(self):
+        """Testet, dass der Login über `authenticate()` läuft und `user_login_failed` auslöst"""
+        received = []
+        handler = lambda sender, credentials, **kwargs: received.append(credentials["username"])
+        user_login_failed.connect(handler)
+        try:
+            response = self.client.post(reverse("login"), {"username": "testuser", "password": "falsch"}, format="json")
+        finally:
+            user_login_failed.disconnect(handler)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(received, ["testuser"])
+
+    def test_login_with_form_data(self):
+        """Testet Login mit Formulardaten statt JSON"""
+        response = self.client.post(reverse("login"), {"username": "testuser", "password": "securepassword123"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["token"], Token.objects.get(user=self.user).key)
+
+    def test_invalid_json(self):
+        """Testet, dass ungültiges JSON mit 400 beantwortet wird"""
+        response = self.client.post(reverse("login"), "{kaputt", content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_registration_hashes_password(self):
+        """Testet, dass das Passwort bei der Registrierung gehasht gespeichert wird"""
+        data = {"username": "neu", "email": "neu@example.com", "password": "pw123456",
+                "repeated_password": "pw123456", "type": "business"}
+        self.assertEqual(self.client.post(reverse("registration"), data, format="json").status_code, 201)
+        user = User.objects.get(username="neu")
+        self.assertTrue(user.check_password("pw123456"))
+        self.assertEqual(user.userprofile.type, "business")
+
+    def test_hashing_pool_rejects_when_saturated(self):
+        """Testet, dass bei vollem Hashing-Pool nach der Wartezeit abgelehnt wird, ohne den Event-Loop zu blockieren"""
+        async def scenario():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            ticking = asyncio.ensure_future(ticker())
+            busy = asyncio.ensure_future(run_hashing(time.sleep, 0.3))
+            await asyncio.sleep(0)
+            with self.assertRaises(HashingOverloaded):
+                await run_hashing(time.sleep, 0)
+            await busy
+            ticking.cancel()
+            return ticks
+
+        with self.settings(AUTH_HASHING_WORKERS=1, AUTH_HASHING_WAIT_TIMEOUT=0.05):
+            ticks = asyncio.run(scenario())
+        self.assertGreater(ticks, 5)
+
+
+
+class ProfileListTests(APITestCase):
+
+    def setUp(self):
+        """Erstelle Geschäfts- und Kundenprofile"""
+        for index in range(5):
+            user = User.objects.create_user(username=f"anbieter{index}", first_name=f"Vorname{index}")
+            UserProfile.objects.create(user=user, type="business", location="Berlin" if index % 2 else "Hamburg")
+        for index in range(3):
+            user = User.objects.create_user(username=f"kunde{index}")
+            UserProfile.objects.create(user=user, type="customer", last_name="Müller" if index == 0 else "")
+        self.client.force_authenticate(User.objects.first())
+
+    def test_business_profiles_are_paginated(self):
+        """Testet die Cursor-Paginierung der Geschäftsprofile"""
+        first = self.client.get(reverse("business-profiles"), {"page_size": 3}).json()
+        second = self.client.get(first["next"]).json()
+        usernames = [profile["user"]["username"] for profile in first["results"] + second["results"]]
+        self.assertEqual(usernames, [f"anbieter{index}" for index in range(4, -1, -1)])
+        self.assertIsNone(second["next"])
+
+    def test_filters(self):
+        """Testet die Filter nach Standort und Name"""
+        response = self.client.get(reverse("business-profiles"), {"location": "berlin"})
+        self.assertEqual(len(response.json()["results"]), 2)
+        response = self.client.get(reverse("business-profiles"), {"name": "vorname3"})
+        self.assertEqual([p["user"]["username"] for p in response.json()["results"]], ["anbieter3"])
+        response = self.client.get(reverse("customer-profiles"), {"name": "müller"})
+        self.assertEqual([p["user"]["username"] for p in response.json()["results"]], ["kunde0"])
+
+    def test_query_count_does_not_grow(self):
+        """Testet, dass die Anzahl der Abfragen nicht von der Anzahl der Profile abhängt"""
+        with self.assertNumQueries(1):
+            self.client.get(reverse("business-profiles"))
+        with self.assertNumQueries(1):
+            self.client.get(reverse("customer-profiles"))